@@ -0,0 +1,536 @@
+"""Time the cogs' database queries against a seeded local Postgres
+
+Run from the project root against a scratch database:
+
+    python -m bench.dbbench --dsn postgresql://localhost/winterhaven_bench --output db_results.json
+    python -m bench.dbbench --dsn ... --reuse --compare db_results.json
+
+Everything is created in its own schema, which is dropped afterwards unless
+--keep is given. --reuse skips seeding when a kept schema is already there.
+"""
+import argparse
+import asyncio
+import asyncpg
+import json
+import os
+import random
+import subprocess
+import time
+from datetime import datetime, timedelta, timezone
+from bench.harness import percentile
+from utils import queries
+from utils.schema import apply_migrations
+
+SCHEMA = "winterhaven_bench"
+BENCH_GUILD_ID = 100000000000000000  # Every seeded row belongs to this guild
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+INTERACTION_TYPES = [
+    'boop', 'bap', 'hug', 'nuzzle', 'pat', 'snuggle', 'purr', 'wag', 'flop', 'blep',
+    'scritch', 'groom', 'tail', 'yip', 'wiggle', 'pounce', 'cuddle', 'headpat', 'gift',
+    'howl', 'nom', 'chase', 'happy', 'sleepy', 'excited'
+]
+
+# Arguments for every statement in the query registry, which is timed with
+# the exact SQL the cogs prepare. "args" picks parameters from the seeded data
+# so lookups hit real rows; writes are rolled back after timing.
+STATEMENT_ARGS = {
+    "levels.add_xp": {
+        "args": lambda rng, data: (BENCH_GUILD_ID, rng.choice(data["users"]), rng.randint(15, 25)),
+        "write": True,
+    },
+    "levels.set_level": {
+        "args": lambda rng, data: (BENCH_GUILD_ID, rng.choice(data["users"]), rng.randint(1, 50)),
+        "write": True,
+    },
+    "levels.raise_level": {
+        "args": lambda rng, data: (BENCH_GUILD_ID, rng.choice(data["users"]), rng.randint(1, 50)),
+        "write": True,
+    },
+    "levels.remove_xp": {
+        "args": lambda rng, data: (BENCH_GUILD_ID, rng.choice(data["users"]), rng.randint(1, 500)),
+        "write": True,
+    },
+    "levels.get": {
+        "args": lambda rng, data: (BENCH_GUILD_ID, rng.choice(data["users"])),
+    },
+    "economy.award": {
+        "args": lambda rng, data: (BENCH_GUILD_ID, rng.choice(data["users"]), rng.randint(1, 5), datetime.now(timezone.utc)),
+        "write": True,
+    },
+    "economy.balance": {
+        "args": lambda rng, data: (BENCH_GUILD_ID, rng.choice(data["users"])),
+    },
+    "interactions.record": {
+        "args": lambda rng, data: (BENCH_GUILD_ID, rng.choice(data["users"]), rng.choice(INTERACTION_TYPES)),
+        "write": True,
+    },
+    "interactions.last_used": {
+        "args": lambda rng, data: (BENCH_GUILD_ID, rng.choice(data["users"]), rng.choice(INTERACTION_TYPES)),
+    },
+    "packs.membership": {
+        "args": lambda rng, data: (BENCH_GUILD_ID, rng.choice(data["pack_members"])),
+    },
+    "packs.member_pack": {
+        "args": lambda rng, data: (BENCH_GUILD_ID, rng.choice(data["pack_members"])),
+    },
+    "marriage.spouse": {
+        "args": lambda rng, data: (rng.choice(data["married"]),),
+    },
+    "collar.owner": {
+        "args": lambda rng, data: (rng.choice(data["pets"]),),
+    },
+    "collar.pets": {
+        "args": lambda rng, data: (rng.choice(data["owners"]),),
+    },
+    "collar.count": {
+        "args": lambda rng, data: (rng.choice(data["owners"]),),
+    },
+}
+
+# Registered statements first, then the cogs' other queries with the same SQL
+QUERIES = [
+    dict(spec, name=name, sql=queries.STATEMENTS[name]) for name, spec in STATEMENT_ARGS.items()
+] + [
+    {
+        "name": "levels.leaderboard",
+        "sql": "SELECT user_id, xp, level FROM levels WHERE guild_id = $1 ORDER BY xp DESC LIMIT 10",
+        "args": lambda rng, data: (BENCH_GUILD_ID,),
+    },
+    {
+        "name": "packs.info_by_name",
+        "sql": "SELECT * FROM packs WHERE guild_id = $1 AND name = $2",
+        "args": lambda rng, data: (BENCH_GUILD_ID, rng.choice(data["pack_names"])),
+    },
+    {
+        "name": "packs.members",
+        "sql": """
+            SELECT pm.user_id, pm.role
+            FROM pack_members pm
+            WHERE pm.pack_id = $1
+            ORDER BY
+                CASE pm.role
+                    WHEN 'leader' THEN 1
+                    WHEN 'officer' THEN 2
+                    ELSE 3
+                END
+        """,
+        "args": lambda rng, data: (rng.choice(data["pack_ids"]),),
+    },
+    {
+        "name": "packs.alliances_or_join",
+        "sql": """
+            SELECT p.name
+            FROM packs p
+            JOIN pack_alliances pa ON
+                (pa.pack1_id = $1 AND pa.pack2_id = p.id) OR
+                (pa.pack1_id = p.id AND pa.pack2_id = $1)
+        """,
+        "args": lambda rng, data: (rng.choice(data["pack_ids"]),),
+    },
+    {
+        "name": "packs.alliance_count",
+        "sql": """
+            SELECT COUNT(*) FROM pack_alliances
+            WHERE pack1_id = $1 OR pack2_id = $1
+        """,
+        "args": lambda rng, data: (rng.choice(data["pack_ids"]),),
+    },
+    {
+        "name": "packs.alliance_exists",
+        "sql": """
+            SELECT * FROM pack_alliances
+            WHERE (pack1_id = $1 AND pack2_id = $2)
+            OR (pack1_id = $2 AND pack2_id = $1)
+        """,
+        "args": lambda rng, data: tuple(rng.sample(data["pack_ids"], 2)),
+    },
+    {
+        "name": "packs.alliance_request_exists",
+        "sql": """
+            SELECT * FROM pack_alliance_requests
+            WHERE (requesting_pack_id = $1 AND target_pack_id = $2)
+            OR (requesting_pack_id = $2 AND target_pack_id = $1)
+            AND status = 'pending'
+        """,
+        "args": lambda rng, data: tuple(rng.sample(data["pack_ids"], 2)),
+    },
+    {
+        "name": "packs.leader_pack",
+        "sql": """
+            SELECT p.*
+            FROM packs p
+            JOIN pack_members pm ON p.id = pm.pack_id
+            WHERE pm.guild_id = $1 AND pm.user_id = $2 AND pm.role = 'leader'
+        """,
+        "args": lambda rng, data: (BENCH_GUILD_ID, rng.choice(data["pack_leaders"])),
+    },
+    {
+        "name": "packs.by_name_cast",
+        "sql": """
+            SELECT p.*
+            FROM packs p
+            WHERE p.guild_id = $1 AND CAST(p.name AS text) = CAST($2 AS text)
+        """,
+        "args": lambda rng, data: (BENCH_GUILD_ID, rng.choice(data["pack_names"])),
+    },
+    {
+        "name": "packs.incoming_requests",
+        "sql": """
+            SELECT p.name as requester_name
+            FROM pack_alliance_requests par
+            JOIN packs p ON par.requesting_pack_id = p.id
+            WHERE par.target_pack_id = $1 AND par.status = 'pending'
+        """,
+        "args": lambda rng, data: (rng.choice(data["pack_ids"]),),
+    },
+    {
+        "name": "packs.pending_invite",
+        "sql": """
+            SELECT * FROM pack_invites
+            WHERE user_id = $1 AND pack_id = $2 AND status = 'pending'
+        """,
+        "args": lambda rng, data: rng.choice(data["invites"]),
+    },
+    {
+        "name": "packs.list",
+        "sql": """
+            SELECT name, member_count, description
+            FROM packs
+            WHERE guild_id = $1
+            ORDER BY name
+        """,
+        "args": lambda rng, data: (BENCH_GUILD_ID,),
+    },
+    {
+        "name": "packs.all_alliances",
+        "sql": """
+            SELECT p1.name as pack1_name, p2.name as pack2_name
+            FROM pack_alliances pa
+            JOIN packs p1 ON pa.pack1_id = p1.id
+            JOIN packs p2 ON pa.pack2_id = p2.id
+            WHERE p1.guild_id = $1
+            ORDER BY p1.name, p2.name
+        """,
+        "args": lambda rng, data: (BENCH_GUILD_ID,),
+    },
+    {
+        "name": "interactions.top_by_type",
+        "sql": """
+            SELECT user_id, count
+            FROM interaction_stats
+            WHERE guild_id = $1 AND interaction_type = $2
+            ORDER BY count DESC
+            LIMIT 10
+        """,
+        "args": lambda rng, data: (BENCH_GUILD_ID, rng.choice(INTERACTION_TYPES)),
+    },
+    {
+        "name": "interactions.top_overall",
+        "sql": """
+            SELECT user_id, SUM(count) as total
+            FROM interaction_stats
+            WHERE guild_id = $1
+            GROUP BY user_id
+            ORDER BY total DESC
+            LIMIT 10
+        """,
+        "args": lambda rng, data: (BENCH_GUILD_ID,),
+    },
+    {
+        "name": "verification.load_state",
+        "sql": """
+            SELECT user_id, state, expires_at
+            FROM verification_state
+            WHERE expires_at IS NULL OR expires_at > NOW()
+        """,
+        "args": lambda rng, data: (),
+    },
+    {
+        "name": "bump.latest",
+        "sql": "SELECT DISTINCT ON (guild_id) guild_id, next_bump_time FROM bump_data ORDER BY guild_id, id DESC",
+        "args": lambda rng, data: (),
+    },
+]
+
+async def connect(dsn: str) -> asyncpg.Connection:
+    return await asyncpg.connect(dsn, server_settings={'search_path': SCHEMA})
+
+async def create_schema(conn: asyncpg.Connection):
+    """Recreate the benchmark schema by running the bot's migrations"""
+    await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+    await apply_migrations(conn, os.path.join(ROOT, "migrations"))
+
+def generate(args, rng: random.Random) -> tuple:
+    """Build every table's rows plus the ID pools the queries sample from"""
+    now = datetime.now(timezone.utc)
+    naive_now = now.replace(tzinfo=None)
+    users = [300000000000000000 + index for index in range(args.users)]
+    rows = {}
+
+    # Long-tailed XP and coin balances, like a real server
+    rows["levels"] = [
+        (BENCH_GUILD_ID, user_id, int(rng.paretovariate(1.2) * 200), rng.randint(1, 40), naive_now - timedelta(minutes=rng.randint(0, 100000)))
+        for user_id in users
+    ]
+    rows["user_economy"] = [
+        (BENCH_GUILD_ID, user_id, int(rng.paretovariate(1.5) * 20), now - timedelta(minutes=rng.randint(0, 100000)))
+        for user_id in users
+    ]
+
+    per_user = max(1, min(len(INTERACTION_TYPES), args.interactions // max(1, args.users)))
+    rows["interaction_stats"] = [
+        (BENCH_GUILD_ID, user_id, interaction_type, int(rng.paretovariate(1.3)), naive_now - timedelta(minutes=rng.randint(0, 50000)))
+        for user_id in users
+        for interaction_type in rng.sample(INTERACTION_TYPES, per_user)
+    ][:args.interactions]
+
+    # Half the users are in a pack; the first member leads and the next two are officers
+    shuffled = users[:]
+    rng.shuffle(shuffled)
+    in_packs = shuffled[:len(users) // 2]
+    pack_ids = list(range(1, args.packs + 1))
+    pack_members = {pack_id: [] for pack_id in pack_ids}
+    for index, user_id in enumerate(in_packs):
+        pack_members[pack_ids[index % len(pack_ids)]].append(user_id)
+
+    rows["packs"] = []
+    rows["pack_members"] = []
+    for pack_id, members in pack_members.items():
+        leader = members[0] if members else users[pack_id % len(users)]
+        rows["packs"].append((pack_id, BENCH_GUILD_ID, f"Pack {pack_id}", "A benchmark pack", leader, None, max(1, len(members)), now))
+        for position, user_id in enumerate(members):
+            role = 'leader' if position == 0 else 'officer' if position < 3 else 'member'
+            rows["pack_members"].append((BENCH_GUILD_ID, pack_id, user_id, role, now))
+
+    # At most two alliances per pack: two shuffled pairings of all packs
+    alliances = set()
+    for _ in range(2):
+        order = pack_ids[:]
+        rng.shuffle(order)
+        for pack1, pack2 in zip(order[::2], order[1::2]):
+            if (pack2, pack1) not in alliances:
+                alliances.add((pack1, pack2))
+    rows["pack_alliances"] = [(pack1, pack2, now) for pack1, pack2 in alliances]
+
+    requests = set()
+    while len(requests) < args.packs // 2:
+        pack1, pack2 = rng.sample(pack_ids, 2)
+        if (pack1, pack2) not in alliances and (pack2, pack1) not in alliances:
+            requests.add((pack1, pack2))
+    rows["pack_alliance_requests"] = [(pack1, pack2, rng.choice(['pending', 'pending', 'declined']), now) for pack1, pack2 in requests]
+
+    invites = {}
+    while len(invites) < args.packs * 4:
+        invites[(rng.choice(pack_ids), rng.choice(users))] = rng.choice(['pending', 'accepted', 'declined'])
+    rows["pack_invites"] = [
+        (pack_id, user_id, pack_members[pack_id][0] if pack_members[pack_id] else user_id, status, now)
+        for (pack_id, user_id), status in invites.items()
+    ]
+
+    # Marriages and collars between disjoint slices of users
+    rng.shuffle(shuffled)
+    couples = shuffled[:len(users) // 10]
+    rows["marriages"] = [(user1, user2, now) for user1, user2 in zip(couples[::2], couples[1::2])]
+    pets = shuffled[len(users) // 10:len(users) // 10 + len(users) // 7]
+    owners = shuffled[-max(1, len(users) // 30):]
+    rows["collars"] = [(pet_id, rng.choice(owners), now) for pet_id in pets]
+
+    rows["verification_state"] = [
+        (user_id, rng.choice(['pending', 'cooldown']), now + timedelta(hours=rng.randint(-24, 24)), now)
+        for user_id in rng.sample(users, min(len(users), 2000))
+    ]
+    rows["bump_data"] = [(index, BENCH_GUILD_ID, now + timedelta(hours=2 * index)) for index in range(1, 101)]
+
+    data = {
+        "users": users,
+        "pack_ids": pack_ids,
+        "pack_names": [f"Pack {pack_id}" for pack_id in pack_ids],
+        "pack_members": in_packs or users,
+        "pack_leaders": [members[0] for members in pack_members.values() if members] or users,
+        "invites": [(user_id, pack_id) for (pack_id, user_id) in invites],
+        "married": couples or users,
+        "pets": pets or users,
+        "owners": owners,
+    }
+    return rows, data
+
+async def seed(conn: asyncpg.Connection, rows: dict):
+    """Bulk load the generated rows with COPY and refresh planner statistics"""
+    columns = {
+        "levels": ("guild_id", "user_id", "xp", "level", "last_message_time"),
+        "user_economy": ("guild_id", "user_id", "pawcoins", "last_coin_earned"),
+        "interaction_stats": ("guild_id", "user_id", "interaction_type", "count", "last_used"),
+        "packs": ("id", "guild_id", "name", "description", "leader_id", "pack_icon_url", "member_count", "created_at"),
+        "pack_members": ("guild_id", "pack_id", "user_id", "role", "joined_at"),
+        "pack_alliances": ("pack1_id", "pack2_id", "formed_at"),
+        "pack_alliance_requests": ("requesting_pack_id", "target_pack_id", "status", "created_at"),
+        "pack_invites": ("pack_id", "user_id", "inviter_id", "status", "created_at"),
+        "marriages": ("user1_id", "user2_id", "married_at"),
+        "collars": ("pet_id", "owner_id", "collared_at"),
+        "verification_state": ("user_id", "state", "expires_at", "created_at"),
+        "bump_data": ("id", "guild_id", "next_bump_time"),
+    }
+    for table, table_columns in columns.items():
+        start = time.perf_counter()
+        await conn.copy_records_to_table(table, records=rows[table], columns=table_columns, schema_name=SCHEMA)
+        print(f"Seeded {len(rows[table]):,} rows into {table} in {time.perf_counter() - start:.1f}s")
+    await conn.execute("SELECT setval('packs_id_seq', (SELECT MAX(id) FROM packs))")
+    await conn.execute("SELECT setval('bump_data_id_seq', (SELECT MAX(id) FROM bump_data))")
+    await conn.execute("ANALYZE")
+
+async def load_pools(conn: asyncpg.Connection) -> dict:
+    """Rebuild the ID pools from a schema kept by an earlier run"""
+    async def column(sql):
+        return [row[0] for row in await conn.fetch(sql)] or [0]
+
+    return {
+        "users": await column("SELECT user_id FROM levels"),
+        "pack_ids": await column("SELECT id FROM packs"),
+        "pack_names": await column("SELECT name FROM packs"),
+        "pack_members": await column("SELECT user_id FROM pack_members"),
+        "pack_leaders": await column("SELECT user_id FROM pack_members WHERE role = 'leader'"),
+        "invites": [tuple(row) for row in await conn.fetch("SELECT user_id, pack_id FROM pack_invites")],
+        "married": await column("SELECT user1_id FROM marriages UNION ALL SELECT user2_id FROM marriages"),
+        "pets": await column("SELECT pet_id FROM collars"),
+        "owners": await column("SELECT DISTINCT owner_id FROM collars"),
+    }
+
+def plan_nodes(plan: dict) -> set:
+    """Every node type in an EXPLAIN (FORMAT JSON) plan"""
+    nodes = {plan["Node Type"]}
+    for child in plan.get("Plans", []):
+        nodes |= plan_nodes(child)
+    return nodes
+
+async def time_query(conn: asyncpg.Connection, query: dict, data: dict, rng: random.Random,
+                     iterations: int, warmup: int) -> dict:
+    """Run one query repeatedly and summarize its latency"""
+    sql = query["sql"]
+    write = query.get("write", False)
+    samples = []
+    for iteration in range(warmup + iterations):
+        args = query["args"](rng, data)
+        transaction = None
+        if write:
+            transaction = conn.transaction()
+            await transaction.start()
+        start = time.perf_counter()
+        await conn.fetch(sql, *args)
+        elapsed = time.perf_counter() - start
+        if transaction:
+            await transaction.rollback()
+        if iteration >= warmup:
+            samples.append(elapsed)
+
+    plan = json.loads(await conn.fetchval(f"EXPLAIN (FORMAT JSON) {sql}", *query["args"](rng, data)))
+    samples.sort()
+    return {
+        "iterations": len(samples),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3),
+        "plan": sorted(plan_nodes(plan[0]["Plan"])),
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+def compare(previous: dict, current: dict, threshold: float):
+    """Print p50 changes against an earlier results file"""
+    print(f"\nCompared with {previous.get('commit')} (regression threshold {threshold:.0%}):")
+    for name, result in current["queries"].items():
+        before = previous.get("queries", {}).get(name)
+        if not before:
+            print(f"  {name:<36} new")
+            continue
+        change = (result["p50_ms"] - before["p50_ms"]) / before["p50_ms"] if before["p50_ms"] else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"  {name:<36} {before['p50_ms']:>9.3f} -> {result['p50_ms']:>9.3f} ms ({change:+.0%}){flag}")
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    conn = await connect(args.dsn)
+    try:
+        exists = await conn.fetchval("SELECT EXISTS (SELECT 1 FROM pg_namespace WHERE nspname = $1)", SCHEMA)
+        seed_seconds = None
+        if args.reuse and exists:
+            print(f"Reusing schema {SCHEMA}")
+            data = await load_pools(conn)
+        else:
+            await create_schema(conn)
+            start = time.perf_counter()
+            rows, data = generate(args, rng)
+            await seed(conn, rows)
+            seed_seconds = round(time.perf_counter() - start, 1)
+
+        volumes = {}
+        for table in ("levels", "user_economy", "interaction_stats", "packs", "pack_members", "pack_alliances",
+                      "pack_alliance_requests", "pack_invites", "marriages", "collars", "verification_state"):
+            volumes[table] = await conn.fetchval(f"SELECT COUNT(*) FROM {table}")
+
+        unbenched = sorted(set(queries.STATEMENTS) - set(STATEMENT_ARGS))
+        if unbenched:
+            print(f"No benchmark arguments for registered statements: {', '.join(unbenched)}")
+
+        results = {}
+        for query in QUERIES:
+            if args.only and not any(query["name"].startswith(prefix) for prefix in args.only):
+                continue
+            results[query["name"]] = await time_query(conn, query, data, rng, args.iterations, args.warmup)
+            print(f"{query['name']:<36} p50 {results[query['name']]['p50_ms']:>9.3f} ms  p99 {results[query['name']]['p99_ms']:>9.3f} ms")
+
+        report = {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "postgres": await conn.fetchval("SHOW server_version"),
+            "volumes": volumes,
+            "seed_seconds": seed_seconds,
+            "queries": results,
+        }
+        if not args.keep:
+            await conn.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+        return report
+    finally:
+        await conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cogs' queries against seeded Postgres data")
+    parser.add_argument("--dsn", default=os.environ.get("BENCH_DATABASE_URL"), help="Scratch database (default: $BENCH_DATABASE_URL)")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--interactions", type=int, default=1000000)
+    parser.add_argument("--packs", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=200, help="Timed runs per query")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed runs per query")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--only", nargs="*", help="Only queries whose names start with these prefixes")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded schema for later --reuse")
+    parser.add_argument("--reuse", action="store_true", help="Use a kept schema instead of reseeding")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Earlier results file to compare p50 latencies against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative p50 increase reported as a regression")
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("pass --dsn or set BENCH_DATABASE_URL")
+
+    previous = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            previous = json.load(f)
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"Wrote results to {args.output}")
+    if previous:
+        compare(previous, report, args.threshold)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+import discord
+import asyncio
+import itertools
+import random
+import time
+from datetime import datetime, timedelta, timezone
+import config
+from utils.metrics import InstrumentedBot
+
+BOT_USER_ID = 100000000000000001
+GUILD_ID = 100000000000000002
+GENERAL_CHANNEL_ID = 100000000000000003
+
+# The fake guild is the home guild, so it gets the channel and role IDs in config
+config.HOME_GUILD_ID = GUILD_ID
+
+# The reaction-roles channel is set at runtime with a command; give it one here
+if config.REACTION_ROLES_CHANNEL_ID is None:
+    config.REACTION_ROLES_CHANNEL_ID = 100000000000000004
+
+# Named channels scenarios can target; everything else the cogs look up exists too
+CHANNELS = {
+    "general": GENERAL_CHANNEL_ID,
+    "verification": config.VERIFICATION_CHANNEL_ID,
+    "mod": config.MOD_CHANNEL_ID,
+    "reaction_roles": config.REACTION_ROLES_CHANNEL_ID,
+    "level_up": config.LEVEL_UP_CHANNEL_ID,
+    "member_log": config.MEMBER_LOG_CHANNEL_ID,
+    "verification_log": config.VERIFICATION_LOG_CHANNEL_ID,
+}
+
+def percentile(samples: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, max(0, int(round(fraction * len(samples))) - 1))
+    return samples[index]
+
+def snowflake_at(moment: datetime) -> int:
+    """A snowflake whose embedded timestamp is the given moment"""
+    return discord.utils.time_snowflake(moment)
+
+def user_payload(user_id: int, bot: bool = False) -> dict:
+    return {
+        "id": str(user_id),
+        "username": f"user{user_id % 100000}",
+        "discriminator": "0",
+        "global_name": None,
+        "avatar": None,
+        "bot": bot,
+    }
+
+def member_payload(user_id: int, roles: list, joined_at: datetime) -> dict:
+    return {
+        "user": user_payload(user_id),
+        "roles": [str(role_id) for role_id in roles],
+        "joined_at": joined_at.isoformat(),
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+def message_payload(message_id: int, channel_id: int, author: dict, content: str = "", embeds: list = None) -> dict:
+    return {
+        "id": str(message_id),
+        "channel_id": str(channel_id),
+        "guild_id": str(GUILD_ID),
+        "author": author,
+        "content": content,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": embeds or [],
+        "pinned": False,
+        "type": 0,
+    }
+
+class RestStub:
+    """Stands in for Discord's REST API
+
+    Every request is recorded by method and route template, waits the
+    configured latency and, with the configured probability, is first answered
+    with a 429 whose retry_after is waited out, the same as discord.py's own
+    rate-limit handling.
+    """
+
+    def __init__(self, latency: float = 0.05, rate_limit_chance: float = 0.0,
+                 retry_after: float = 0.5, seed: int = None):
+        self.latency = latency
+        self.rate_limit_chance = rate_limit_chance
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.ids = itertools.count(200000000000000000)
+        self.calls = {}  # "METHOD /route" -> count
+        self.rate_limited = 0
+
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    async def request(self, route: discord.http.Route, **kwargs):
+        key = f"{route.method} {route.path}"
+        self.calls[key] = self.calls.get(key, 0) + 1
+
+        if self.rate_limit_chance and self.random.random() < self.rate_limit_chance:
+            self.rate_limited += 1
+            await asyncio.sleep(self.retry_after)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.respond(route, kwargs)
+
+    def respond(self, route: discord.http.Route, kwargs: dict):
+        """Build the smallest payload the calling code can parse"""
+        body = kwargs.get("json") or {}
+        bot_user = user_payload(BOT_USER_ID, bot=True)
+
+        if route.path == "/users/@me/channels":
+            return {"id": str(next(self.ids)), "type": 1, "recipients": [user_payload(int(body["recipient_id"]))]}
+        if route.path == "/channels/{channel_id}/messages":
+            if route.method == "GET":
+                return []
+            return message_payload(next(self.ids), route.channel_id, bot_user, body.get("content") or "", body.get("embeds"))
+        if route.path == "/channels/{channel_id}/messages/{message_id}" and route.method in ("GET", "PATCH"):
+            return message_payload(route.message_id, route.channel_id, bot_user, body.get("content") or "", body.get("embeds"))
+        return None
+
+class HarnessBot(InstrumentedBot):
+    """Instrumented bot that also keeps raw listener timings and in-flight counts"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.samples = {}  # listener -> [seconds]
+        self.in_flight = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+
+    def _schedule_event(self, coro, event_name: str, *args, **kwargs):
+        # Count at scheduling time so run() can't see an idle bot before the task starts
+        self.in_flight += 1
+        self.idle.clear()
+        return super()._schedule_event(coro, event_name, *args, **kwargs)
+
+    async def _run_event(self, coro, event_name: str, *args, **kwargs):
+        listener = getattr(coro, '__qualname__', event_name)
+        start = time.perf_counter()
+        try:
+            await super()._run_event(coro, event_name, *args, **kwargs)
+        finally:
+            self.samples.setdefault(listener, []).append(time.perf_counter() - start)
+            self.in_flight -= 1
+            if self.in_flight == 0:
+                self.idle.set()
+
+class Harness:
+    """Drives real cogs with synthetic gateway events and a stubbed REST API"""
+
+    def __init__(self, scenario: dict):
+        self.scenario = scenario
+        self.random = random.Random(scenario.get("seed", 1))
+        http = scenario.get("http", {})
+        self.rest = RestStub(
+            latency=http.get("latency_ms", 50) / 1000,
+            rate_limit_chance=http.get("rate_limit_chance", 0.0),
+            retry_after=http.get("retry_after_ms", 500) / 1000,
+            seed=scenario.get("seed", 1)
+        )
+        self.bot = None
+        self.guild = None
+        self.member_ids = []
+        self.member_roles = {}  # user_id -> role IDs
+        self.message_ids = itertools.count(300000000000000000)
+        self.join_ids = itertools.count(400000000000000000)
+
+    async def setup(self):
+        """Build the bot, the guild and its members, and load the scenario's cogs"""
+        intents = discord.Intents.default()
+        intents.message_content = True
+        intents.members = True
+        self.bot = HarnessBot(command_prefix='!', intents=intents, help_command=None)
+        await self.bot._async_setup_hook()
+        self.bot.http.request = self.rest.request
+
+        state = self.bot._connection
+        state.user = discord.ClientUser(state=state, data=user_payload(BOT_USER_ID, bot=True))
+        self.guild = discord.Guild(data=self.guild_payload(), state=state)
+        state._add_guild(self.guild)
+        self.add_members()
+        # There is no gateway READY, so release wait_until_ready() ourselves
+        self.bot._handle_ready()
+
+        for cog_name in self.scenario.get("cogs", []):
+            await self.bot.load_extension(cog_name)
+
+        # Give the cogs' database initialization a chance to finish
+        pool_task = getattr(self.bot, 'db_pool_task', None)
+        if pool_task is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(pool_task), timeout=10)
+            except Exception as e:
+                print(f"Database unavailable, cogs will run without it: {e}")
+        await asyncio.sleep(0.5)
+
+    def guild_payload(self) -> dict:
+        role_ids = {
+            GUILD_ID: "@everyone",
+            config.VERIFIED_ROLE_ID: "Verified",
+            config.MOD_ROLE_ID: "Mod",
+            config.ADULT_ROLE_ID: "18+",
+        }
+        roles = [
+            {"id": str(role_id), "name": name, "permissions": "0", "position": position,
+             "color": 0, "hoist": False, "managed": False, "mentionable": False, "flags": 0}
+            for position, (role_id, name) in enumerate(role_ids.items())
+        ]
+        channels = [
+            {"id": str(channel_id), "type": 0, "name": name, "position": position,
+             "permission_overwrites": [], "guild_id": str(GUILD_ID)}
+            for position, (name, channel_id) in enumerate(CHANNELS.items())
+        ]
+        channels.append({
+            "id": str(config.MEMBER_COUNT_CHANNEL_ID), "type": 2, "name": "Members: 0",
+            "position": len(channels), "permission_overwrites": [], "guild_id": str(GUILD_ID),
+            "bitrate": 64000, "user_limit": 0
+        })
+        return {
+            "id": str(GUILD_ID),
+            "name": "Bench Guild",
+            "owner_id": str(BOT_USER_ID),
+            "roles": roles,
+            "channels": channels,
+            "emojis": [],
+            "stickers": [],
+            "features": [],
+            "member_count": 0,
+        }
+
+    def add_members(self):
+        """Add the scenario's members, a share of them verified mods"""
+        count = self.scenario.get("members", 1000)
+        mod_share = self.scenario.get("mod_share", 0.01)
+        joined_at = datetime.now(timezone.utc) - timedelta(days=365)
+        state = self.bot._connection
+        for index in range(count):
+            user_id = 500000000000000000 + index
+            roles = [config.VERIFIED_ROLE_ID, config.ADULT_ROLE_ID]
+            if index < count * mod_share:
+                roles.append(config.MOD_ROLE_ID)
+            member = discord.Member(data=member_payload(user_id, roles, joined_at), guild=self.guild, state=state)
+            self.guild._add_member(member)
+            self.member_ids.append(user_id)
+            self.member_roles[user_id] = roles
+        self.guild._member_count = count
+
+    def make_message(self, event: dict) -> discord.Message:
+        channel = self.guild.get_channel(CHANNELS[event.get("channel", "general")])
+        member = self.guild.get_member(self.random.choice(self.member_ids))
+        data = message_payload(next(self.message_ids), channel.id, user_payload(member.id), event.get("content", "hello there"))
+        data["member"] = member_payload(member.id, self.member_roles[member.id], member.joined_at)
+        del data["member"]["user"]
+        return discord.Message(state=self.bot._connection, channel=channel, data=data)
+
+    def make_reaction(self, event: dict) -> discord.RawReactionActionEvent:
+        channel_id = CHANNELS[event.get("channel", "general")]
+        member = self.guild.get_member(self.random.choice(self.member_ids))
+        message_id = event.get("message_id") or next(self.message_ids)
+        data = {
+            "message_id": str(message_id),
+            "channel_id": str(channel_id),
+            "user_id": str(member.id),
+            "guild_id": str(GUILD_ID),
+            "type": 0,
+        }
+        payload = discord.RawReactionActionEvent(data, discord.PartialEmoji(name=event.get("emoji", "✅")), "REACTION_ADD")
+        payload.member = member
+        return payload
+
+    def make_join(self, event: dict) -> discord.Member:
+        created_at = datetime.now(timezone.utc) - timedelta(days=event.get("account_age_days", 1))
+        user_id = snowflake_at(created_at) + next(self.join_ids) % 4096
+        member = discord.Member(
+            data=member_payload(user_id, [], datetime.now(timezone.utc)),
+            guild=self.guild,
+            state=self.bot._connection
+        )
+        self.guild._add_member(member)
+        self.guild._member_count += 1
+        return member
+
+    def dispatch(self, event: dict):
+        """Dispatch one synthetic gateway event"""
+        kind = event["type"]
+        if kind == "message":
+            self.bot.dispatch("socket_event_type", "MESSAGE_CREATE")
+            self.bot.dispatch("message", self.make_message(event))
+        elif kind == "reaction":
+            self.bot.dispatch("socket_event_type", "MESSAGE_REACTION_ADD")
+            self.bot.dispatch("raw_reaction_add", self.make_reaction(event))
+        elif kind == "member_join":
+            self.bot.dispatch("socket_event_type", "GUILD_MEMBER_ADD")
+            self.bot.dispatch("member_join", self.make_join(event))
+        else:
+            raise ValueError(f"Unknown event type: {kind}")
+
+    def event_stream(self):
+        """Yield the scenario's events, interleaving the event groups"""
+        remaining = [[event, event.get("count", 1)] for event in self.scenario["events"]]
+        while remaining:
+            entry = self.random.choice(remaining)
+            entry[1] -= 1
+            if entry[1] <= 0:
+                remaining.remove(entry)
+            yield entry[0]
+
+    async def run(self) -> dict:
+        """Play the scenario and return its report"""
+        concurrency = self.scenario.get("concurrency", 100)
+        dispatched = 0
+        start = time.perf_counter()
+        for event in self.event_stream():
+            while self.bot.in_flight >= concurrency:
+                await asyncio.sleep(0)
+            self.dispatch(event)
+            dispatched += 1
+            if dispatched % 50 == 0:
+                await asyncio.sleep(0)
+        await self.bot.idle.wait()
+        # Log embeds, role changes and queued messages are sent after the handlers return; count them in this run
+        log_queue = getattr(self.bot, 'log_queue', None)
+        if log_queue:
+            await log_queue.stop()
+        role_queue = getattr(self.bot, 'role_queue', None)
+        if role_queue:
+            await role_queue.flush()
+        message_queue = getattr(self.bot, 'message_queue', None)
+        if message_queue:
+            await message_queue.stop()
+        elapsed = time.perf_counter() - start
+        return self.report(dispatched, elapsed)
+
+    def report(self, events: int, elapsed: float) -> dict:
+        all_samples = sorted(itertools.chain.from_iterable(self.bot.samples.values()))
+        handlers = {}
+        for listener, samples in sorted(self.bot.samples.items()):
+            samples = sorted(samples)
+            handlers[listener] = {
+                "calls": len(samples),
+                "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+                "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+            }
+        rest_calls = self.rest.total_calls()
+        return {
+            "scenario": self.scenario.get("name"),
+            "events": events,
+            "seconds": round(elapsed, 3),
+            "events_per_second": round(events / elapsed, 1) if elapsed else None,
+            "handler_latency_ms": {
+                "p50": round(percentile(all_samples, 0.50) * 1000, 3),
+                "p99": round(percentile(all_samples, 0.99) * 1000, 3),
+                "max": round(all_samples[-1] * 1000, 3) if all_samples else 0.0,
+            },
+            "handlers": handlers,
+            "rest": {
+                "calls": rest_calls,
+                "calls_per_event": round(rest_calls / events, 3) if events else 0.0,
+                "rate_limited": self.rest.rate_limited,
+                "by_route": dict(sorted(self.rest.calls.items(), key=lambda item: -item[1])),
+            },
+        }
+
+    async def close(self):
+        """Unload the cogs and release everything the bot opened"""
+        for extension in list(self.bot.extensions):
+            try:
+                await self.bot.unload_extension(extension)
+            except Exception as e:
+                print(f"Error unloading {extension}: {e}")
+        await self.bot.close()
@@ -0,0 +1,45 @@
+"""Replay a load-test scenario against the real cogs without connecting to Discord
+
+Run from the project root:
+
+    python -m bench.loadtest bench/scenarios/chat_storm.json --output chat_storm.json
+
+Cogs that use the database connect to DATABASE_URL; point it at a scratch
+database, or leave it unset to measure the cogs without database work.
+"""
+import argparse
+import asyncio
+import json
+import os
+from bench.harness import Harness
+
+async def run_scenario(scenario: dict) -> dict:
+    harness = Harness(scenario)
+    try:
+        await harness.setup()
+        return await harness.run()
+    finally:
+        await harness.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a synthetic gateway load against the bot's cogs")
+    parser.add_argument("scenario", help="Path to a scenario JSON file")
+    parser.add_argument("--output", help="Write the report to this file as well as stdout")
+    parser.add_argument("--events", type=float, default=1.0, help="Scale every event count by this factor")
+    args = parser.parse_args()
+
+    with open(args.scenario, 'r') as f:
+        scenario = json.load(f)
+    scenario.setdefault("name", os.path.splitext(os.path.basename(args.scenario))[0])
+    for event in scenario["events"]:
+        event["count"] = max(1, int(event.get("count", 1) * args.events))
+
+    report = asyncio.run(run_scenario(scenario))
+    text = json.dumps(report, indent=4)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+
+if __name__ == "__main__":
+    main()
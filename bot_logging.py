@@ -0,0 +1,84 @@
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+import config
+
+LOG_FORMAT = "%(asctime)s %(levelname)-8s %(name)s: %(message)s"
+
+class SamplingFilter(logging.Filter):
+    """Rate-limits repetitive low-level records
+
+    Each (logger, message template) may emit `limit` DEBUG/INFO records per
+    `interval` seconds. Extra records are dropped and counted, and the count is
+    appended to the first record let through in the next interval. Warnings and
+    errors always pass.
+    """
+
+    def __init__(self, interval: float = None, limit: int = None):
+        super().__init__()
+        self.interval = interval or config.LOG_SAMPLE_INTERVAL
+        self.limit = limit or config.LOG_SAMPLE_LIMIT
+        self.windows = {}  # (logger name, template) -> [window start, emitted, suppressed]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        now = time.monotonic()
+        key = (record.name, record.msg)
+        window = self.windows.get(key)
+        if window is None or now - window[0] >= self.interval:
+            suppressed = window[2] if window else 0
+            window = [now, 0, 0]
+            self.windows[key] = window
+            if suppressed:
+                record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+
+        if window[1] >= self.limit:
+            window[2] += 1
+            return False
+        window[1] += 1
+        return True
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves formatting to the listener thread
+
+    The stock QueueHandler formats each record before queueing it so it can be
+    pickled; the queue never leaves this process, so the record is passed as is.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+log_listener = None
+
+def setup_logging():
+    """Route all logging through a queue drained by a background thread"""
+    global log_listener
+    if log_listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(config.LOG_LEVEL)
+    for name, level in config.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level)
+
+    log_listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    log_listener.start()
+
+def stop_logging():
+    """Write out queued records and stop the background thread"""
+    global log_listener
+    if log_listener is not None:
+        log_listener.stop()
+        log_listener = None
@@ -4,18 +4,19 @@ from discord.ext import tasks
 import asyncio
 from datetime import datetime, timedelta
 import pytz
-import asyncpg
-import os
-
-BUMP_REMINDER_CHANNEL_ID = 994238679910449266  # Bumping channel
-MOD_ROLE_ID = 994238679306477680  # Mod role to ping for bump reminders
+from utils.database import get_db_pool, lock_keys
+from utils.guild_settings import get_guild_settings
+from utils.leader import get_leader
+from utils.startup import track_startup
 
 class BumpSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.next_bump_time = None
+        self.next_bump_times = {}  # guild_id -> when the next bump is available
+        self.settings = get_guild_settings(bot)
+        self.leader = get_leader(bot)
         self.db = None
-        self.bot.loop.create_task(self.init_db())
+        self.bot.loop.create_task(track_startup(self.bot, __name__, self.init_db()))
         self.bump_check.start()
         print("Initializing BumpSystem cog")
 
@@ -23,51 +24,46 @@ class BumpSystem(commands.Cog):
         """Initialize database connection"""
         try:
             print("Initializing database connection for bump system...")
-            self.db = await asyncpg.create_pool(os.environ['DATABASE_URL'])
+            self.db = await get_db_pool(self.bot)
 
-            # Create table if it doesn't exist
+            # Load the latest timer of every guild
             async with self.db.acquire() as conn:
-                await conn.execute('''
-                    CREATE TABLE IF NOT EXISTS bump_data (
-                        id SERIAL PRIMARY KEY,
-                        next_bump_time TIMESTAMP WITH TIME ZONE
-                    )
-                ''')
-
-            # Load existing data
-            async with self.db.acquire() as conn:
-                row = await conn.fetchrow(
-                    'SELECT next_bump_time FROM bump_data ORDER BY id DESC LIMIT 1'
+                rows = await conn.fetch(
+                    'SELECT DISTINCT ON (guild_id) guild_id, next_bump_time FROM bump_data ORDER BY guild_id, id DESC'
                 )
-                if row:
-                    self.next_bump_time = row['next_bump_time']
-                    print(f"Loaded bump data: Next={self.next_bump_time}")
-                else:
-                    print("No existing bump data found")
+                for row in rows:
+                    if row['next_bump_time']:
+                        self.next_bump_times[row['guild_id']] = row['next_bump_time']
+                print(f"Loaded bump data for {len(self.next_bump_times)} guilds")
 
         except Exception as e:
             print(f"Error initializing bump database: {e}")
 
-    async def save_bump_data(self):
-        """Save bump data to database"""
+    async def save_bump_data(self, guild_id: int):
+        """Save a guild's bump data to database"""
         if not self.db:
             print("Database not initialized")
             return
 
         try:
             async with self.db.acquire() as conn:
-                await conn.execute(
-                    'INSERT INTO bump_data (next_bump_time) VALUES ($1)',
-                    self.next_bump_time
-                )
-                print(f"Saved bump data: Next={self.next_bump_time}")
+                async with conn.transaction():
+                    await lock_keys(conn, f"bump:{guild_id}")
+                    next_bump_time = self.next_bump_times.get(guild_id)
+                    await conn.execute(
+                        'INSERT INTO bump_data (guild_id, next_bump_time) VALUES ($1, $2)',
+                        guild_id, next_bump_time
+                    )
+                print(f"Saved bump data for guild {guild_id}: Next={next_bump_time}")
         except Exception as e:
             print(f"Error saving bump data: {e}")
 
     @commands.command()
+    @commands.guild_only()
     async def bump(self, ctx, minutes: int = 119):
         """Set the bump timer (default 119 minutes)"""
-        if ctx.channel.id != BUMP_REMINDER_CHANNEL_ID:
+        settings = self.settings.get(ctx.guild.id)
+        if ctx.channel.id != settings['bump_channel_id']:
             await ctx.send("Please use this command in the bump channel!")
             return
 
@@ -80,12 +76,13 @@ class BumpSystem(commands.Cog):
             return
 
         try:
-            self.next_bump_time = datetime.now(pytz.UTC) + timedelta(minutes=minutes)
-            await self.save_bump_data()
+            next_bump_time = datetime.now(pytz.UTC) + timedelta(minutes=minutes)
+            self.next_bump_times[ctx.guild.id] = next_bump_time
+            await self.save_bump_data(ctx.guild.id)
 
-            next_bump_str = self.next_bump_time.strftime("%H:%M UTC")
+            next_bump_str = next_bump_time.strftime("%H:%M UTC")
             await ctx.send(
-                f"🔔 <@&{MOD_ROLE_ID}>\n"
+                f"🔔 <@&{settings['mod_role_id']}>\n"
                 f"Bump timer set for {minutes} minutes.\n"
                 f"Next bump will be available at: `{next_bump_str}`\n"
                 f"I'll ping you again when it's time!"
@@ -95,51 +92,98 @@ class BumpSystem(commands.Cog):
             await ctx.send("❌ Error setting bump timer.")
 
     @commands.command()
+    @commands.guild_only()
     async def bumpstatus(self, ctx):
         """Check when the next bump is available"""
-        if ctx.channel.id != BUMP_REMINDER_CHANNEL_ID:
+        if ctx.channel.id != self.settings.get(ctx.guild.id)['bump_channel_id']:
             await ctx.send("Please use this command in the bump channel!")
             return
 
         try:
-            if not self.next_bump_time:
+            next_bump_time = self.next_bump_times.get(ctx.guild.id)
+            if not next_bump_time:
                 await ctx.send("✅ No bump timer set. You can bump now!")
                 return
 
             current_time = datetime.now(pytz.UTC)
-            if current_time >= self.next_bump_time:
+            if current_time >= next_bump_time:
                 await ctx.send(
                     f"✅ Server can be bumped now!\n"
                     f"Use `!bump` to set a new timer."
                 )
             else:
-                time_until = self.next_bump_time - current_time
+                time_until = next_bump_time - current_time
                 minutes_left = int(time_until.total_seconds() / 60)
                 await ctx.send(
                     f"⏰ Next bump available in: {minutes_left} minutes\n"
-                    f"(`{self.next_bump_time.strftime('%H:%M UTC')}`)"
+                    f"(`{next_bump_time.strftime('%H:%M UTC')}`)"
                 )
 
         except Exception as e:
             print(f"Error in bumpstatus: {e}")
             await ctx.send("❌ Error checking bump status.")
 
+    async def clear_bump_timer(self, guild_id: int, row_id: int):
+        """Record that a finished timer was announced, unless it was reset since"""
+        async with self.db.acquire() as conn:
+            async with conn.transaction():
+                await lock_keys(conn, f"bump:{guild_id}")
+                await conn.execute(
+                    """
+                    INSERT INTO bump_data (guild_id, next_bump_time)
+                    SELECT $1, NULL
+                    WHERE (SELECT MAX(id) FROM bump_data WHERE guild_id = $1) = $2
+                    """,
+                    guild_id, row_id
+                )
+
+        next_bump_time = self.next_bump_times.get(guild_id)
+        if next_bump_time and next_bump_time <= datetime.now(pytz.UTC):
+            del self.next_bump_times[guild_id]
+
     @tasks.loop(minutes=1)
     async def bump_check(self):
-        """Check if it's time for the next bump"""
-        if not self.next_bump_time:
+        """Remind every guild whose bump timer finished
+
+        Only the leader process runs this. Timers are read from the database,
+        so it sees timers set through any process, including the one before a
+        failover.
+        """
+        if not self.leader.is_leader or not self.db:
             return
 
-        current_time = datetime.now(pytz.UTC)
-        if current_time >= self.next_bump_time:
-            channel = self.bot.get_channel(BUMP_REMINDER_CHANNEL_ID)
-            if channel:
+        try:
+            due = await self.db.fetch(
+                """
+                SELECT latest.id, latest.guild_id, gs.settings FROM (
+                    SELECT DISTINCT ON (guild_id) id, guild_id, next_bump_time
+                    FROM bump_data
+                    ORDER BY guild_id, id DESC
+                ) latest
+                LEFT JOIN guild_settings gs ON gs.guild_id = latest.guild_id
+                WHERE latest.next_bump_time <= NOW()
+                """
+            )
+        except Exception as e:
+            print(f"Error checking bump timers: {e}")
+            return
+
+        for row in due:
+            # !setting may have run on another process, so use the stored settings
+            settings = self.settings.refresh(row['guild_id'], row['settings'])
+            if not settings['bump_channel_id']:
+                continue
+
+            try:
+                # The guild may be on another process's shard; sending only needs the channel ID
+                channel = self.bot.get_partial_messageable(settings['bump_channel_id'])
                 await channel.send(
-                    f"🔔 <@&{MOD_ROLE_ID}> Bump timer finished!\n"
+                    f"🔔 <@&{settings['mod_role_id']}> Bump timer finished!\n"
                     f"You can bump the server now! ⏰"
                 )
-                self.next_bump_time = None
-                await self.save_bump_data()
+                await self.clear_bump_timer(row['guild_id'], row['id'])
+            except Exception as e:
+                print(f"Error sending bump reminder for guild {row['guild_id']}: {e}")
 
     @bump_check.before_loop
     async def before_bump_check(self):
@@ -2,17 +2,27 @@ import discord
 from discord.ext import commands
 import asyncio
 import config
-import os
-import asyncpg
 import logging
+from utils.confirmations import ConfirmationKind, get_confirmations
+from utils.database import get_db_pool, lock_keys
+from utils.guild_settings import get_guild_settings
+from utils.helpers import get_or_fetch_member
+from utils import queries
+from utils.startup import track_startup
 
 class CollarSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = None
         self.ready = asyncio.Event()
-        self.bot.loop.create_task(self.init_db())
-        self.pending_proposals = {} # Track pending proposals
+        self.bot.loop.create_task(track_startup(self.bot, __name__, self.init_db()))
+        self.confirmations = get_confirmations(bot)
+        self.confirmations.register_kind(ConfirmationKind(
+            'collar', self.collar_answered, self.collar_timed_out
+        ))
+        self.confirmations.register_kind(ConfirmationKind(
+            'escape', self.escape_answered, self.escape_timed_out
+        ))
         self.proposal_cooldown = commands.CooldownMapping.from_cooldown(1, 60, commands.BucketType.user)
         print("CollarSystem cog initialized")
 
@@ -21,7 +31,7 @@ class CollarSystem(commands.Cog):
         retries = 3
         while retries > 0:
             try:
-                self.db = await asyncpg.create_pool(os.environ['DATABASE_URL'])
+                self.db = await get_db_pool(self.bot)
                 print("Collar database connection initialized")
                 self.ready.set()
                 return
@@ -39,10 +49,7 @@ class CollarSystem(commands.Cog):
             print("Database connection not available")
             return None
         try:
-            record = await self.db.fetchrow(
-                "SELECT owner_id FROM collars WHERE pet_id = $1",
-                pet_id
-            )
+            record = await queries.fetchrow(self.db, 'collar.owner', pet_id)
             return record['owner_id'] if record else None
         except Exception as e:
             print(f"Error getting collar owner: {e}")
@@ -54,10 +61,7 @@ class CollarSystem(commands.Cog):
         if not self.db:
             return []
         try:
-            records = await self.db.fetch(
-                "SELECT pet_id FROM collars WHERE owner_id = $1",
-                owner_id
-            )
+            records = await queries.fetch(self.db, 'collar.pets', owner_id)
             return [record['pet_id'] for record in records]
         except Exception as e:
             print(f"Error getting pets: {e}")
@@ -69,10 +73,7 @@ class CollarSystem(commands.Cog):
         if not self.db:
             return 0
         try:
-            record = await self.db.fetchrow(
-                "SELECT COUNT(*) as pet_count FROM collars WHERE owner_id = $1",
-                owner_id
-            )
+            record = await queries.fetchrow(self.db, 'collar.count', owner_id)
             return record['pet_count']
         except Exception as e:
             print(f"Error counting pets: {e}")
@@ -80,7 +81,8 @@ class CollarSystem(commands.Cog):
 
     async def check_age_role(self, member: discord.Member) -> bool:
         """Check if member has the 18+ role"""
-        return any(role.id == config.ADULT_ROLE_ID for role in member.roles)
+        adult_role_id = get_guild_settings(self.bot).get(member.guild.id)['adult_role_id']
+        return any(role.id == adult_role_id for role in member.roles)
 
     @commands.command()
     @commands.cooldown(1, 60, commands.BucketType.user)
@@ -89,11 +91,11 @@ class CollarSystem(commands.Cog):
         await self.ready.wait()
 
         # Check if either user has a pending proposal
-        if ctx.author.id in self.pending_proposals:
+        if self.confirmations.is_pending(ctx.author.id, ['collar']):
             await ctx.send("❌ You already have a pending collar request!")
             return
 
-        if pet.id in self.pending_proposals:
+        if self.confirmations.is_pending(pet.id, ['collar']):
             await ctx.send("❌ That person already has a pending collar request!")
             return
 
@@ -115,7 +117,7 @@ class CollarSystem(commands.Cog):
             if current_owner == ctx.author.id:
                 await ctx.send("❌ You've already collared this pet!")
             else:
-                owner = ctx.guild.get_member(current_owner)
+                owner = await get_or_fetch_member(ctx.guild, current_owner)
                 owner_name = owner.display_name if owner else "someone else"
                 await ctx.send(f"❌ This person is already collared by {owner_name}!")
             return
@@ -126,66 +128,75 @@ class CollarSystem(commands.Cog):
             await ctx.send("❌ You can only have up to 2 pets!")
             return
 
-        # Add to pending proposals
-        self.pending_proposals[ctx.author.id] = pet.id
-        self.pending_proposals[pet.id] = ctx.author.id
-
-        # Send collar request
-        proposal = await ctx.send(
+        await self.confirmations.request(
+            ctx.channel,
             f"🔷 {pet.mention}, {ctx.author.mention} wants to collar you as their pet!\n"
-            f"React with ✅ to accept or ❌ to decline within 60 seconds!"
+            f"React with ✅ to accept or ❌ to decline within 60 seconds!",
+            kind='collar',
+            responder_id=pet.id,
+            timeout=60,
+            participants=[ctx.author.id, pet.id],
+            context={"owner_id": ctx.author.id, "pet_id": pet.id}
         )
-        await proposal.add_reaction("✅")
-        await proposal.add_reaction("❌")
-
-        def check(reaction, user):
-            return (
-                user.id == pet.id 
-                and str(reaction.emoji) in ["✅", "❌"]
-                and reaction.message.id == proposal.id
-            )
 
+    async def delete_confirmation(self, decision: dict):
+        """Delete a resolved confirmation message"""
+        channel = self.bot.get_channel(decision["channel_id"])
+        if not channel:
+            return None
         try:
-            # Wait for target's response
-            reaction, user = await self.bot.wait_for("reaction_add", timeout=60.0, check=check)
+            await channel.get_partial_message(decision["message_id"]).delete()
+        except discord.errors.NotFound:
+            pass  # Message was already deleted
+        return channel
+
+    async def collar_answered(self, decision: dict, accepted: bool):
+        """Record or decline a collar request once the pet answers"""
+        channel = await self.delete_confirmation(decision)
+        if not channel:
+            return
+        owner_id = decision["context"]["owner_id"]
+        pet_id = decision["context"]["pet_id"]
 
-            # Delete the proposal message first
-            try:
-                await proposal.delete()
-            except discord.errors.NotFound:
-                pass  # Message was already deleted
+        if not accepted:
+            await channel.send(f"❌ <@{pet_id}> has declined <@{owner_id}>'s collar request...")
+            return
 
-            if str(reaction.emoji) == "✅":
-                try:
-                    async with self.db.acquire() as conn:
+        try:
+            async with self.db.acquire() as conn:
+                async with conn.transaction():
+                    # The pet may have been collared, or the owner filled up, while this
+                    # was pending, possibly through another shard; check under the lock
+                    await lock_keys(conn, f"collar:{owner_id}", f"collar:{pet_id}")
+                    already_collared = await queries.fetchrow(conn, 'collar.owner', pet_id)
+                    pet_count = (await queries.fetchrow(conn, 'collar.count', owner_id))['pet_count']
+                    if not already_collared and pet_count < 2:
                         await conn.execute(
                             "INSERT INTO collars (owner_id, pet_id, collared_at) VALUES ($1, $2, NOW())",
-                            ctx.author.id, pet.id
+                            owner_id, pet_id
                         )
-                    await ctx.send(
-                        f"🔷 **Collar Accepted!** ✨\n"
-                        f"{ctx.author.mention} has claimed {pet.mention} as their pet!\n"
-                        f"Use `!uncollar @user` to remove the collar."
-                    )
-                except Exception as e:
-                    print(f"Error recording collar: {e}")
-                    await ctx.send("❌ There was an error recording the collar. Please try again.")
-            else:
-                await ctx.send(f"❌ {pet.mention} has declined {ctx.author.mention}'s collar request...")
-        except asyncio.TimeoutError:
-            # Delete the proposal message and send timeout notification
-            try:
-                await proposal.delete()
-                await ctx.send("❌ Collar request timed out...")
-            except discord.errors.NotFound:
-                # Message was already deleted
-                pass
-        finally:
-            # Clean up pending proposals
-            if ctx.author.id in self.pending_proposals:
-                del self.pending_proposals[ctx.author.id]
-            if pet.id in self.pending_proposals:
-                del self.pending_proposals[pet.id]
+
+            if already_collared:
+                await channel.send("❌ This person is already collared!")
+                return
+            if pet_count >= 2:
+                await channel.send("❌ You can only have up to 2 pets!")
+                return
+
+            await channel.send(
+                f"🔷 **Collar Accepted!** ✨\n"
+                f"<@{owner_id}> has claimed <@{pet_id}> as their pet!\n"
+                f"Use `!uncollar @user` to remove the collar."
+            )
+        except Exception as e:
+            print(f"Error recording collar: {e}")
+            await channel.send("❌ There was an error recording the collar. Please try again.")
+
+    async def collar_timed_out(self, decision: dict):
+        """Delete an unanswered collar request"""
+        channel = await self.delete_confirmation(decision)
+        if channel:
+            await channel.send("❌ Collar request timed out...")
 
     @collar.error
     async def collar_error(self, ctx, error):
@@ -222,52 +233,49 @@ class CollarSystem(commands.Cog):
                 await ctx.send("❌ You're not currently collared!")
                 return
 
-            owner = ctx.guild.get_member(current_owner)
+            owner = await get_or_fetch_member(ctx.guild, current_owner)
             owner_mention = owner.mention if owner else "your owner"
 
-            confirm = await ctx.send(
+            await self.confirmations.request(
+                ctx.channel,
                 f"🔷 Are you sure you want to escape from {owner_mention}'s collar?\n"
-                f"React with ✅ to confirm or ❌ to cancel within 30 seconds!"
+                f"React with ✅ to confirm or ❌ to cancel within 30 seconds!",
+                kind='escape',
+                responder_id=ctx.author.id,
+                timeout=30
             )
-            await confirm.add_reaction("✅")
-            await confirm.add_reaction("❌")
-
-            def check(reaction, user):
-                return (
-                    user.id == ctx.author.id
-                    and str(reaction.emoji) in ["✅", "❌"]
-                    and reaction.message.id == confirm.id
-                )
 
-            try:
-                reaction, user = await self.bot.wait_for("reaction_add", timeout=30.0, check=check)
+        except Exception as e:
+            print(f"Error processing escape: {e}")
+            await ctx.send("❌ There was an error processing your escape. Please try again.")
 
-                # Delete the confirmation message first
-                try:
-                    await confirm.delete()
-                except discord.errors.NotFound:
-                    pass  # Message was already deleted
+    async def escape_answered(self, decision: dict, accepted: bool):
+        """Remove the collar once the pet confirms their escape"""
+        channel = await self.delete_confirmation(decision)
+        if not channel:
+            return
+        pet_id = decision["responder_id"]
 
-                if str(reaction.emoji) == "✅":
-                    async with self.db.acquire() as conn:
-                        await conn.execute(
-                            "DELETE FROM collars WHERE pet_id = $1",
-                            ctx.author.id
-                        )
-                    await ctx.send(f"🔷 **Freedom Achieved!** ✨\n{ctx.author.mention} has escaped from their collar!")
-                else:
-                    await ctx.send("🔷 You remain collared.")
-            except asyncio.TimeoutError:
-                # Delete the confirmation message and send timeout
-                try:
-                    await confirm.delete()
-                    await ctx.send("❌ Escape request timed out.")
-                except discord.errors.NotFound:
-                    pass
+        if not accepted:
+            await channel.send("🔷 You remain collared.")
+            return
 
+        try:
+            async with self.db.acquire() as conn:
+                await conn.execute(
+                    "DELETE FROM collars WHERE pet_id = $1",
+                    pet_id
+                )
+            await channel.send(f"🔷 **Freedom Achieved!** ✨\n<@{pet_id}> has escaped from their collar!")
         except Exception as e:
             print(f"Error processing escape: {e}")
-            await ctx.send("❌ There was an error processing your escape. Please try again.")
+            await channel.send("❌ There was an error processing your escape. Please try again.")
+
+    async def escape_timed_out(self, decision: dict):
+        """Delete an unanswered escape request"""
+        channel = await self.delete_confirmation(decision)
+        if channel:
+            await channel.send("❌ Escape request timed out.")
 
 async def setup(bot):
     await bot.add_cog(CollarSystem(bot))
@@ -1,19 +1,69 @@
 import discord
 from discord.ext import commands
 import config
-import asyncio
+from collections import OrderedDict
+from utils.timer_wheel import get_timer_wheel
+from utils.embed_templates import embed_templates
+from utils.guild_settings import get_guild_settings
+
+class CommandMenuStore:
+    """Bounded LRU store of command menus keyed by message ID
+
+    Each menu expires ttl seconds after its last use via the timer wheel;
+    when the store is full the least recently used menu is dropped.
+    """
+
+    def __init__(self, bot, max_menus: int = None, ttl: float = None):
+        self.wheel = get_timer_wheel(bot)
+        self.max_menus = max_menus or config.COMMAND_MENU_MAX
+        self.ttl = ttl or config.COMMAND_MENU_TTL
+        self.menus = OrderedDict()
+
+    def add(self, message_id: int, menu: dict):
+        """Track a new menu, evicting the least recently used one if full"""
+        while len(self.menus) >= self.max_menus:
+            oldest_id, _ = self.menus.popitem(last=False)
+            self.wheel.cancel(('command_menu', oldest_id))
+        self.menus[message_id] = menu
+        self.wheel.schedule(('command_menu', message_id), self.ttl, self.remove, message_id)
+
+    def get(self, message_id: int) -> dict:
+        """Get a menu and mark it as recently used"""
+        menu = self.menus.get(message_id)
+        if menu is not None:
+            self.menus.move_to_end(message_id)
+            self.wheel.schedule(('command_menu', message_id), self.ttl, self.remove, message_id)
+        return menu
+
+    def remove(self, message_id: int):
+        """Stop tracking a menu"""
+        self.menus.pop(message_id, None)
+        self.wheel.cancel(('command_menu', message_id))
+
+    def __len__(self) -> int:
+        return len(self.menus)
 
 class Commands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.active_command_menus = {}  # Store active command menus
+        self.active_command_menus = CommandMenuStore(bot)
+        # Pages only depend on the viewer's mod/admin status, so build each tier once
+        embed_templates.register('command_pages', self.create_command_pages)
+        for is_mod in (False, True):
+            for is_admin in (False, True):
+                embed_templates.build('command_pages', is_mod, is_admin)
         print("Commands cog initialized")
 
-    def create_command_pages(self, ctx):
+    def get_command_tier(self, member: discord.Member) -> tuple:
+        """Get the (is_mod, is_admin) tier used to pick a member's pages"""
+        mod_role_id = get_guild_settings(self.bot).get(member.guild.id)['mod_role_id']
+        is_mod = any(role.id == mod_role_id for role in member.roles)
+        is_admin = member.guild_permissions.administrator
+        return (is_mod, is_admin)
+
+    def create_command_pages(self, is_mod: bool, is_admin: bool):
         """Create pages of commands"""
         pages = []
-        is_mod = any(role.id == config.MOD_ROLE_ID for role in ctx.author.roles)
-        is_admin = ctx.author.guild_permissions.administrator
 
         # Admin Commands Page
         if is_admin:
@@ -22,7 +72,10 @@ class Commands(commands.Cog):
                 color=discord.Color.red()
             )
             admin_commands = "`!givexp @user amount` - Give XP to a user\n"
-            admin_commands += "`!removexp @user amount` - Remove XP from a user"
+            admin_commands += "`!removexp @user amount` - Remove XP from a user\n"
+            admin_commands += "`!synccommands` - Force a sync of the slash command tree\n"
+            admin_commands += "`!setting [key] [value]` - Show or change this server's channel and role settings\n"
+            admin_commands += "`!cachestats` - Show cache sizes and memory use for the cache profile"
             embed.add_field(name="Admin Commands", value=admin_commands, inline=False)
             pages.append(embed)
 
@@ -222,6 +275,18 @@ class Commands(commands.Cog):
         embed.add_field(name="Economy Commands", value=economy_commands, inline=False)
         pages.append(embed)
 
+        # Add page numbers and dividers to embeds
+        for i, embed in enumerate(pages):
+            embed.description = "─────────────────────────\n"  # Add divider at top
+            for field_index, field in enumerate(embed.fields):
+                # Add divider after each field
+                embed.set_field_at(
+                    field_index,
+                    name=field.name,
+                    value=f"{field.value}\n─────────────────────────",
+                    inline=field.inline
+                )
+            embed.set_footer(text=f"Page {i + 1} of {len(pages)} • Use ⬅️ ➡️ to navigate")
 
         return pages
 
@@ -231,32 +296,28 @@ class Commands(commands.Cog):
         print(f"Commands command received from {ctx.author}")
 
         try:
-            # Create pages
-            pages = self.create_command_pages(ctx)
-            current_page = 0
+            if not ctx.guild:
+                await ctx.send("❌ This command can only be used in the server.")
+                return
 
-            # Add page numbers and dividers to embeds
-            for i, embed in enumerate(pages):
-                embed.description = "─────────────────────────\n"  # Add divider at top
-                for field in embed.fields:
-                    field.value = f"{field.value}\n─────────────────────────"  # Add divider after each field
-                embed.set_footer(text=f"Page {i + 1} of {len(pages)} • Use ⬅️ ➡️ to navigate")
+            # Menus only ever send these pages, so they can share the cached embeds
+            pages = embed_templates.build('command_pages', *self.get_command_tier(ctx.author))
+            current_page = 0
 
             # Send first page
             message = await ctx.send(embed=pages[current_page])
 
+            # Store the menu state before reacting so early clicks are handled
+            self.active_command_menus.add(message.id, {
+                "pages": pages,
+                "current_page": current_page,
+                "author_id": ctx.author.id
+            })
+
             # Add navigation reactions
             await message.add_reaction("⬅️")
             await message.add_reaction("➡️")
 
-            # Store the menu state
-            self.active_command_menus[message.id] = {
-                "pages": pages,
-                "current_page": current_page,
-                "author_id": ctx.author.id,
-                "last_interaction": asyncio.get_event_loop().time()
-            }
-
             print(f"Successfully sent paginated commands embed to {ctx.author}")
             print(f"Created menu with {len(pages)} pages")
 
@@ -265,58 +326,52 @@ class Commands(commands.Cog):
             await ctx.send("❌ Error displaying commands. Please try again.")
 
     @commands.Cog.listener()
-    async def on_reaction_add(self, reaction, user):
-        """Handle pagination reactions"""
-        if user.bot:
+    async def on_raw_reaction_add(self, payload):
+        """Handle pagination reactions, including on uncached messages"""
+        menu = self.active_command_menus.get(payload.message_id)
+        if not menu or payload.user_id != menu["author_id"]:
             return
 
-        message = reaction.message
-        menu = self.active_command_menus.get(message.id)
-
-        if menu and user.id == menu["author_id"]:
-            pages = menu["pages"]
-            current_page = menu["current_page"]
+        channel = self.bot.get_channel(payload.channel_id)
+        if not channel:
+            return
+        message = channel.get_partial_message(payload.message_id)
 
-            # Update last interaction time
-            menu["last_interaction"] = asyncio.get_event_loop().time()
+        pages = menu["pages"]
+        current_page = menu["current_page"]
+        emoji = str(payload.emoji)
 
-            if str(reaction.emoji) == "➡️" and current_page < len(pages) - 1:
+        try:
+            if emoji == "➡️" and current_page < len(pages) - 1:
                 current_page += 1
-                await message.edit(embed=pages[current_page])
-                menu["current_page"] = current_page
-            elif str(reaction.emoji) == "⬅️" and current_page > 0:
+            elif emoji == "⬅️" and current_page > 0:
                 current_page -= 1
-                await message.edit(embed=pages[current_page])
-                menu["current_page"] = current_page
-
-            # Remove user's reaction
-            try:
-                await reaction.remove(user)
-            except:
-                pass
-
-    async def cleanup_old_menus(self):
-        """Clean up inactive command menus"""
-        while True:
-            current_time = asyncio.get_event_loop().time()
-            to_remove = []
 
-            for message_id, menu in self.active_command_menus.items():
-                if current_time - menu["last_interaction"] > 300:  # 5 minutes
-                    to_remove.append(message_id)
+            if current_page != menu["current_page"]:
+                menu["current_page"] = current_page
+                await message.edit(embed=pages[current_page])
+        except discord.NotFound:
+            self.active_command_menus.remove(payload.message_id)
+            return
+        except discord.HTTPException as e:
+            print(f"Error updating command menu: {e}")
 
-            for message_id in to_remove:
-                del self.active_command_menus[message_id]
+        # Remove user's reaction
+        try:
+            await message.remove_reaction(payload.emoji, discord.Object(id=payload.user_id))
+        except:
+            pass
 
-            await asyncio.sleep(60)  # Check every minute
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        """Forget menus whose message was deleted"""
+        self.active_command_menus.remove(payload.message_id)
 
 async def setup(bot):
     print("Setting up Commands cog...")
     try:
         commands_cog = Commands(bot)
         await bot.add_cog(commands_cog)
-        # Start cleanup task
-        bot.loop.create_task(commands_cog.cleanup_old_menus())
         print("Commands cog setup complete")
     except Exception as e:
         print(f"Error setting up Commands cog: {e}")
\ No newline at end of file
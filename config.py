@@ -10,8 +10,47 @@ VERIFICATION_LOG_CHANNEL_ID = 1342622671569031222  # Channel for verification lo
 # Age Role
 ADULT_ROLE_ID = 1342949415140200569  # 18+ role
 
+# Leveling rewards and announcements
+LEVEL_UP_CHANNEL_ID = 1342884630671523890  # Level up announcements
+EMOJI_VERIFIED_ROLE_ID = 994238679281303605  # Granted at level 3
+VC_VERIFIED_ROLE_ID = 1342949414649593887  # Granted at level 3
+
+# Moderation
+MUTED_ROLE_ID = 994238679281303612  # Muted role
+GENERAL_CHANNEL_ID = 994238680115986496  # Welcome messages for approved members
+
+# Bump reminders
+BUMP_CHANNEL_ID = 994238679910449266  # Bumping channel, reminders ping MOD_ROLE_ID
+
+# Pack system
+PACK_APPROVAL_CHANNEL_ID = 1344011559764234343  # Pack creation requests for staff
+PACK_LOG_CHANNEL_ID = 1344015781826007050  # Pack approvals and denials
+
 # Member Count Channel
 MEMBER_COUNT_CHANNEL_ID = 994238679658795141  # Channel for member count display
+MEMBER_COUNT_RENAME_INTERVAL = 300  # Discord allows ~2 channel renames per 10 minutes
+MEMBER_LOG_CHANNEL_ID = 994238679910449267  # Channel for join/leave logs
+
+# Raid detection
+RAID_JOIN_THRESHOLD = 10  # Joins inside the window that switch on raid mode
+RAID_JOIN_WINDOW = 30  # Sliding window for the join rate (seconds)
+RAID_MODE_COOLDOWN = 300  # Quiet seconds before raid mode switches itself off
+RAID_ALERT_INTERVAL = 15  # How often the raid alert is refreshed (seconds)
+RAID_NEW_ACCOUNT_DAYS = 7  # Accounts younger than this are targeted by bulk raid actions
+RAID_ALERT_CHANNEL_ID = MOD_CHANNEL_ID  # Where raid alerts are posted
+
+# Log channel batching
+LOG_FLUSH_INTERVAL = 2.0  # Seconds to collect log embeds before sending a batch
+LOG_QUEUE_MAX_PENDING = 250  # Embeds buffered per channel before the oldest are dropped
+
+# Role changes are coalesced per member into one edit
+ROLE_QUEUE_WINDOW = 1.0  # Seconds a member's first change waits for more to join it
+ROLE_QUEUE_CONCURRENCY = 4  # Role edits in flight per guild
+
+# Outbound messages are queued per channel behind a token bucket
+SEND_QUEUE_RATE = 1.0  # Messages per second each channel's bucket refills
+SEND_QUEUE_BURST = 5  # Messages a channel can send at once after being idle
+SEND_QUEUE_MAX_PENDING = 100  # Messages queued per channel before the oldest are dropped
 
 # Bot token (loaded from environment variable)
 import os
@@ -19,6 +58,40 @@ import json
 
 TOKEN = os.environ.get('DISCORD_BOT_TOKEN')
 
+# The guild the channel and role IDs in this file belong to. Other guilds start
+# with nothing configured and are set up with !setting. When unset, every guild
+# uses these IDs, as a single-guild deployment always has. Existing rows are
+# assigned to this guild when the guild-scoped schema migration runs.
+HOME_GUILD_ID = int(os.environ['HOME_GUILD_ID']) if os.environ.get('HOME_GUILD_ID') else None
+
+def parse_shard_ids(value: str) -> list:
+    """Parse a shard list like "0,2" or a range like "0-3" """
+    shard_ids = []
+    for part in value.split(','):
+        start, _, end = part.strip().partition('-')
+        shard_ids.extend(range(int(start), int(end or start) + 1))
+    return shard_ids
+
+# Sharding. By default this process runs as many shards as Discord recommends.
+# To split the bot across processes, give every process the same SHARD_COUNT
+# and its own SHARD_IDS.
+SHARD_COUNT = int(os.environ['SHARD_COUNT']) if os.environ.get('SHARD_COUNT') else None
+SHARD_IDS = parse_shard_ids(os.environ['SHARD_IDS']) if os.environ.get('SHARD_IDS') else None
+
+# How much of each guild discord.py keeps in memory. Every cog falls back to
+# the event payload or the API for members the cache doesn't hold, so each
+# profile supports reaction roles, leveling and verification; smaller caches
+# trade memory for an occasional member fetch. Compare them with !cachestats.
+#   full    - every member (guilds chunked at startup) and the last 1000 messages
+#   joined  - only members who join while the bot is running; no message cache
+#   minimal - no members besides the bot itself; no message cache
+CACHE_PROFILES = {
+    'full': {'members': 'all', 'max_messages': 1000, 'chunk_guilds_at_startup': True},
+    'joined': {'members': 'joined', 'max_messages': None, 'chunk_guilds_at_startup': False},
+    'minimal': {'members': 'none', 'max_messages': None, 'chunk_guilds_at_startup': False},
+}
+CACHE_PROFILE = os.environ.get('CACHE_PROFILE', 'full')
+
 # File to store persistent settings
 SETTINGS_FILE = 'bot_settings.json'
 
@@ -54,6 +127,60 @@ DENY_EMOJI = "❌"
 # Cooldown (in seconds)
 VERIFICATION_COOLDOWN = 3600  # 1 hour
 
+# How often expired cooldowns are swept from the database (seconds)
+VERIFICATION_SWEEP_INTERVAL = 600
+
+# Maximum verification DM flows running at once
+VERIFICATION_MAX_CONCURRENT = 25
+
+# Seconds a user has to answer each verification question
+VERIFICATION_QUESTION_TIMEOUT = 300
+
+# Logging
+LOG_LEVEL = 'INFO'  # Default level for every module
+LOG_LEVELS = {  # Per-module overrides, keyed by logger (module) name
+    'discord': 'WARNING',
+    'handlers.leveling': 'WARNING',
+    'handlers.moderation': 'INFO',
+    'utils.helpers': 'WARNING'
+}
+LOG_SAMPLE_INTERVAL = 60  # Seconds per sampling window for repeated DEBUG/INFO messages
+LOG_SAMPLE_LIMIT = 20  # Copies of the same message let through per window
+
+# Metrics endpoint (Prometheus text format, local only)
+METRICS_ENABLED = True
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = int(os.environ.get('METRICS_PORT', 9108))  # Give each shard process on a host its own port
+METRICS_STATEMENT_LABEL_LENGTH = 80  # Characters of each SQL statement used as its label
+
+# Hash of the last synced application command tree, so restarts skip unchanged syncs
+COMMAND_TREE_HASH_FILE = 'command_tree_hash.json'
+
+# Shared database connection pool
+DB_POOL_MIN_SIZE = 2
+DB_POOL_MAX_SIZE = 20
+
+# One process, elected through a Postgres advisory lock, runs the singleton
+# background jobs (bump reminders, verification cooldown cleanup)
+LEADER_POLL_INTERVAL = 10  # Seconds between attempts to take or confirm leadership
+
+# Versioned schema migrations, applied once each when the pool is created
+MIGRATIONS_DIR = 'migrations'
+
+# DM sessions (multi-step forms answered in DMs)
+DM_SESSIONS_FILE = 'dm_sessions.json'  # Persisted so sessions survive restarts
+
+# Reaction confirmations (proposals and other ✅/❌ prompts)
+CONFIRMATIONS_FILE = 'confirmations.json'  # Persisted so pending proposals survive restarts
+
+# !commands menus
+COMMAND_MENU_TTL = 300  # Seconds a menu stays navigable after its last use
+COMMAND_MENU_MAX = 500  # Menus tracked at once; the least recently used is dropped first
+
+# Timer wheel used for timeouts and expiries
+TIMER_WHEEL_TICK = 1.0  # Seconds per slot
+TIMER_WHEEL_SLOTS = 512  # Slots per revolution
+
 # Messages
 WELCOME_MESSAGE = """Welcome to the server! To begin verification:
 1. React with ✅ to start the process
@@ -110,4 +237,14 @@ BODY_TYPE_ROLES = {}
 
 # Fursona System Configuration
 FURSONA_APPROVAL_CHANNEL_ID = 1342718308360781854  # Channel for fursona approvals
-FURSONA_LOG_CHANNEL_ID = 1342916550335795200  # Channel for fursona logs
\ No newline at end of file
+FURSONA_LOG_CHANNEL_ID = 1342916550335795200  # Channel for fursona logs
+
+# Fursona creation questions, asked in order. Answers are stored under "key";
+# "basic" answers are listed together on the profile, the rest get their own field.
+FURSONA_QUESTIONS = [
+    {"key": "name", "label": "Name", "prompt": "What's your fursona's name?", "basic": True},
+    {"key": "species", "label": "Species", "prompt": "What's your fursona's species?", "basic": True},
+    {"key": "age", "label": "Age", "prompt": "What's your fursona's age?", "basic": True},
+    {"key": "bio", "label": "Biography", "prompt": "Please write a brief bio for your fursona:", "basic": False}
+]
+FURSONA_QUESTION_TIMEOUT = 300  # Seconds to answer each fursona question
\ No newline at end of file
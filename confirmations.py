@@ -0,0 +1,164 @@
+import discord
+import asyncio
+import json
+import os
+import time
+import config
+from utils.timer_wheel import get_timer_wheel
+
+ACCEPT_EMOJI = "✅"
+DECLINE_EMOJI = "❌"
+
+class ConfirmationKind:
+    """Callbacks for one kind of reaction confirmation
+
+    on_decision(decision, accepted) and on_timeout(decision) are coroutine
+    functions; a decision dict has "kind", "message_id", "channel_id",
+    "responder_id", "participants" and the "context" passed to
+    ConfirmationRouter.request.
+    """
+
+    def __init__(self, name: str, on_decision, on_timeout=None):
+        self.name = name
+        self.on_decision = on_decision
+        self.on_timeout = on_timeout
+
+class ConfirmationRouter:
+    """Resolves ✅/❌ confirmations from one message_id -> decision index"""
+
+    def __init__(self, bot, path: str = None):
+        self.bot = bot
+        self.wheel = get_timer_wheel(bot)
+        self.path = path or config.CONFIRMATIONS_FILE
+        self.kinds = {}
+        self.decisions = {}  # message_id -> pending decision
+        self.save_handle = None
+        self.load_decisions()
+
+    def load_decisions(self):
+        """Load decisions persisted by a previous run"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+            self.decisions = {int(message_id): decision for message_id, decision in saved.items()}
+            print(f"Loaded {len(self.decisions)} pending confirmations")
+        except Exception as e:
+            print(f"Error loading confirmations: {e}")
+
+    def save_decisions(self):
+        """Write all pending decisions to disk"""
+        self.save_handle = None
+        try:
+            with open(self.path, 'w') as f:
+                json.dump({str(message_id): decision for message_id, decision in self.decisions.items()}, f, indent=4)
+        except Exception as e:
+            print(f"Error saving confirmations: {e}")
+
+    def schedule_save(self):
+        """Coalesce decision changes into one write per second"""
+        if self.save_handle is None:
+            self.save_handle = asyncio.get_running_loop().call_later(1.0, self.save_decisions)
+
+    def flush(self):
+        """Write pending decision changes now instead of waiting for the debounce"""
+        if self.save_handle is not None:
+            self.save_handle.cancel()
+            self.save_decisions()
+
+    def register_kind(self, kind: ConfirmationKind):
+        """Register a kind and re-arm timeouts for its decisions restored from disk"""
+        self.kinds[kind.name] = kind
+        now = time.time()
+        for message_id, decision in self.decisions.items():
+            if decision["kind"] == kind.name:
+                self.wheel.schedule(('confirmation', message_id), max(0, decision["expires_at"] - now), self.expire, message_id)
+
+    def is_pending(self, user_id: int, kinds: list = None) -> bool:
+        """Check if a user is part of a pending decision, optionally of specific kinds"""
+        return any(
+            user_id in decision["participants"] and (kinds is None or decision["kind"] in kinds)
+            for decision in self.decisions.values()
+        )
+
+    async def request(self, channel: discord.abc.Messageable, content: str, kind: str,
+                      responder_id: int, timeout: float, participants: list = None,
+                      context: dict = None) -> discord.Message:
+        """Send a confirmation message and wait for responder_id to react to it"""
+        message = await channel.send(content)
+        decision = {
+            "kind": kind,
+            "message_id": message.id,
+            "channel_id": message.channel.id,
+            "responder_id": responder_id,
+            "participants": participants or [responder_id],
+            "context": context or {},
+            "expires_at": time.time() + timeout
+        }
+        # Register before adding reactions so an early click still resolves
+        self.decisions[message.id] = decision
+        self.wheel.schedule(('confirmation', message.id), timeout, self.expire, message.id)
+        self.schedule_save()
+
+        try:
+            await message.add_reaction(ACCEPT_EMOJI)
+            await message.add_reaction(DECLINE_EMOJI)
+        except discord.HTTPException as e:
+            print(f"Could not add confirmation reactions: {e}")
+        return message
+
+    def cancel(self, message_id: int) -> dict:
+        """Drop a pending decision without running any callbacks"""
+        decision = self.decisions.pop(message_id, None)
+        if decision:
+            self.wheel.cancel(('confirmation', message_id))
+            self.schedule_save()
+        return decision
+
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        """Resolve the decision attached to the reacted message, if any"""
+        decision = self.decisions.get(payload.message_id)
+        if not decision or payload.user_id != decision["responder_id"]:
+            return
+
+        emoji = str(payload.emoji)
+        if emoji not in (ACCEPT_EMOJI, DECLINE_EMOJI):
+            return
+
+        kind = self.kinds.get(decision["kind"])
+        if not kind:
+            return
+
+        # Pop before awaiting anything so a double click can't resolve twice
+        self.cancel(payload.message_id)
+        try:
+            await kind.on_decision(decision, emoji == ACCEPT_EMOJI)
+        except Exception as e:
+            print(f"Error resolving {decision['kind']} confirmation {payload.message_id}: {e}")
+
+    async def expire(self, message_id: int):
+        """Time out a pending decision"""
+        decision = self.decisions.get(message_id)
+        if not decision:
+            return
+
+        kind = self.kinds.get(decision["kind"])
+        if not kind:
+            return
+
+        self.cancel(message_id)
+        if kind.on_timeout:
+            try:
+                await kind.on_timeout(decision)
+            except Exception as e:
+                print(f"Error handling {decision['kind']} timeout for {message_id}: {e}")
+
+def get_confirmations(bot) -> ConfirmationRouter:
+    """Get the bot's shared confirmation router, creating it on first use"""
+    router = getattr(bot, 'confirmations', None)
+    if router is None:
+        router = ConfirmationRouter(bot)
+        bot.confirmations = router
+        bot.add_listener(router.on_raw_reaction_add, 'on_raw_reaction_add')
+    return router
@@ -0,0 +1,82 @@
+import asyncio
+import asyncpg
+import os
+import config
+from utils.metrics import record_query
+from utils.schema import apply_migrations
+from utils.queries import prepare_statements
+
+class BotConnection(asyncpg.Connection):
+    """Pool connection that carries the query registry's prepared statements"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = {}  # statement name -> PreparedStatement
+
+async def init_connection(conn: asyncpg.Connection):
+    """Set up each new pool connection"""
+    if config.METRICS_ENABLED:
+        conn.add_query_logger(record_query)
+    await prepare_statements(conn)
+
+async def lock_keys(conn: asyncpg.Connection, *keys: str):
+    """Hold advisory locks on keys until the current transaction ends
+
+    Check-then-write sequences on rows that every guild shares (marriages,
+    collars) take these so shard processes writing the same rows serialize.
+    Keys are locked in sorted order so two writers can't deadlock.
+    """
+    for key in sorted(set(keys)):
+        await conn.execute("SELECT pg_advisory_xact_lock(hashtextextended($1, 0))", key)
+
+async def create_db_pool() -> asyncpg.Pool:
+    """Bring the schema up to date, then open the connection pool
+
+    Migrations run first on their own connection so the pool's connections
+    prepare their statements against the finished schema.
+    """
+    conn = await asyncpg.connect(os.environ['DATABASE_URL'])
+    try:
+        await apply_migrations(conn)
+    finally:
+        await conn.close()
+
+    return await asyncpg.create_pool(
+        os.environ['DATABASE_URL'],
+        min_size=config.DB_POOL_MIN_SIZE,
+        max_size=config.DB_POOL_MAX_SIZE,
+        init=init_connection,
+        connection_class=BotConnection
+    )
+
+async def get_db_pool(bot) -> asyncpg.Pool:
+    """Get the bot's shared connection pool, creating it on first use
+
+    Cogs starting up at the same time all wait on the same connect, so the
+    bot opens one pool instead of one per cog, and none of them queries the
+    database before its migrations have run.
+    """
+    task = getattr(bot, 'db_pool_task', None)
+    if task is None:
+        task = asyncio.ensure_future(create_db_pool())
+        bot.db_pool_task = task
+
+    try:
+        return await asyncio.shield(task)
+    except Exception:
+        # Let the next caller retry instead of re-raising a stale failure
+        if getattr(bot, 'db_pool_task', None) is task:
+            bot.db_pool_task = None
+        raise
+
+async def close_db_pool(bot):
+    """Close the shared connection pool if one was opened"""
+    task = getattr(bot, 'db_pool_task', None)
+    bot.db_pool_task = None
+    if task is None:
+        return
+    if not task.done():
+        task.cancel()
+        return
+    if not task.cancelled() and task.exception() is None:
+        await task.result().close()
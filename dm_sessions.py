@@ -0,0 +1,197 @@
+import discord
+import asyncio
+import json
+import os
+import time
+import config
+from utils.timer_wheel import get_timer_wheel
+
+class DMForm:
+    """A multi-step DM questionnaire driven by the session router
+
+    steps is a list of dicts with a "key" to store the answer under and the
+    "prompt" to send. on_complete(session) and on_timeout(session) are
+    coroutine functions; a finished session dict has "user_id", "answers"
+    and the "context" passed to DMSessionRouter.start.
+    """
+
+    def __init__(self, name: str, steps: list, on_complete, on_timeout=None,
+                 intro: str = None, timeout: float = 300,
+                 timeout_message: str = "You took too long to respond. Please try again."):
+        self.name = name
+        self.steps = steps
+        self.on_complete = on_complete
+        self.on_timeout = on_timeout
+        self.intro = intro
+        self.timeout = timeout
+        self.timeout_message = timeout_message
+
+class DMSessionRouter:
+    """Routes DM replies to per-user form sessions with one on_message hook"""
+
+    def __init__(self, bot, path: str = None):
+        self.bot = bot
+        self.wheel = get_timer_wheel(bot)
+        self.path = path or config.DM_SESSIONS_FILE
+        self.forms = {}
+        self.sessions = {}  # user_id -> session state
+        self.save_handle = None
+        self.load_sessions()
+
+    def load_sessions(self):
+        """Load sessions persisted by a previous run"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+            self.sessions = {int(user_id): session for user_id, session in saved.items()}
+            print(f"Loaded {len(self.sessions)} DM sessions")
+        except Exception as e:
+            print(f"Error loading DM sessions: {e}")
+
+    def save_sessions(self):
+        """Write all sessions to disk"""
+        self.save_handle = None
+        try:
+            with open(self.path, 'w') as f:
+                json.dump({str(user_id): session for user_id, session in self.sessions.items()}, f, indent=4)
+        except Exception as e:
+            print(f"Error saving DM sessions: {e}")
+
+    def schedule_save(self):
+        """Coalesce session changes into one write per second"""
+        if self.save_handle is None:
+            self.save_handle = asyncio.get_running_loop().call_later(1.0, self.save_sessions)
+
+    def flush(self):
+        """Write pending session changes now instead of waiting for the debounce"""
+        if self.save_handle is not None:
+            self.save_handle.cancel()
+            self.save_sessions()
+
+    def register_form(self, form: DMForm):
+        """Register a form and re-arm timeouts for its sessions restored from disk"""
+        self.forms[form.name] = form
+        now = time.time()
+        for user_id, session in self.sessions.items():
+            if session["form"] == form.name:
+                self.wheel.schedule(('dm_session', user_id), max(0, session["expires_at"] - now), self.expire, user_id)
+
+    def has_session(self, user_id: int, form_name: str = None) -> bool:
+        """Check if a user has an active session, optionally for a specific form"""
+        session = self.sessions.get(user_id)
+        return session is not None and (form_name is None or session["form"] == form_name)
+
+    def session_users(self, form_name: str) -> list:
+        """Get the IDs of users with an active session for a form"""
+        return [user_id for user_id, session in self.sessions.items() if session["form"] == form_name]
+
+    async def start(self, user: discord.abc.User, form_name: str, context: dict = None):
+        """Start a form for a user and send the first prompt
+
+        Raises discord.Forbidden if the user's DMs are closed, and ValueError if
+        they already have a form open, since one would overwrite the other.
+        """
+        if user.id in self.sessions:
+            raise ValueError(f"User {user.id} already has a {self.sessions[user.id]['form']} form open")
+        form = self.forms[form_name]
+        session = {
+            "form": form_name,
+            "user_id": user.id,
+            "step": 0,
+            "answers": {},
+            "context": context or {},
+            "expires_at": time.time() + form.timeout
+        }
+        self.sessions[user.id] = session
+        self.wheel.schedule(('dm_session', user.id), form.timeout, self.expire, user.id)
+        self.schedule_save()
+
+        try:
+            if form.intro:
+                await user.send(form.intro)
+            await user.send(form.steps[0]["prompt"])
+        except Exception:
+            self.cancel(user.id)
+            raise
+
+    def cancel(self, user_id: int) -> dict:
+        """Drop a user's session without running any callbacks"""
+        session = self.sessions.pop(user_id, None)
+        if session:
+            self.wheel.cancel(('dm_session', user_id))
+            self.schedule_save()
+        return session
+
+    async def on_message(self, message: discord.Message):
+        """Advance the author's session, if any, with their DM reply"""
+        if message.guild or message.author.bot:
+            return
+
+        session = self.sessions.get(message.author.id)
+        if not session:
+            return
+
+        form = self.forms.get(session["form"])
+        if not form:
+            return
+
+        step = form.steps[session["step"]]
+        if step.get("attachment"):
+            if not message.attachments:
+                await message.channel.send(step.get("retry_prompt", "Please attach an image to your message."))
+                return
+            answer = message.attachments[0].url
+        else:
+            answer = message.content
+
+        # Record the answer before awaiting anything so rapid replies can't double-advance
+        session["answers"][step["key"]] = answer
+        session["step"] += 1
+        finished = session["step"] >= len(form.steps)
+        if finished:
+            self.cancel(message.author.id)
+        else:
+            session["expires_at"] = time.time() + form.timeout
+            self.wheel.schedule(('dm_session', message.author.id), form.timeout, self.expire, message.author.id)
+            self.schedule_save()
+
+        try:
+            if finished:
+                await form.on_complete(session)
+            else:
+                await message.channel.send(form.steps[session["step"]]["prompt"])
+        except Exception as e:
+            print(f"Error advancing {session['form']} session for {message.author.id}: {e}")
+
+    async def expire(self, user_id: int):
+        """Time out a session and notify the user"""
+        session = self.cancel(user_id)
+        if not session:
+            return
+
+        form = self.forms.get(session["form"])
+        if not form:
+            return
+
+        try:
+            user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+            await user.send(form.timeout_message)
+        except Exception:
+            pass
+
+        if form.on_timeout:
+            try:
+                await form.on_timeout(session)
+            except Exception as e:
+                print(f"Error handling {session['form']} timeout for {user_id}: {e}")
+
+def get_dm_router(bot) -> DMSessionRouter:
+    """Get the bot's shared DM session router, creating it on first use"""
+    router = getattr(bot, 'dm_router', None)
+    if router is None:
+        router = DMSessionRouter(bot)
+        bot.dm_router = router
+        bot.add_listener(router.on_message, 'on_message')
+    return router
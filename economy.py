@@ -1,31 +1,23 @@
 import discord
 from discord.ext import commands
-import asyncpg
-import os
 from datetime import datetime, timedelta
 import random
+from utils.database import get_db_pool
+from utils import queries
+from utils.startup import track_startup
 
 class EconomySystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = None
         self.coin_cooldowns = {}
-        self.bot.loop.create_task(self.init_db())
+        self.bot.loop.create_task(track_startup(self.bot, __name__, self.init_db()))
         print("Initializing EconomySystem cog")
 
     async def init_db(self):
         """Initialize database connection"""
         try:
-            self.db = await asyncpg.create_pool(os.environ['DATABASE_URL'])
-            # Create necessary tables if they don't exist
-            async with self.db.acquire() as conn:
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS user_economy (
-                        user_id BIGINT PRIMARY KEY,
-                        pawcoins INTEGER DEFAULT 0,
-                        last_coin_earned TIMESTAMP WITH TIME ZONE
-                    )
-                """)
+            self.db = await get_db_pool(self.bot)
             print("Economy system database connection initialized")
         except Exception as e:
             print(f"Error initializing economy system database: {e}")
@@ -36,10 +28,14 @@ class EconomySystem(commands.Cog):
         if message.author.bot or not message.guild:
             return
 
+        if not self.db:
+            return
+
         # Check cooldown (2 minutes)
         now = datetime.utcnow()
         user_id = message.author.id
-        last_earned = self.coin_cooldowns.get(user_id)
+        cooldown_key = (message.guild.id, user_id)
+        last_earned = self.coin_cooldowns.get(cooldown_key)
         
         if last_earned and now - last_earned < timedelta(minutes=2):
             return
@@ -48,29 +44,19 @@ class EconomySystem(commands.Cog):
             # Award 1-2 PawCoins
             coins = random.randint(1, 2)
             
-            async with self.db.acquire() as conn:
-                await conn.execute("""
-                    INSERT INTO user_economy (user_id, pawcoins, last_coin_earned)
-                    VALUES ($1, $2, $3)
-                    ON CONFLICT (user_id)
-                    DO UPDATE SET 
-                        pawcoins = user_economy.pawcoins + $2,
-                        last_coin_earned = $3
-                """, user_id, coins, now)
+            await queries.execute(self.db, 'economy.award', message.guild.id, user_id, coins, now)
 
-            self.coin_cooldowns[user_id] = now
+            self.coin_cooldowns[cooldown_key] = now
 
         except Exception as e:
             print(f"Error awarding PawCoins: {e}")
 
     @commands.command(name="balance", aliases=["bal", "coins"])
+    @commands.guild_only()
     async def check_balance(self, ctx):
         """Check your PawCoin balance"""
         try:
-            balance = await self.db.fetchval(
-                "SELECT pawcoins FROM user_economy WHERE user_id = $1",
-                ctx.author.id
-            ) or 0
+            balance = await queries.fetchval(self.db, 'economy.balance', ctx.guild.id, ctx.author.id) or 0
 
             embed = discord.Embed(
                 title="🪙 PawCoin Balance",
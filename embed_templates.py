@@ -0,0 +1,51 @@
+import discord
+import copy
+import config
+
+class EmbedTemplates:
+    """Registry of static embeds built once and cloned for each send
+
+    A builder is called with the template key (e.g. a permission tier) and
+    returns an embed or a list of embeds. Builds are cached per key and only
+    rebuilt when one of the config values the template depends on changes.
+    """
+
+    def __init__(self):
+        self.builders = {}  # name -> (builder, config names it depends on)
+        self.cache = {}  # (name, key) -> (config fingerprint, built embeds)
+
+    def register(self, name: str, builder, depends_on: tuple = ()):
+        """Register a template builder, replacing any earlier builds of it"""
+        self.builders[name] = (builder, tuple(depends_on))
+        self.invalidate(name)
+
+    def invalidate(self, name: str = None):
+        """Drop cached builds of one template, or of all templates"""
+        for cache_key in [cache_key for cache_key in self.cache if name is None or cache_key[0] == name]:
+            del self.cache[cache_key]
+
+    def fingerprint(self, depends_on: tuple) -> tuple:
+        """Snapshot the config values a template was built from"""
+        return tuple(repr(getattr(config, attribute, None)) for attribute in depends_on)
+
+    def build(self, name: str, *key):
+        """Get the cached build for a key, rebuilding it if its config changed
+
+        The returned embeds are shared; use get() for a copy that can be edited.
+        """
+        builder, depends_on = self.builders[name]
+        fingerprint = self.fingerprint(depends_on)
+        cached = self.cache.get((name, key))
+        if cached is None or cached[0] != fingerprint:
+            cached = (fingerprint, builder(*key))
+            self.cache[(name, key)] = cached
+        return cached[1]
+
+    def get(self, name: str, *key):
+        """Get an editable copy of a template"""
+        built = self.build(name, *key)
+        if isinstance(built, discord.Embed):
+            return copy.deepcopy(built)
+        return [copy.deepcopy(embed) for embed in built]
+
+embed_templates = EmbedTemplates()
@@ -1,8 +1,11 @@
 import discord
 from discord.ext import commands
 import config
-from utils.helpers import check_mod_permissions, create_embed
-import asyncio
+from utils.helpers import check_mod_permissions, create_embed, get_members, get_or_fetch_member
+from utils.log_queue import get_log_queue
+from utils.dm_sessions import DMForm, get_dm_router
+from utils.guild_settings import get_guild_settings
+from utils import queries
 import json
 import os
 
@@ -11,6 +14,14 @@ PENDING_FURSONAS_FILE = 'pending_fursonas.json'
 PENDING_IMAGES_FILE = 'pending_images.json'
 USER_FURSONAS_FILE = 'user_fursonas.json'
 
+def normalize_answers(answers: dict) -> dict:
+    """Re-key answers saved under question text to the question schema keys"""
+    keys_by_text = {}
+    for question in config.FURSONA_QUESTIONS:
+        keys_by_text[question["prompt"]] = question["key"]
+        keys_by_text[question["label"]] = question["key"]
+    return {keys_by_text.get(name, name): value for name, value in answers.items()}
+
 # Load saved data
 def load_saved_data():
     global pending_fursonas, pending_images, user_fursonas
@@ -19,6 +30,8 @@ def load_saved_data():
         if os.path.exists(PENDING_FURSONAS_FILE):
             with open(PENDING_FURSONAS_FILE, 'r') as f:
                 pending_fursonas = json.load(f)
+                for application in pending_fursonas.values():
+                    application['answers'] = normalize_answers(application['answers'])
                 print(f"Loaded {len(pending_fursonas)} pending fursonas")
         if os.path.exists(PENDING_IMAGES_FILE):
             with open(PENDING_IMAGES_FILE, 'r') as f:
@@ -26,7 +39,10 @@ def load_saved_data():
                 print(f"Loaded {len(pending_images)} pending images")
         if os.path.exists(USER_FURSONAS_FILE):
             with open(USER_FURSONAS_FILE, 'r') as f:
-                user_fursonas = json.load(f)
+                user_fursonas = {
+                    user_id: normalize_answers(data)
+                    for user_id, data in json.load(f).items()
+                }
                 print(f"Loaded {len(user_fursonas)} user fursonas")
     except Exception as e:
         print(f"Error loading saved data: {e}")
@@ -42,40 +58,46 @@ load_saved_data()
 class FursonaSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.settings = get_guild_settings(bot)
+        self.router = get_dm_router(bot)
+        self.router.register_form(DMForm(
+            name='fursona',
+            steps=config.FURSONA_QUESTIONS,
+            intro="Let's create your fursona! Please answer the following questions:",
+            timeout=config.FURSONA_QUESTION_TIMEOUT,
+            timeout_message="You took too long to respond. Please try again using !fursona create",
+            on_complete=self.submit_fursona
+        ))
+        self.router.register_form(DMForm(
+            name='fursona_image',
+            steps=[{
+                "key": "image_url",
+                "prompt": "Please send your fursona image. Only one image will be accepted.",
+                "retry_prompt": "Please attach your fursona image to your message.",
+                "attachment": True
+            }],
+            timeout=config.FURSONA_QUESTION_TIMEOUT,
+            timeout_message="You took too long to send an image. Please try again.",
+            on_complete=self.submit_fursona_image
+        ))
         print("Initializing FursonaSystem cog")
 
-    async def ask_fursona_questions(self, member: discord.Member) -> dict:
-        """Ask fursona questions via DM"""
-        questions = [
-            "What's your fursona's name?",
-            "What's your fursona's species?",
-            "What's your fursona's age?",
-            "Please write a brief bio for your fursona:"
-        ]
+    async def start_form(self, ctx, form_name: str) -> bool:
+        """Start a fursona DM form for the command author"""
+        if self.router.has_session(ctx.author.id):
+            await ctx.send("Please finish the questions in your DMs first!")
+            return False
 
-        answers = {}
         try:
-            await member.send("Let's create your fursona! Please answer the following questions:")
-            await asyncio.sleep(1)
-
-            def check(m):
-                return m.author == member and isinstance(m.channel, discord.DMChannel)
-
-            for question in questions:
-                await member.send(question)
-                try:
-                    response = await self.bot.wait_for('message', timeout=300.0, check=check)
-                    answers[question] = response.content
-                    await asyncio.sleep(1)
-                except asyncio.TimeoutError:
-                    await member.send("You took too long to respond. Please try again using !fursona create")
-                    return None
-
-            return answers
-
+            await self.router.start(ctx.author, form_name, {"guild_id": ctx.guild.id if ctx.guild else None})
+            return True
         except discord.Forbidden:
-            print(f"Could not DM user {member.name}")
-            return None
+            print(f"Could not DM user {ctx.author.name}")
+            return False
+
+    def session_settings(self, session: dict) -> dict:
+        """Settings of the guild a form was started from, or the home guild's"""
+        return self.settings.get(session["context"].get("guild_id") or config.HOME_GUILD_ID)
 
     @commands.group(invoke_without_command=True)
     async def fursona(self, ctx):
@@ -111,15 +133,7 @@ class FursonaSystem(commands.Cog):
         pack_cog = self.bot.get_cog('PackSystem')
         if pack_cog and pack_cog.db:  # Ensure database connection exists
             try:
-                pack_data = await pack_cog.db.fetchrow(
-                    """
-                    SELECT p.*, pm.role 
-                    FROM packs p 
-                    JOIN pack_members pm ON p.id = pm.pack_id 
-                    WHERE pm.user_id = $1
-                    """,
-                    target_member.id
-                )
+                pack_data = await queries.fetchrow(pack_cog.db, 'packs.member_pack', ctx.guild.id if ctx.guild else None, target_member.id)
                 if pack_data and pack_data['pack_icon_url']:
                     print(f"Setting pack icon URL: {pack_data['pack_icon_url']}")
                     embed.set_thumbnail(url=pack_data['pack_icon_url'])
@@ -133,10 +147,9 @@ class FursonaSystem(commands.Cog):
 
         # Basic Information Section
         basic_info = []
-        for field in ["What's your fursona's name?", "What's your fursona's species?", "What's your fursona's age?"]:
-            if field in fursona_data:
-                field_name = field.replace("What's your fursona's", "").replace("?", "").strip()
-                basic_info.append(f"**{field_name}:** {fursona_data[field]}")
+        for question in config.FURSONA_QUESTIONS:
+            if question["basic"] and question["key"] in fursona_data:
+                basic_info.append(f"**{question['label']}:** {fursona_data[question['key']]}")
 
         embed.add_field(
             name="📝 Basic Information",
@@ -144,13 +157,14 @@ class FursonaSystem(commands.Cog):
             inline=False
         )
 
-        # Bio Section (if exists)
-        if "Please write a brief bio for your fursona:" in fursona_data:
-            embed.add_field(
-                name="✨ Biography",
-                value=fursona_data["Please write a brief bio for your fursona:"],
-                inline=False
-            )
+        # Longer answers such as the bio get their own section
+        for question in config.FURSONA_QUESTIONS:
+            if not question["basic"] and question["key"] in fursona_data:
+                embed.add_field(
+                    name=f"✨ {question['label']}",
+                    value=fursona_data[question["key"]],
+                    inline=False
+                )
 
         # Pack Information Section
         if pack_cog and pack_cog.db:  # Ensure database connection exists
@@ -197,7 +211,7 @@ class FursonaSystem(commands.Cog):
             try:
                 spouse_id = await marriage_cog.get_spouse(target_member.id)
                 if spouse_id:
-                    spouse = ctx.guild.get_member(spouse_id)
+                    spouse = await get_or_fetch_member(ctx.guild, spouse_id)
                     spouse_name = spouse.name if spouse else "Unknown User"
                     relationships.append(f"💑 Married to **{spouse_name}**")
                 else:
@@ -212,7 +226,7 @@ class FursonaSystem(commands.Cog):
                 # Check if user is collared
                 owner_id = await collar_cog.get_collar_owner(target_member.id)
                 if owner_id:
-                    owner = ctx.guild.get_member(owner_id)
+                    owner = await get_or_fetch_member(ctx.guild, owner_id)
                     owner_name = owner.name if owner else "Unknown User"
                     relationships.append(f"🔷 Collared by **{owner_name}**")
 
@@ -220,8 +234,9 @@ class FursonaSystem(commands.Cog):
                 pets = await collar_cog.get_pets(target_member.id)
                 if pets:
                     pet_names = []
+                    pet_members = await get_members(ctx.guild, pets)
                     for pet_id in pets:
-                        pet = ctx.guild.get_member(pet_id)
+                        pet = pet_members.get(pet_id)
                         if pet:
                             pet_names.append(f"**{pet.name}**")
                     if pet_names:
@@ -254,9 +269,12 @@ class FursonaSystem(commands.Cog):
             return
 
         print(f"Starting fursona creation for {ctx.author.name}")
-        answers = await self.ask_fursona_questions(ctx.author)
-        if not answers:
-            return
+        await self.start_form(ctx, 'fursona')
+
+    async def submit_fursona(self, session: dict):
+        """Send a completed fursona form to the approval channel"""
+        user = self.bot.get_user(session["user_id"]) or await self.bot.fetch_user(session["user_id"])
+        answers = session["answers"]
 
         embed = discord.Embed(
             title="New Fursona Application",
@@ -265,21 +283,21 @@ class FursonaSystem(commands.Cog):
 
         embed.add_field(
             name="User Information",
-            value=f"Name: {ctx.author.name}#{ctx.author.discriminator}\n"
-                  f"ID: {ctx.author.id}",
+            value=f"Name: {user.name}#{user.discriminator}\n"
+                  f"ID: {user.id}",
             inline=False
         )
 
-        for question, answer in answers.items():
+        for question in config.FURSONA_QUESTIONS:
             embed.add_field(
-                name=question,
-                value=answer,
+                name=question["prompt"],
+                value=answers.get(question["key"], "No answer"),
                 inline=False
             )
 
-        mod_channel = self.bot.get_channel(config.FURSONA_APPROVAL_CHANNEL_ID)
+        mod_channel = self.bot.get_channel(self.session_settings(session)['fursona_approval_channel_id'])
         if not mod_channel:
-            await ctx.author.send("There was an error submitting your fursona. Please try again later.")
+            await user.send("There was an error submitting your fursona. Please try again later.")
             return
 
         verify_message = await mod_channel.send(embed=embed)
@@ -287,14 +305,14 @@ class FursonaSystem(commands.Cog):
         await verify_message.add_reaction(config.DENY_EMOJI)
 
         # Store as strings to ensure JSON serialization
-        pending_fursonas[str(ctx.author.id)] = {
+        pending_fursonas[str(user.id)] = {
             'answers': answers,
             'message_id': str(verify_message.id)
         }
         save_pending_fursonas()
 
-        await ctx.author.send("Your fursona application has been submitted for review!")
-        print(f"Fursona application submitted for {ctx.author.name}")
+        await user.send("Your fursona application has been submitted for review!")
+        print(f"Fursona application submitted for {user.name}")
 
     @fursona.command(name='delete')
     async def fursona_delete(self, ctx):
@@ -314,7 +332,11 @@ class FursonaSystem(commands.Cog):
         if payload.user_id == self.bot.user.id:
             return
 
-        if payload.channel_id != config.FURSONA_APPROVAL_CHANNEL_ID:
+        if not payload.guild_id:
+            return
+
+        settings = self.settings.get(payload.guild_id)
+        if payload.channel_id != settings['fursona_approval_channel_id']:
             return
 
         message = await self.bot.get_channel(payload.channel_id).fetch_message(payload.message_id)
@@ -322,8 +344,8 @@ class FursonaSystem(commands.Cog):
             return
 
         guild = self.bot.get_guild(payload.guild_id)
-        mod = guild.get_member(payload.user_id)
-        if not mod or not any(role.id == config.MOD_ROLE_ID for role in mod.roles):
+        mod = payload.member
+        if not mod or not any(role.id == settings['mod_role_id'] for role in mod.roles):
             return
 
         embed = message.embeds[0]
@@ -331,7 +353,7 @@ class FursonaSystem(commands.Cog):
         if embed.title == "New Fursona Application":
             # Extract user ID from embed
             user_id = str(int(embed.fields[0].value.split('ID: ')[1].split('\n')[0]))
-            user = guild.get_member(int(user_id))
+            user = await get_or_fetch_member(guild, int(user_id))
 
             # Handle approval
             if str(payload.emoji) == config.APPROVE_EMOJI:
@@ -340,9 +362,10 @@ class FursonaSystem(commands.Cog):
                     answers = pending_fursonas[user_id]['answers']
                 else:
                     # Extract answers from embed if not in memory
-                    answers = {}
-                    for field in embed.fields[1:]:  # Skip user info field
-                        answers[field.name] = field.value
+                    answers = normalize_answers({
+                        field.name: field.value
+                        for field in embed.fields[1:]  # Skip user info field
+                    })
 
                 # Store fursona data
                 user_fursonas[user_id] = answers
@@ -358,9 +381,7 @@ class FursonaSystem(commands.Cog):
                 embed.add_field(name="Status", value=f"Approved by {mod.name}#{mod.discriminator}")
 
                 # Log the approval
-                log_channel = self.bot.get_channel(config.FURSONA_LOG_CHANNEL_ID)
-                if log_channel:
-                    await log_channel.send(embed=embed)
+                get_log_queue(self.bot).enqueue(settings['fursona_log_channel_id'], embed)
 
                 # Delete original message
                 await message.delete()
@@ -378,9 +399,7 @@ class FursonaSystem(commands.Cog):
                 embed.add_field(name="Status", value=f"Denied by {mod.name}#{mod.discriminator}")
 
                 # Log the denial
-                log_channel = self.bot.get_channel(config.FURSONA_LOG_CHANNEL_ID)
-                if log_channel:
-                    await log_channel.send(embed=embed)
+                get_log_queue(self.bot).enqueue(settings['fursona_log_channel_id'], embed)
 
                 # Delete original message
                 await message.delete()
@@ -406,14 +425,12 @@ class FursonaSystem(commands.Cog):
                     embed.add_field(name="Status", value=f"Approved by {mod.name}#{mod.discriminator}")
 
                     # Log the approval
-                    log_channel = self.bot.get_channel(config.FURSONA_LOG_CHANNEL_ID)
-                    if log_channel:
-                        await log_channel.send(embed=embed)
+                    get_log_queue(self.bot).enqueue(settings['fursona_log_channel_id'], embed)
 
                     # Delete original message
                     await message.delete()
 
-                    user = guild.get_member(int(user_id))
+                    user = await get_or_fetch_member(guild, int(user_id))
                     if user:
                         await user.send("Your fursona image has been approved!")
 
@@ -426,14 +443,12 @@ class FursonaSystem(commands.Cog):
                     embed.add_field(name="Status", value=f"Denied by {mod.name}#{mod.discriminator}")
 
                     # Log the denial
-                    log_channel = self.bot.get_channel(config.FURSONA_LOG_CHANNEL_ID)
-                    if log_channel:
-                        await log_channel.send(embed=embed)
+                    get_log_queue(self.bot).enqueue(settings['fursona_log_channel_id'], embed)
 
                     # Delete original message
                     await message.delete()
 
-                    user = guild.get_member(int(user_id))
+                    user = await get_or_fetch_member(guild, int(user_id))
                     if user:
                         await user.send("Your fursona image has been denied.")
 
@@ -454,38 +469,33 @@ class FursonaSystem(commands.Cog):
             await ctx.send("You already have a pending image approval!")
             return
 
-        await ctx.author.send("Please send your fursona image. Only one image will be accepted.")
-
-        def check(m):
-            return m.author == ctx.author and isinstance(m.channel, discord.DMChannel) and m.attachments
+        await self.start_form(ctx, 'fursona_image')
 
-        try:
-            response = await self.bot.wait_for('message', timeout=300.0, check=check)
-            image_url = response.attachments[0].url
+    async def submit_fursona_image(self, session: dict):
+        """Send a submitted fursona image to the approval channel"""
+        user = self.bot.get_user(session["user_id"]) or await self.bot.fetch_user(session["user_id"])
+        image_url = session["answers"]["image_url"]
 
-            embed = discord.Embed(
-                title="New Fursona Image Submission",
-                color=discord.Color.blue()
-            )
-            embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}")
-            embed.set_image(url=image_url)
-
-            mod_channel = self.bot.get_channel(config.FURSONA_APPROVAL_CHANNEL_ID)
-            verify_message = await mod_channel.send(embed=embed)
-            await verify_message.add_reaction(config.APPROVE_EMOJI)
-            await verify_message.add_reaction(config.DENY_EMOJI)
+        embed = discord.Embed(
+            title="New Fursona Image Submission",
+            color=discord.Color.blue()
+        )
+        embed.set_author(name=f"{user.name}#{user.discriminator}")
+        embed.set_image(url=image_url)
 
-            # Store as strings to ensure JSON serialization
-            pending_images[str(ctx.author.id)] = {
-                'url': image_url,
-                'message_id': str(verify_message.id)
-            }
-            save_pending_images()
+        mod_channel = self.bot.get_channel(self.session_settings(session)['fursona_approval_channel_id'])
+        verify_message = await mod_channel.send(embed=embed)
+        await verify_message.add_reaction(config.APPROVE_EMOJI)
+        await verify_message.add_reaction(config.DENY_EMOJI)
 
-            await ctx.author.send("Your fursona image has been submitted for review!")
+        # Store as strings to ensure JSON serialization
+        pending_images[str(user.id)] = {
+            'url': image_url,
+            'message_id': str(verify_message.id)
+        }
+        save_pending_images()
 
-        except asyncio.TimeoutError:
-            await ctx.author.send("You took too long to send an image. Please try again.")
+        await user.send("Your fursona image has been submitted for review!")
 
 async def setup(bot):
     print("Setting up FursonaSystem cog...")
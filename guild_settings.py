@@ -0,0 +1,102 @@
+import json
+import config
+from utils.database import get_db_pool
+
+# Per-guild settings; each key defaults to the config attribute of the same name in upper case
+SETTING_KEYS = (
+    'verification_channel_id',
+    'verification_log_channel_id',
+    'mod_channel_id',
+    'mod_log_channel_id',
+    'mod_role_id',
+    'verified_role_id',
+    'adult_role_id',
+    'muted_role_id',
+    'member_count_channel_id',
+    'member_log_channel_id',
+    'raid_alert_channel_id',
+    'reaction_roles_channel_id',
+    'level_up_channel_id',
+    'emoji_verified_role_id',
+    'vc_verified_role_id',
+    'general_channel_id',
+    'bump_channel_id',
+    'fursona_approval_channel_id',
+    'fursona_log_channel_id',
+    'pack_approval_channel_id',
+    'pack_log_channel_id',
+)
+
+class GuildSettings:
+    """Channel and role IDs per guild, resolved from one dict lookup per event
+
+    The home guild (or every guild, when config.HOME_GUILD_ID is unset) starts
+    from the IDs in config; other guilds start empty. Overrides are stored in
+    the guild_settings table and merged into the cache when loaded or changed.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.db = None
+        self.overrides = {}  # guild_id -> {key: value} from the database
+        self.cache = {}  # guild_id -> merged settings
+
+    def defaults(self, guild_id: int) -> dict:
+        """Settings for a guild with no overrides"""
+        if config.HOME_GUILD_ID is None or guild_id == config.HOME_GUILD_ID:
+            return {key: getattr(config, key.upper(), None) for key in SETTING_KEYS}
+        return dict.fromkeys(SETTING_KEYS)
+
+    def get(self, guild_id: int) -> dict:
+        """A guild's settings; treat the returned dict as read-only"""
+        settings = self.cache.get(guild_id)
+        if settings is None:
+            settings = self.defaults(guild_id)
+            settings.update(self.overrides.get(guild_id, {}))
+            self.cache[guild_id] = settings
+        return settings
+
+    async def load(self):
+        """Load every guild's overrides once the database is available"""
+        try:
+            self.db = await get_db_pool(self.bot)
+            rows = await self.db.fetch("SELECT guild_id, settings FROM guild_settings")
+            self.overrides = {row['guild_id']: json.loads(row['settings']) for row in rows}
+            self.cache.clear()
+            print(f"Loaded settings for {len(self.overrides)} guilds")
+        except Exception as e:
+            print(f"Error loading guild settings, using defaults: {e}")
+
+    def refresh(self, guild_id: int, overrides: str = None) -> dict:
+        """Replace a guild's overrides with its guild_settings row, which another process may have changed"""
+        overrides = json.loads(overrides) if overrides else {}
+        if overrides != self.overrides.get(guild_id, {}):
+            self.overrides[guild_id] = overrides
+            self.cache.pop(guild_id, None)
+        return self.get(guild_id)
+
+    async def set(self, guild_id: int, key: str, value):
+        """Change one setting for a guild and persist it"""
+        if key not in SETTING_KEYS:
+            raise KeyError(key)
+        self.overrides.setdefault(guild_id, {})[key] = value
+        self.cache.pop(guild_id, None)
+        if self.db:
+            await self.db.execute(
+                """
+                INSERT INTO guild_settings (guild_id, settings)
+                VALUES ($1, $2::jsonb)
+                ON CONFLICT (guild_id)
+                DO UPDATE SET settings = guild_settings.settings || $2::jsonb, updated_at = NOW()
+                """,
+                guild_id, json.dumps({key: value})
+            )
+
+def get_guild_settings(bot) -> GuildSettings:
+    """Get the bot's shared guild settings cache, creating it on first use"""
+    settings = getattr(bot, 'guild_settings', None)
+    if settings is None:
+        settings = GuildSettings(bot)
+        bot.guild_settings = settings
+        bot.loop.create_task(settings.load())
+    return settings
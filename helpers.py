@@ -3,19 +3,30 @@ from discord.ext import commands
 import asyncio
 from typing import List, Dict
 import config
+import logging
 import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
 
 # Store verification states
 active_verifications = set()
-verification_cooldowns = {}
+verification_cooldowns = {}  # user_id -> cooldown expiry (epoch seconds)
 pending_applications = set()  # Track users with pending applications
-message_locks = {}  # Add message locks to prevent duplicate messages
+
+# Pending applications and cooldowns are written through to the verification_state table
+verification_db = None
+last_state_write = None  # Most recent background write; each write waits for the one before it
+pending_state_writes = 0  # Writes queued or running
 
 async def check_mod_permissions(ctx) -> bool:
     """Check if user has moderator permissions"""
     if not ctx.guild:
         return False
-    return any(role.id == config.MOD_ROLE_ID for role in ctx.author.roles)
+    # Imported here: guild_settings -> database -> metrics imports this module
+    from utils.guild_settings import get_guild_settings
+    mod_role_id = get_guild_settings(ctx.bot).get(ctx.guild.id)['mod_role_id']
+    return any(role.id == mod_role_id for role in ctx.author.roles)
 
 async def create_embed(title: str, fields: Dict[str, str], user: discord.Member) -> discord.Embed:
     """Create a formatted embed for verification"""
@@ -30,53 +41,35 @@ async def create_embed(title: str, fields: Dict[str, str], user: discord.Member)
 
     return embed
 
-async def ask_question(user: discord.Member, question: str, bot: commands.Bot = None) -> str:
-    """Ask a question and wait for response"""
-    try:
-        # Check if user is still in verification
-        if not is_in_verification(user.id):
-            return None
-
-        # Prevent duplicate messages using a lock
-        if user.id in message_locks:
-            print(f"Skipping duplicate message for user {user.id}")
+async def get_or_fetch_member(guild: discord.Guild, user_id: int):
+    """Get a member from the cache, or from the API when the cache profile doesn't keep them"""
+    member = guild.get_member(user_id)
+    if member is None:
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
             return None
-
-        message_locks[user.id] = True
-
-        # Send question
-        await user.send(question)
-        print(f"Sent question to user {user.id}: {question}")
-
-        def check(m):
-            return m.author == user and isinstance(m.channel, discord.DMChannel)
-
-        # Wait for response
-        response = await bot.wait_for('message', timeout=300.0, check=check)
-
-        # Clear the message lock after getting response
-        if user.id in message_locks:
-            del message_locks[user.id]
-
-        return response.content if response else None
-
-    except asyncio.TimeoutError:
-        await user.send("Verification timed out. Please try again in the verification channel.")
-        remove_from_verification(user.id)
-        if user.id in message_locks:
-            del message_locks[user.id]
-        return None
-    except discord.Forbidden:
-        remove_from_verification(user.id)
-        if user.id in message_locks:
-            del message_locks[user.id]
-        return None
-    except Exception as e:
-        print(f"Error in ask_question: {str(e)}")
-        remove_from_verification(user.id)
-        if user.id in message_locks:
-            del message_locks[user.id]
-        return None
+    return member
+
+async def get_members(guild: discord.Guild, user_ids: List[int]) -> Dict[int, discord.Member]:
+    """Look up members by ID, querying the gateway once for any that aren't cached"""
+    members = {}
+    missing = []
+    for user_id in user_ids:
+        member = guild.get_member(user_id)
+        if member:
+            members[user_id] = member
+        else:
+            missing.append(user_id)
+    # One request covers up to 100 IDs; members who left the guild are simply absent
+    for i in range(0, len(missing), 100):
+        chunk = missing[i:i + 100]
+        try:
+            for member in await guild.query_members(user_ids=chunk, limit=len(chunk), cache=False):
+                members[member.id] = member
+        except (asyncio.TimeoutError, discord.ClientException) as e:
+            print(f"Error looking up members in {guild.id}: {e}")
+    return members
 
 def is_in_verification(user_id: int) -> bool:
     """Check if user is currently in verification process"""
@@ -89,42 +82,123 @@ def add_to_verification(user_id: int):
 def remove_from_verification(user_id: int):
     """Remove user from verification states"""
     active_verifications.discard(user_id)
-    # Also clear any message locks
-    if user_id in message_locks:
-        del message_locks[user_id]  # Fixed: using user_id instead of user.id
-    print(f"Removed user {user_id} from verification process and cleared locks")
+    print(f"Removed user {user_id} from verification process")
+
+async def init_verification_store(pool):
+    """Rebuild pending applications and cooldowns from the database"""
+    global verification_db
+    verification_db = pool
+    rows = await pool.fetch(
+        """
+        SELECT user_id, state, expires_at
+        FROM verification_state
+        WHERE expires_at IS NULL OR expires_at > NOW()
+        """
+    )
+    for row in rows:
+        if row['state'] == 'pending':
+            pending_applications.add(row['user_id'])
+        elif row['state'] == 'cooldown':
+            verification_cooldowns[row['user_id']] = row['expires_at'].timestamp()
+    print(f"Loaded verification state: {len(pending_applications)} pending, {len(verification_cooldowns)} cooldowns")
+
+def schedule_state_write(query: str, *args):
+    """Apply a verification state change to the database in the background, in order"""
+    global last_state_write, pending_state_writes
+    if verification_db is None:
+        return
+    pending_state_writes += 1
+    last_state_write = asyncio.get_running_loop().create_task(
+        run_state_write(last_state_write, query, *args)
+    )
+
+async def run_state_write(previous, query: str, *args):
+    """Run one verification state write after the previous one finishes"""
+    global pending_state_writes
+    try:
+        if previous is not None and not previous.done():
+            await asyncio.wait([previous])
+        await verification_db.execute(query, *args)
+    except Exception as e:
+        print(f"Error saving verification state: {e}")
+    finally:
+        pending_state_writes -= 1
+
+async def flush_state_writes():
+    """Wait for all queued verification state writes"""
+    if last_state_write is not None and not last_state_write.done():
+        await asyncio.wait([last_state_write])
+
+async def sweep_expired_cooldowns(delete_rows: bool = True) -> int:
+    """Evict expired cooldowns from the cache, and from the database in one batch if delete_rows"""
+    now = time.time()
+    expired = [user_id for user_id, expires_at in verification_cooldowns.items() if expires_at <= now]
+    for user_id in expired:
+        del verification_cooldowns[user_id]
+
+    if delete_rows and verification_db is not None:
+        await verification_db.execute(
+            "DELETE FROM verification_state WHERE state = 'cooldown' AND expires_at <= NOW()"
+        )
+    return len(expired)
 
 def has_pending_application(user_id: int) -> bool:
     """Check if user has a pending application"""
     is_pending = user_id in pending_applications
-    print(f"Checking pending status for user {user_id}: {is_pending}")
+    logger.debug("Checking pending status for user %s: %s", user_id, is_pending)
     return is_pending
 
 def add_pending_application(user_id: int):
     """Add user to pending applications"""
     pending_applications.add(user_id)
+    schedule_state_write(
+        """
+        INSERT INTO verification_state (user_id, state)
+        VALUES ($1, 'pending')
+        ON CONFLICT (user_id, state) DO NOTHING
+        """,
+        user_id
+    )
     print(f"Added user {user_id} to pending applications. Current pending: {len(pending_applications)}")
 
 def remove_pending_application(user_id: int):
     """Remove user from pending applications"""
     pending_applications.discard(user_id)
+    schedule_state_write(
+        "DELETE FROM verification_state WHERE user_id = $1 AND state = 'pending'",
+        user_id
+    )
     print(f"Removed user {user_id} from pending applications. Current pending: {len(pending_applications)}")
 
 def is_on_cooldown(user_id: int) -> bool:
     """Check if user is on verification cooldown"""
-    if user_id not in verification_cooldowns:
+    expires_at = verification_cooldowns.get(user_id)
+    if expires_at is None:
         return False
-    current_time = time.time()
-    if current_time - verification_cooldowns[user_id] >= config.VERIFICATION_COOLDOWN:
-        remove_cooldown(user_id)
+    if time.time() >= expires_at:
+        # Expired rows are removed from the database by the periodic sweep
+        del verification_cooldowns[user_id]
         return False
     return True
 
 def add_cooldown(user_id: int):
     """Add user to cooldown"""
-    verification_cooldowns[user_id] = time.time()
+    expires_at = time.time() + config.VERIFICATION_COOLDOWN
+    verification_cooldowns[user_id] = expires_at
+    schedule_state_write(
+        """
+        INSERT INTO verification_state (user_id, state, expires_at)
+        VALUES ($1, 'cooldown', $2)
+        ON CONFLICT (user_id, state) DO UPDATE SET expires_at = $2
+        """,
+        user_id, datetime.fromtimestamp(expires_at, timezone.utc)
+    )
 
 def remove_cooldown(user_id: int):
     """Remove user from cooldown"""
     if user_id in verification_cooldowns:
-        del verification_cooldowns[user_id]
\ No newline at end of file
+        del verification_cooldowns[user_id]
+        schedule_state_write(
+            "DELETE FROM verification_state WHERE user_id = $1 AND state = 'cooldown'",
+            user_id
+        )
\ No newline at end of file
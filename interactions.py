@@ -2,16 +2,21 @@ import discord
 from discord.ext import commands
 import random
 import asyncio
-import os
-import asyncpg
 from datetime import datetime, timedelta
+from utils.embed_templates import embed_templates
+from utils.database import get_db_pool
+from utils.helpers import get_members
+from utils.message_queue import get_message_queue
+from utils import queries
+from utils.startup import track_startup
 
 class InteractionCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = None
+        self.outbox = get_message_queue(bot)
         self.ready = asyncio.Event()
-        self.bot.loop.create_task(self.init_db())
+        self.bot.loop.create_task(track_startup(self.bot, __name__, self.init_db()))
         print("Initializing InteractionCommands cog")
 
         # Add new interaction types to self.interactions dictionary
@@ -193,12 +198,15 @@ class InteractionCommands(commands.Cog):
             ]
         }
 
+        embed_templates.register('interactions_list', self.create_interactions_embed)
+        embed_templates.build('interactions_list')
+
     async def init_db(self):
         """Initialize database connection"""
         retries = 3
         while retries > 0:
             try:
-                self.db = await asyncpg.create_pool(os.environ['DATABASE_URL'])
+                self.db = await get_db_pool(self.bot)
                 print("Interactions database connection initialized")
                 self.ready.set()
                 return
@@ -209,26 +217,18 @@ class InteractionCommands(commands.Cog):
                     await asyncio.sleep(1)
         print("Failed to initialize interactions database after all retries")
 
-    async def record_interaction(self, user_id: int, interaction_type: str):
+    async def record_interaction(self, guild_id: int, user_id: int, interaction_type: str):
         """Record an interaction in the database"""
         await self.ready.wait()
         if not self.db:
             return
 
         try:
-            async with self.db.acquire() as conn:
-                await conn.execute("""
-                    INSERT INTO interaction_stats (user_id, interaction_type, count, last_used)
-                    VALUES ($1, $2, 1, NOW())
-                    ON CONFLICT (user_id, interaction_type)
-                    DO UPDATE SET 
-                        count = interaction_stats.count + 1,
-                        last_used = NOW()
-                """, user_id, interaction_type)
+            await queries.execute(self.db, 'interactions.record', guild_id, user_id, interaction_type)
         except Exception as e:
             print(f"Error recording interaction: {e}")
 
-    async def check_cooldown(self, user_id: int, interaction_type: str) -> bool:
+    async def check_cooldown(self, guild_id: int, user_id: int, interaction_type: str) -> bool:
         """Check if user is on cooldown for this interaction"""
         await self.ready.wait()
         if not self.db:
@@ -236,11 +236,7 @@ class InteractionCommands(commands.Cog):
 
         try:
             async with self.db.acquire() as conn:
-                last_used = await conn.fetchval("""
-                    SELECT last_used 
-                    FROM interaction_stats 
-                    WHERE user_id = $1 AND interaction_type = $2
-                """, user_id, interaction_type)
+                last_used = await queries.fetchval(conn, 'interactions.last_used', guild_id, user_id, interaction_type)
 
                 if not last_used:
                     return False
@@ -262,31 +258,27 @@ class InteractionCommands(commands.Cog):
         verified_role = discord.utils.get(ctx.guild.roles, name="Verified")
         if verified_role and verified_role in ctx.author.roles:
             # Check cooldown for verified users
-            if await self.check_cooldown(ctx.author.id, interaction_type):
-                remaining = await self.get_cooldown_remaining(ctx.author.id, interaction_type)
-                cooldown_msg = await ctx.send(
-                    f"❌ {ctx.author.mention} You need to wait {remaining:.1f} minutes before using {interaction_type} again!"
-                )
+            if await self.check_cooldown(ctx.guild.id, ctx.author.id, interaction_type):
+                remaining = await self.get_cooldown_remaining(ctx.guild.id, ctx.author.id, interaction_type)
                 # Delete the cooldown message after 5 seconds
-                await asyncio.sleep(5)
-                try:
-                    await cooldown_msg.delete()
-                except:
-                    pass
+                self.outbox.send(
+                    ctx.channel,
+                    f"❌ {ctx.author.mention} You need to wait {remaining:.1f} minutes before using {interaction_type} again!",
+                    delete_after=5
+                )
                 return
 
         if target.id == ctx.author.id:
-            self_msg = await ctx.send(f"{ctx.author.mention} tries to {interaction_type} themselves... but just looks silly! *giggles*")
-            await asyncio.sleep(5)
-            try:
-                await self_msg.delete()
-            except:
-                pass
+            self.outbox.send(
+                ctx.channel,
+                f"{ctx.author.mention} tries to {interaction_type} themselves... but just looks silly! *giggles*",
+                delete_after=5
+            )
             return
 
         message = random.choice(self.interactions[interaction_type])
-        await ctx.send(message.format(user=ctx.author.mention, target=target.mention))
-        await self.record_interaction(ctx.author.id, interaction_type)
+        self.outbox.send(ctx.channel, message.format(user=ctx.author.mention, target=target.mention))
+        await self.record_interaction(ctx.guild.id, ctx.author.id, interaction_type)
 
     @commands.command()
     async def boop(self, ctx, target: discord.Member):
@@ -413,9 +405,8 @@ class InteractionCommands(commands.Cog):
         """Express your excitement to another user!"""
         await self.handle_interaction(ctx, target, 'excited')
 
-    @commands.command()
-    async def interactions(self, ctx):
-        """List all available interaction commands"""
+    def create_interactions_embed(self):
+        """Create the interaction command list embed"""
         embed = discord.Embed(
             title="🌟 Available Interactions",
             description="Here are all the fun ways to interact with others!\n"
@@ -457,7 +448,12 @@ class InteractionCommands(commands.Cog):
             inline=False
         )
 
-        await ctx.send(embed=embed)
+        return embed
+
+    @commands.command()
+    async def interactions(self, ctx):
+        """List all available interaction commands"""
+        await ctx.send(embed=embed_templates.get('interactions_list'))
 
     @commands.command(name='interaction_stats')
     async def show_interaction_stats(self, ctx, interaction_type: str = None):
@@ -478,10 +474,10 @@ class InteractionCommands(commands.Cog):
                     records = await conn.fetch("""
                         SELECT user_id, count 
                         FROM interaction_stats 
-                        WHERE interaction_type = $1 
+                        WHERE guild_id = $1 AND interaction_type = $2 
                         ORDER BY count DESC 
                         LIMIT 10
-                    """, interaction_type)
+                    """, ctx.guild.id, interaction_type)
 
                     embed = discord.Embed(
                         title=f"🏆 Top 10 {interaction_type} Users",
@@ -492,10 +488,11 @@ class InteractionCommands(commands.Cog):
                     records = await conn.fetch("""
                         SELECT user_id, SUM(count) as total 
                         FROM interaction_stats 
+                        WHERE guild_id = $1 
                         GROUP BY user_id 
                         ORDER BY total DESC 
                         LIMIT 10
-                    """)
+                    """, ctx.guild.id)
 
                     embed = discord.Embed(
                         title="🏆 Top 10 Most Interactive Users",
@@ -503,8 +500,9 @@ class InteractionCommands(commands.Cog):
                     )
 
                 description = ""
+                members = await get_members(ctx.guild, [record['user_id'] for record in records])
                 for i, record in enumerate(records, 1):
-                    user = ctx.guild.get_member(record['user_id'])
+                    user = members.get(record['user_id'])
                     if user:
                         count = record['count' if interaction_type else 'total']
                         medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else "✨"
@@ -517,7 +515,7 @@ class InteractionCommands(commands.Cog):
             print(f"Error displaying leaderboard: {e}")
             await ctx.send("❌ Error fetching leaderboard data.")
 
-    async def get_cooldown_remaining(self, user_id: int, interaction_type: str) -> float:
+    async def get_cooldown_remaining(self, guild_id: int, user_id: int, interaction_type: str) -> float:
         """Get remaining cooldown time in minutes"""
         await self.ready.wait()
         if not self.db:
@@ -525,11 +523,7 @@ class InteractionCommands(commands.Cog):
 
         try:
             async with self.db.acquire() as conn:
-                last_used = await conn.fetchval("""
-                    SELECT last_used 
-                    FROM interaction_stats 
-                    WHERE user_id = $1 AND interaction_type = $2
-                """, user_id, interaction_type)
+                last_used = await queries.fetchval(conn, 'interactions.last_used', guild_id, user_id, interaction_type)
 
                 if not last_used:
                     return 0
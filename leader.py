@@ -0,0 +1,87 @@
+import asyncio
+import asyncpg
+import os
+import config
+from utils.metrics import leader_status
+
+LEADER_LOCK_ID = 7_301_047  # Advisory lock held by the process that runs singleton jobs
+
+class LeaderElection:
+    """Elects one bot process to run the singleton background jobs
+
+    Every process polls for a session-level Postgres advisory lock and the one
+    holding it is the leader. The lock lives on a dedicated connection, since
+    pool connections release all advisory locks when they go back to the pool.
+    If the leader dies, Postgres drops its connection and the lock with it,
+    and the next process to poll takes over.
+    """
+
+    def __init__(self, interval: float = None):
+        self.interval = interval or config.LEADER_POLL_INTERVAL
+        self.conn = None
+        self.is_leader = False
+        self.task = None
+
+    def start(self):
+        """Start polling for leadership if it isn't running"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        """Stop polling and give up leadership so another process can take over"""
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        await self.step_down()
+
+    async def run(self):
+        if not os.environ.get('DATABASE_URL'):
+            # Nothing to coordinate with, so this process runs everything
+            self.set_leader(True)
+            return
+
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                print(f"Leader election error: {e}")
+                await self.step_down()
+            await asyncio.sleep(self.interval)
+
+    async def poll(self):
+        """Take the lock if it is free, or confirm the connection holding it is alive"""
+        if self.conn is None or self.conn.is_closed():
+            self.conn = await asyncpg.connect(os.environ['DATABASE_URL'])
+
+        if self.is_leader:
+            # The lock is only held while this connection is
+            await self.conn.execute("SELECT 1")
+            return
+
+        if await self.conn.fetchval("SELECT pg_try_advisory_lock($1)", LEADER_LOCK_ID):
+            self.set_leader(True)
+
+    async def step_down(self):
+        """Drop leadership and the connection that held the lock"""
+        self.set_leader(False)
+        conn, self.conn = self.conn, None
+        if conn is not None and not conn.is_closed():
+            try:
+                await asyncio.wait_for(conn.close(), timeout=5)
+            except Exception:
+                conn.terminate()
+
+    def set_leader(self, is_leader: bool):
+        if is_leader != self.is_leader:
+            print("This process is now the leader" if is_leader else "This process is no longer the leader")
+        self.is_leader = is_leader
+        leader_status.set(value=1 if is_leader else 0)
+
+def get_leader(bot) -> LeaderElection:
+    """Get the bot's shared leader election, creating and starting it on first use"""
+    leader = getattr(bot, 'leader', None)
+    if leader is None:
+        leader = LeaderElection()
+        bot.leader = leader
+    leader.start()
+    return leader
@@ -1,15 +1,23 @@
 import discord
 from discord.ext import commands
-import asyncpg
-import os
 import random
 from datetime import datetime
 import pytz
+import logging
+from utils.database import get_db_pool
+from utils import queries
+from utils.guild_settings import get_guild_settings
+from utils.helpers import get_members
+from utils.message_queue import get_message_queue
+from utils.role_queue import get_role_queue
+from utils.startup import track_startup
+
+logger = logging.getLogger(__name__)
 
 class Leveling(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.xp_cooldown = commands.CooldownMapping.from_cooldown(1, 60, commands.BucketType.user)
+        self.xp_cooldown = commands.CooldownMapping.from_cooldown(1, 60, commands.BucketType.member)
         self.level_roles = {
             1: "Winter Villager",
             3: "Frost Forager",
@@ -34,15 +42,16 @@ class Leveling(commands.Cog):
             95: "Frozen Deity",
             100: "King/Queen of the Everwinter"
         }
-        self.level_up_channel_id = 1342884630671523890
-        self.verified_role_id = 994238679281303605
+        self.settings = get_guild_settings(bot)
+        self.roles = get_role_queue(bot)
+        self.outbox = get_message_queue(bot)
         self.db = None
-        self.bot.loop.create_task(self.init_db())
+        self.bot.loop.create_task(track_startup(self.bot, __name__, self.init_db()))
 
     async def init_db(self):
         try:
             print("Initializing database connection...")
-            self.db = await asyncpg.create_pool(os.environ['DATABASE_URL'])
+            self.db = await get_db_pool(self.bot)
             print("Successfully initialized leveling database")
         except Exception as e:
             print(f"Error initializing database: {e}")
@@ -61,31 +70,24 @@ class Leveling(commands.Cog):
             level_multiplier = 75
             return int(base_xp * (scaling_factor ** level) + (level_multiplier * level ** 2))
 
-    async def add_xp(self, user_id: int, xp_to_add: int):
+    async def add_xp(self, member: discord.Member, xp_to_add: int):
+        user_id = member.id
+        guild = member.guild
         if not self.db:
-            print("Database connection not initialized!")
+            logger.warning("Database connection not initialized, dropping XP for user %s", user_id)
             return None
 
         try:
             async with self.db.acquire() as conn:
-                print(f"Adding {xp_to_add} XP to user {user_id}")
+                logger.debug("Adding %s XP to user %s", xp_to_add, user_id)
 
                 # Get current user data or create new entry
-                user_data = await conn.fetchrow(
-                    '''
-                    INSERT INTO levels (user_id, xp, level)
-                    VALUES ($1, $2, 1)
-                    ON CONFLICT (user_id) 
-                    DO UPDATE SET xp = levels.xp + $2
-                    RETURNING xp, level
-                    ''',
-                    user_id, xp_to_add
-                )
+                user_data = await queries.fetchrow(conn, 'levels.add_xp', guild.id, user_id, xp_to_add)
 
                 current_xp = user_data['xp']
                 current_level = user_data['level']
 
-                print(f"User {user_id} now has {current_xp} XP at level {current_level}")
+                logger.debug("User %s now has %s XP at level %s", user_id, current_xp, current_level)
 
                 # Calculate if level up occurred
                 new_level = current_level
@@ -93,123 +95,124 @@ class Leveling(commands.Cog):
                     new_level += 1
 
                 level_up_occurred = new_level > current_level
+                if level_up_occurred:
+                    # Another award may have raised the level first; only one announces it
+                    raised = await queries.fetchrow(conn, 'levels.raise_level', guild.id, user_id, new_level)
+                    level_up_occurred = raised is not None
                 is_new_user = current_xp == xp_to_add and current_level == 1
 
-                # Find the user in any guild
-                for guild in self.bot.guilds:
-                    member = guild.get_member(user_id)
-                    if member:
-                        level_up_channel = self.bot.get_channel(self.level_up_channel_id)
-                        if level_up_channel:
-                            if level_up_occurred:
-                                print(f"User {user_id} leveled up to {new_level}!")
-                                await level_up_channel.send(
-                                    f"🎉 **LEVEL UP!** 🎉\n"
-                                    f"{member.mention} has reached level **{new_level}**! "
-                                    f"Keep chatting to earn more XP! ❄️"
+                level_up_channel = guild.get_channel(self.settings.get(guild.id)['level_up_channel_id'])
+                if level_up_channel:
+                    if level_up_occurred:
+                        logger.info("User %s leveled up to %s", user_id, new_level)
+                        self.outbox.send(
+                            level_up_channel,
+                            f"🎉 **LEVEL UP!** 🎉\n"
+                            f"{member.mention} has reached level **{new_level}**! "
+                            f"Keep chatting to earn more XP! ❄️"
+                        )
+                        await self.handle_role_rewards(member, new_level, level_up_channel)
+                    elif is_new_user:
+                        winter_villager_role = discord.utils.get(guild.roles, name="Winter Villager")
+                        if winter_villager_role and not self.roles.has_role(member, winter_villager_role):
+                            try:
+                                self.roles.add(member, winter_villager_role)
+                                logger.debug("Queued Winter Villager role for %s", member.name)
+                                self.outbox.send(
+                                    level_up_channel,
+                                    f"🎉 Welcome {member.mention}! Congratulations on your first message - "
+                                    f"you're now level 1 and have received the Winter Villager role! Keep chatting to earn more XP! ❄️"
                                 )
-                                await self.handle_role_rewards(member, new_level, level_up_channel)
-                            elif is_new_user:
-                                winter_villager_role = discord.utils.get(guild.roles, name="Winter Villager")
-                                if winter_villager_role and winter_villager_role not in member.roles:
-                                    try:
-                                        await member.add_roles(winter_villager_role)
-                                        print(f"Added Winter Villager role to {member.name}")
-                                        await level_up_channel.send(
-                                            f"🎉 Welcome {member.mention}! Congratulations on your first message - "
-                                            f"you're now level 1 and have received the Winter Villager role! Keep chatting to earn more XP! ❄️"
-                                        )
-                                    except Exception as e:
-                                        print(f"Error adding Winter Villager role: {e}")
-                        break
+                            except Exception as e:
+                                logger.exception("Error adding Winter Villager role for %s", member.name)
 
-                if level_up_occurred:
-                    await conn.execute(
-                        'UPDATE levels SET level = $1 WHERE user_id = $2',
-                        new_level, user_id
-                    )
-                    return new_level
-                return None
+                return new_level if level_up_occurred else None
 
         except Exception as e:
-            print(f"Error in add_xp: {e}")
+            logger.exception("Error in add_xp for user %s", user_id)
             return None
 
     async def handle_role_rewards(self, member, new_level, level_up_channel):
         """Handle role rewards and removal of previous roles"""
+        # Changes are queued, so everything granted or removed here goes out as one edit
         try:
             # First ensure Winter Villager role is present for all leveled users
             winter_villager_role = discord.utils.get(member.guild.roles, name="Winter Villager")
-            if winter_villager_role and winter_villager_role not in member.roles:
-                await member.add_roles(winter_villager_role)
-                print(f"Added missing Winter Villager role to {member.name} during level up")
+            if winter_villager_role and not self.roles.has_role(member, winter_villager_role):
+                self.roles.add(member, winter_villager_role)
+                logger.debug("Queued missing Winter Villager role for %s during level up", member.name)
 
             # Special case for verified roles at level 3
             if new_level >= 3:
+                settings = self.settings.get(member.guild.id)
                 # Add emoji verified role
-                emoji_verified_role = member.guild.get_role(994238679281303605)
-                if emoji_verified_role and emoji_verified_role not in member.roles:
-                    await member.add_roles(emoji_verified_role)
-                    await level_up_channel.send(
+                emoji_verified_role = member.guild.get_role(settings['emoji_verified_role_id'])
+                if emoji_verified_role and not self.roles.has_role(member, emoji_verified_role):
+                    self.roles.add(member, emoji_verified_role)
+                    self.outbox.send(
+                        level_up_channel,
                         f"✨ {member.mention} has earned the **Emoji Verified** role! ✨"
                     )
-                    print(f"Added emoji verified role to {member.name}")
+                    logger.debug("Queued emoji verified role for %s", member.name)
 
                 # Add VC verified role
-                vc_verified_role = member.guild.get_role(1342949414649593887)
-                if vc_verified_role and vc_verified_role not in member.roles:
-                    await member.add_roles(vc_verified_role)
-                    await level_up_channel.send(
+                vc_verified_role = member.guild.get_role(settings['vc_verified_role_id'])
+                if vc_verified_role and not self.roles.has_role(member, vc_verified_role):
+                    self.roles.add(member, vc_verified_role)
+                    self.outbox.send(
+                        level_up_channel,
                         f"🎤 {member.mention} has earned the **VC Verified** role! 🎤"
                     )
-                    print(f"Added VC verified role to {member.name}")
+                    logger.debug("Queued VC verified role for %s", member.name)
 
-            # Remove previous level roles before adding new one
+            # The highest level role reached replaces the previous ones;
+            # Winter Villager stays with every leveled user
+            new_role_name = next(
+                (role_name for level, role_name in sorted(self.level_roles.items(), reverse=True) if new_level >= level),
+                None
+            )
             current_level_roles = []
             for level, role_name in self.level_roles.items():
+                if role_name in (new_role_name, "Winter Villager"):
+                    continue
                 role = discord.utils.get(member.guild.roles, name=role_name)
-                if role and role in member.roles:
+                if role and self.roles.has_role(member, role):
                     current_level_roles.append(role)
 
             if current_level_roles:
-                await member.remove_roles(*current_level_roles)
-                print(f"Removed previous level roles from {member.name}")
+                self.roles.remove(member, *current_level_roles)
+                logger.debug("Queued removal of previous level roles from %s", member.name)
 
             # Add new level role if applicable
-            for level, role_name in sorted(self.level_roles.items(), reverse=True):
-                if new_level >= level:
-                    role = discord.utils.get(member.guild.roles, name=role_name)
-                    if role and role not in member.roles:
-                        await member.add_roles(role)
-                        await level_up_channel.send(
-                            f"🎊 {member.mention} has earned the **{role_name}** role! 🎊"
-                        )
-                        print(f"Added role {role_name} to {member.name}")
-                    break
+            if new_role_name:
+                role = discord.utils.get(member.guild.roles, name=new_role_name)
+                if role and not self.roles.has_role(member, role):
+                    self.roles.add(member, role)
+                    self.outbox.send(
+                        level_up_channel,
+                        f"🎊 {member.mention} has earned the **{new_role_name}** role! 🎊"
+                    )
+                    logger.debug("Queued role %s for %s", new_role_name, member.name)
 
         except Exception as e:
-            print(f"Error handling role rewards: {e}")
+            logger.exception("Error handling role rewards for %s", member.name)
 
     @commands.Cog.listener()
     async def on_message(self, message):
         """Handle message events for XP"""
         if message.author.bot or not message.guild:
-            print(f"Skipping XP for bot or non-guild message from {message.author.name}")
             return
 
-        print(f"Processing message from {message.author.name} (ID: {message.author.id})")
-
         # Check if user is on cooldown
         bucket = self.xp_cooldown.get_bucket(message)
         retry_after = bucket.update_rate_limit()
         if retry_after:
-            print(f"User {message.author.name} is on cooldown for {retry_after:.2f} seconds")
+            logger.debug("User %s is on cooldown for %.2f seconds", message.author.id, retry_after)
             return
 
         # Random XP between 15-25
         xp_to_add = random.randint(15, 25)
-        print(f"Attempting to add {xp_to_add} XP to {message.author.name}")
-        await self.add_xp(message.author.id, xp_to_add)
+        await self.add_xp(message.author, xp_to_add)
 
 
     @commands.command()
@@ -222,10 +225,7 @@ class Leveling(commands.Cog):
         member = member or ctx.author
 
         async with self.db.acquire() as conn:
-            user_data = await conn.fetchrow(
-                'SELECT xp, level FROM levels WHERE user_id = $1',
-                member.id
-            )
+            user_data = await queries.fetchrow(conn, 'levels.get', member.guild.id, member.id)
 
             if not user_data:
                 await ctx.send(f"{member.display_name} hasn't earned any XP yet!")
@@ -257,9 +257,11 @@ class Leveling(commands.Cog):
                 '''
                 SELECT user_id, xp, level 
                 FROM levels 
+                WHERE guild_id = $1
                 ORDER BY xp DESC 
                 LIMIT 10
-                '''
+                ''',
+                ctx.guild.id
             )
 
             if not top_users:
@@ -271,8 +273,9 @@ class Leveling(commands.Cog):
                 color=discord.Color.gold()
             )
 
+            members = await get_members(ctx.guild, [user['user_id'] for user in top_users])
             for idx, user in enumerate(top_users, 1):
-                member = ctx.guild.get_member(user['user_id'])
+                member = members.get(user['user_id'])
                 if member:
                     name = member.display_name
                     embed.add_field(
@@ -295,19 +298,16 @@ class Leveling(commands.Cog):
             return
 
         print(f"Admin {ctx.author.name} giving {amount} XP to {member.name}")
-        new_level = await self.add_xp(member.id, amount)
+        new_level = await self.add_xp(member, amount)
 
         async with self.db.acquire() as conn:
-            user_data = await conn.fetchrow(
-                'SELECT xp, level FROM levels WHERE user_id = $1',
-                member.id
-            )
+            user_data = await queries.fetchrow(conn, 'levels.get', member.guild.id, member.id)
 
             if user_data:
                 await ctx.send(f"✅ Gave {amount} XP to {member.mention}. They now have {user_data['xp']} XP (Level {user_data['level']}).")
 
                 if new_level:
-                    level_up_channel = self.bot.get_channel(self.level_up_channel_id)
+                    level_up_channel = ctx.guild.get_channel(self.settings.get(ctx.guild.id)['level_up_channel_id'])
                     if level_up_channel:
                         await self.handle_role_rewards(member, new_level, level_up_channel)
             else:
@@ -328,33 +328,23 @@ class Leveling(commands.Cog):
 
         try:
             async with self.db.acquire() as conn:
-                user_data = await conn.fetchrow(
-                    'SELECT xp, level FROM levels WHERE user_id = $1',
-                    member.id
-                )
+                # One atomic update, so XP earned meanwhile isn't overwritten
+                user_data = await queries.fetchrow(conn, 'levels.remove_xp', ctx.guild.id, member.id, amount)
 
                 if not user_data:
                     await ctx.send(f"❌ {member.mention} doesn't have any XP yet.")
                     return
 
-                new_xp = max(0, user_data['xp'] - amount)
-
-                await conn.execute(
-                    'UPDATE levels SET xp = $1 WHERE user_id = $2',
-                    new_xp, member.id
-                )
+                new_xp = user_data['xp']
 
                 new_level = 1
                 while new_xp >= self.calculate_xp(new_level):
                     new_level += 1
 
                 if new_level != user_data['level']:
-                    await conn.execute(
-                        'UPDATE levels SET level = $1 WHERE user_id = $2',
-                        new_level, member.id
-                    )
+                    await queries.execute(conn, 'levels.set_level', ctx.guild.id, member.id, new_level)
 
-                    level_up_channel = self.bot.get_channel(self.level_up_channel_id)
+                    level_up_channel = ctx.guild.get_channel(self.settings.get(ctx.guild.id)['level_up_channel_id'])
                     if level_up_channel:
                         await self.handle_role_rewards(member, new_level, level_up_channel)
 
@@ -0,0 +1,135 @@
+import discord
+import asyncio
+from collections import deque
+import config
+
+# Discord accepts at most 10 embeds and 6000 embed characters per message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+class LogQueue:
+    """Buffers log embeds per channel and ships them in batches"""
+
+    def __init__(self, bot, flush_interval: float = None, max_pending: int = None):
+        self.bot = bot
+        self.flush_interval = flush_interval or config.LOG_FLUSH_INTERVAL
+        self.max_pending = max_pending or config.LOG_QUEUE_MAX_PENDING
+        self.queues = {}  # channel_id -> deque of embeds waiting to be sent
+        self.counters = {}  # channel_id -> delivery counters
+        self.wakeup = asyncio.Event()
+        self.task = None
+
+    def start(self):
+        """Start the flush task if it isn't running"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        """Stop the flush task and ship whatever is still queued"""
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self.flush()
+
+    def channel_counters(self, channel_id: int) -> dict:
+        """Get the counters for a channel, creating them if needed"""
+        if channel_id not in self.counters:
+            self.counters[channel_id] = {"queued": 0, "sent": 0, "messages": 0, "overflow": 0, "dropped": 0}
+        return self.counters[channel_id]
+
+    def enqueue(self, channel_id: int, embed: discord.Embed) -> bool:
+        """Queue an embed for a log channel, returning False if an older entry had to be dropped"""
+        if channel_id is None:
+            # The guild has no log channel configured
+            return False
+
+        queue = self.queues.setdefault(channel_id, deque())
+        counters = self.channel_counters(channel_id)
+        accepted = True
+
+        # Backpressure: a full channel queue sheds its oldest entry
+        if len(queue) >= self.max_pending:
+            queue.popleft()
+            counters["overflow"] += 1
+            accepted = False
+
+        queue.append(embed)
+        counters["queued"] += 1
+        self.wakeup.set()
+        return accepted
+
+    def pending(self) -> int:
+        """Count embeds waiting to be sent across all channels"""
+        return sum(len(queue) for queue in self.queues.values())
+
+    async def run(self):
+        """Flush queued embeds once per flush interval while there is work"""
+        while True:
+            await self.wakeup.wait()
+            # Let a burst of events accumulate so they share messages
+            await asyncio.sleep(self.flush_interval)
+            self.wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error flushing log queue: {e}")
+
+    async def flush(self):
+        """Send every queued embed, batching per channel"""
+        channel_ids = [channel_id for channel_id, queue in self.queues.items() if queue]
+        if channel_ids:
+            await asyncio.gather(*(self.flush_channel(channel_id) for channel_id in channel_ids))
+
+    def next_batch(self, queue: deque) -> list:
+        """Take as many embeds as fit in one message"""
+        batch = []
+        size = 0
+        while queue and len(batch) < MAX_EMBEDS_PER_MESSAGE:
+            embed_size = len(queue[0])
+            if batch and size + embed_size > MAX_EMBED_CHARS_PER_MESSAGE:
+                break
+            batch.append(queue.popleft())
+            size += embed_size
+        return batch
+
+    async def flush_channel(self, channel_id: int):
+        """Send one channel's queued embeds, up to 10 per message"""
+        queue = self.queues[channel_id]
+        counters = self.channel_counters(channel_id)
+        channel = self.bot.get_channel(channel_id)
+
+        if not channel:
+            counters["dropped"] += len(queue)
+            queue.clear()
+            print(f"Dropped log embeds for missing channel {channel_id}")
+            return
+
+        while queue:
+            batch = self.next_batch(queue)
+            try:
+                await channel.send(embeds=batch)
+                counters["sent"] += len(batch)
+                counters["messages"] += 1
+            except Exception as e:
+                counters["dropped"] += len(batch)
+                print(f"Error sending log embeds to {channel_id}: {e}")
+
+    def stats(self) -> dict:
+        """Snapshot of per-channel queue depth and counters"""
+        return {
+            channel_id: dict(counters, pending=len(self.queues.get(channel_id, ())))
+            for channel_id, counters in self.counters.items()
+        }
+
+def get_log_queue(bot) -> LogQueue:
+    """Get the bot's shared log queue, creating and starting it on first use"""
+    log_queue = getattr(bot, 'log_queue', None)
+    if log_queue is None:
+        log_queue = LogQueue(bot)
+        bot.log_queue = log_queue
+    log_queue.start()
+    return log_queue
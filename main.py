@@ -3,7 +3,19 @@ from discord.ext import commands
 import asyncio
 import config
 import os
+import re
+import signal
+import time
 import traceback
+from discord.backoff import ExponentialBackoff
+from utils.startup import get_startup_profiler, command_tree_hash, load_tree_hash, save_tree_hash
+from utils.database import close_db_pool
+from utils.guild_settings import get_guild_settings, SETTING_KEYS
+from utils.helpers import flush_state_writes
+from utils.bot_logging import setup_logging, stop_logging
+from utils.metrics import InstrumentedBot, MetricsServer, resident_memory_bytes
+
+setup_logging()
 
 # Initialize bot with intents and remove default help command
 intents = discord.Intents.default()
@@ -12,16 +24,49 @@ intents.members = True
 intents.reactions = True
 intents.guilds = True
 
-bot = commands.Bot(command_prefix='!', intents=intents, help_command=None)
+cache_profile = config.CACHE_PROFILES[config.CACHE_PROFILE]
+if cache_profile['members'] == 'all':
+    member_cache_flags = discord.MemberCacheFlags.all()
+elif cache_profile['members'] == 'joined':
+    member_cache_flags = discord.MemberCacheFlags.none()
+    member_cache_flags.joined = True
+else:
+    member_cache_flags = discord.MemberCacheFlags.none()
+
+bot = InstrumentedBot(
+    command_prefix='!',
+    intents=intents,
+    help_command=None,
+    shard_count=config.SHARD_COUNT,
+    shard_ids=config.SHARD_IDS,
+    member_cache_flags=member_cache_flags,
+    max_messages=cache_profile['max_messages'],
+    chunk_guilds_at_startup=cache_profile['chunk_guilds_at_startup']
+)
+metrics_server = MetricsServer()
+startup_profiler = get_startup_profiler(bot)
+startup_complete = False
+synced_tree_hash = load_tree_hash()
 
 @bot.event
 async def on_ready():
-    print(f'Bot is ready! Logged in as {bot.user.name}')
+    global startup_complete
+    if startup_complete:
+        # on_ready fires again after reconnects; the diagnostics only matter once
+        print(f'Reconnected as {bot.user.name}')
+        await sync_command_tree()
+        return
+    startup_complete = True
+
+    print(f'Bot is ready! Logged in as {bot.user.name} ({startup_profiler.elapsed():.2f}s after launch)')
+    print(f'Running shards {sorted(bot.shards)} of {bot.shard_count}')
+    print(f'Cache profile: {config.CACHE_PROFILE}')
     print('------')
     # Check bot permissions
     for guild in bot.guilds:
         print(f"Connected to guild: {guild.name}")
-        channel = guild.get_channel(config.VERIFICATION_CHANNEL_ID)
+        channel_id = get_guild_settings(bot).get(guild.id)['verification_channel_id']
+        channel = guild.get_channel(channel_id) if channel_id else None
         if channel:
             permissions = channel.permissions_for(guild.me)
             print(f"Bot permissions in verification channel {channel.name}:")
@@ -30,15 +75,97 @@ async def on_ready():
             print(f"Add Reactions: {permissions.add_reactions}")
             print(f"Manage Messages: {permissions.manage_messages}")
         else:
-            print(f"Could not find verification channel {config.VERIFICATION_CHANNEL_ID}")
+            print(f"Could not find verification channel {channel_id}")
 
     # Sync application commands after bot is ready
+    await sync_command_tree()
+    startup_profiler.report()
+
+async def sync_command_tree(force: bool = False) -> bool:
+    """Sync application commands only if they changed since the last sync"""
+    global synced_tree_hash
+    # The command tree is global, so only the process running shard 0 syncs it
+    if 0 not in bot.shards and not force:
+        return False
+
+    tree_hash = command_tree_hash(bot.tree)
+    if tree_hash == synced_tree_hash and not force:
+        print("Command tree unchanged, skipping sync")
+        return False
+
     try:
         print("\nSyncing command tree...")
         await bot.tree.sync()
+        synced_tree_hash = tree_hash
+        save_tree_hash(tree_hash)
         print("Command tree synced!")
+        return True
     except Exception as e:
         print(f"Error syncing command tree: {e}")
+        return False
+
+@bot.command(name='synccommands')
+@commands.has_permissions(administrator=True)
+async def force_sync_commands(ctx):
+    """Sync application commands even if they look unchanged"""
+    if await sync_command_tree(force=True):
+        await ctx.send("✅ Command tree synced.")
+    else:
+        await ctx.send("❌ Failed to sync the command tree. Check the logs for details.")
+
+@bot.command(name='setting')
+@commands.guild_only()
+@commands.has_permissions(administrator=True)
+async def guild_setting(ctx, key: str = None, *, value: str = None):
+    """Show or change this server's channel and role settings"""
+    settings = get_guild_settings(bot)
+    if key is None:
+        current = settings.get(ctx.guild.id)
+        lines = [f"`{name}`: {current[name] or 'not set'}" for name in SETTING_KEYS]
+        await ctx.send("\n".join(lines))
+        return
+
+    if key not in SETTING_KEYS:
+        await ctx.send(f"❌ Unknown setting `{key}`. Use `!setting` to list them.")
+        return
+
+    if value is None:
+        await ctx.send(f"`{key}`: {settings.get(ctx.guild.id)[key] or 'not set'}")
+        return
+
+    # Accept a raw ID or a mention of the right kind; "none" clears the setting
+    if value.lower() == 'none':
+        new_value = None
+    else:
+        kind = 'role' if key.endswith('_role_id') else 'channel'
+        mention = r'<@&(\d+)>' if kind == 'role' else r'<#(\d+)>'
+        match = re.fullmatch(mention + r'|(\d+)', value.strip())
+        if not match:
+            await ctx.send(f"❌ Give a {kind} ID, a {kind} mention, or `none`.")
+            return
+        new_value = int(match.group(1) or match.group(2))
+
+        target = ctx.guild.get_role(new_value) if kind == 'role' else ctx.guild.get_channel(new_value)
+        if target is None:
+            await ctx.send(f"❌ There is no {kind} with ID {new_value} in this server.")
+            return
+
+    await settings.set(ctx.guild.id, key, new_value)
+    await ctx.send(f"✅ `{key}` set to {new_value or 'not set'}.")
+
+@bot.command(name='cachestats')
+@commands.has_permissions(administrator=True)
+async def cache_stats(ctx):
+    """Show how much this process holds in discord.py's caches and its memory use"""
+    sizes = bot.cache_sizes()
+    total_members = sum(guild.member_count or 0 for guild in bot.guilds)
+    lines = [
+        f"**Cache profile:** `{config.CACHE_PROFILE}`",
+        f"**RSS:** {resident_memory_bytes() / 1024 / 1024:.1f} MiB",
+        f"**Members cached:** {sizes.pop('members'):,} of {total_members:,}",
+    ]
+    lines += [f"**{cache.capitalize()}:** {count:,}" for cache, count in sizes.items()]
+    await ctx.send("\n".join(lines))
 
 @bot.event
 async def on_disconnect():
@@ -64,54 +191,35 @@ async def load_cogs():
         except Exception as e:
             print(f'Error unloading {extension}: {e}')
 
-    # Now load all cogs from the handlers directory
-    loaded_cogs = []
-    for filename in os.listdir('./handlers'):
-        if filename.endswith('.py'):
-            cog_name = f'handlers.{filename[:-3]}'
-            try:
-                print(f'Loading {filename}...')
-                await bot.load_extension(cog_name)
-                loaded_cogs.append(cog_name)
-                print(f'Successfully loaded {filename}')
-            except Exception as e:
-                print(f'Failed to load {filename}')
-                print(f'Error type: {type(e).__name__}')
-                print(f'Error message: {str(e)}')
-                traceback.print_exc()
+    # Now load all cogs from the handlers directory. Cogs don't depend on each
+    # other while loading, so they load concurrently.
+    cog_names = [
+        f'handlers.{filename[:-3]}'
+        for filename in sorted(os.listdir('./handlers'))
+        if filename.endswith('.py')
+    ]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(load_cog(cog_name) for cog_name in cog_names))
+    loaded_cogs = [cog_name for cog_name, loaded in zip(cog_names, results) if loaded]
+    print(f"Loaded cogs in {(time.perf_counter() - start) * 1000:.0f}ms")
 
     print(f"\nSuccessfully loaded {len(loaded_cogs)} cogs:")
     for cog in loaded_cogs:
         print(f"- {cog}")
 
-async def main():
-    """Main function to start the bot"""
+async def load_cog(cog_name: str) -> bool:
+    """Load one cog, recording how long its import and setup took"""
     try:
-        print("Starting bot...")
-        async with bot:
-            await load_cogs()
-            print("\nConnecting to Discord...")
-            await bot.start(config.TOKEN)
+        print(f'Loading {cog_name}...')
+        await startup_profiler.track(cog_name, 'load', bot.load_extension(cog_name))
+        print(f'Successfully loaded {cog_name}')
+        return True
     except Exception as e:
-        print(f"Critical error in main function:")
-        print(f"Error type: {type(e).__name__}")
-        print(f"Error message: {str(e)}")
+        print(f'Failed to load {cog_name}')
+        print(f'Error type: {type(e).__name__}')
+        print(f'Error message: {str(e)}')
         traceback.print_exc()
-
-if __name__ == "__main__":
-    while True:
-        try:
-            asyncio.run(main())
-        except KeyboardInterrupt:
-            print("\nBot shutdown requested by user")
-            break
-        except Exception as e:
-            print(f"\nBot crashed with error: {type(e).__name__}")
-            print(f"Error message: {str(e)}")
-            traceback.print_exc()
-            print("\nRestarting bot in 5 seconds...")
-            import time
-            time.sleep(5)
+        return False
 
 @bot.event
 async def on_command(ctx):
@@ -125,7 +233,114 @@ async def on_command_error(ctx, error):
     if isinstance(error, commands.errors.CommandNotFound):
         # Don't respond to unknown commands
         return
-    elif isinstance(error, commands.errors.MissingPermissions):
+    if (ctx.command and ctx.command.has_error_handler()) or (ctx.cog and ctx.cog.has_error_handler()):
+        # The command or its cog already replied
+        return
+
+    if isinstance(error, commands.errors.MissingPermissions):
         await ctx.send("❌ You don't have permission to use this command.")
+    elif isinstance(error, commands.errors.NoPrivateMessage):
+        await ctx.send("❌ This command can only be used in a server.")
+    elif isinstance(error, commands.errors.CheckFailure):
+        await ctx.send("❌ You can't use this command here.")
+    elif isinstance(error, commands.errors.CommandOnCooldown):
+        await ctx.send(f"⏳ This command is on cooldown. Try again in {error.retry_after:.0f} seconds.")
+    elif isinstance(error, commands.errors.UserInputError):
+        await ctx.send(f"❌ {error} See `!commands` for how to use it.")
     else:
-        await ctx.send("❌ An error occurred. Please try again later.")
\ No newline at end of file
+        await ctx.send("❌ An error occurred. Please try again later.")
+
+async def drain_write_buffers():
+    """Flush everything that is buffered for a later write"""
+    log_queue = getattr(bot, 'log_queue', None)
+    if log_queue:
+        await log_queue.stop()
+
+    role_queue = getattr(bot, 'role_queue', None)
+    if role_queue:
+        await role_queue.flush()
+
+    message_queue = getattr(bot, 'message_queue', None)
+    if message_queue:
+        await message_queue.stop()
+
+    try:
+        await flush_state_writes()
+    except Exception as e:
+        print(f"Error flushing verification state: {e}")
+
+    for store in (getattr(bot, 'dm_router', None), getattr(bot, 'confirmations', None)):
+        if store:
+            store.flush()
+
+async def shutdown():
+    """Drain write-behind buffers while still connected, then disconnect"""
+    print("\nShutting down...")
+    await drain_write_buffers()
+    await bot.close()
+
+async def run_supervised():
+    """Keep the gateway connected, backing off between failed attempts
+
+    Reconnects reuse this process, so cogs, pools and caches stay warm.
+    """
+    backoff = ExponentialBackoff()
+    while not bot.is_closed():
+        try:
+            if not bot.user:
+                await bot.login(config.TOKEN)
+            print("\nConnecting to Discord...")
+            await bot.connect(reconnect=True)
+        except (discord.LoginFailure, discord.PrivilegedIntentsRequired):
+            # Retrying can't fix a bad token or missing intents
+            raise
+        except Exception as e:
+            if bot.is_closed():
+                break
+            delay = backoff.delay()
+            print(f"Gateway connection failed: {type(e).__name__}: {e}")
+            print(f"Reconnecting in {delay:.1f} seconds...")
+            await asyncio.sleep(delay)
+
+async def main():
+    """Main function to start the bot"""
+    try:
+        print("Starting bot...")
+        async with bot:
+            await load_cogs()
+            if config.METRICS_ENABLED:
+                try:
+                    await metrics_server.start()
+                except OSError as e:
+                    print(f"Could not start metrics server: {e}")
+
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.add_signal_handler(sig, lambda: loop.create_task(shutdown()))
+                except NotImplementedError:
+                    pass  # Signal handlers aren't available on Windows
+
+            try:
+                await run_supervised()
+            finally:
+                await drain_write_buffers()
+                leader = getattr(bot, 'leader', None)
+                if leader:
+                    # Release the lock now so another process takes over without waiting
+                    await leader.stop()
+                await close_db_pool(bot)
+                await metrics_server.stop()
+    except Exception as e:
+        print(f"Critical error in main function:")
+        print(f"Error type: {type(e).__name__}")
+        print(f"Error message: {str(e)}")
+        traceback.print_exc()
+    finally:
+        stop_logging()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nBot shutdown requested by user")
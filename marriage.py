@@ -1,29 +1,44 @@
 import discord
 from discord.ext import commands
-import asyncio
 import config
-import os
-import asyncpg
+from utils.confirmations import ConfirmationKind, get_confirmations
+from utils.database import get_db_pool, lock_keys
+from utils.guild_settings import get_guild_settings
+from utils.helpers import get_or_fetch_member
+from utils import queries
+from utils.startup import track_startup
+
+MARRIAGE_KINDS = ['marriage_proposal', 'marriage_confirm']
 
 class Marriage(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.pending_proposals = {}
         self.db = None
-        self.bot.loop.create_task(self.init_db())
+        self.bot.loop.create_task(track_startup(self.bot, __name__, self.init_db()))
+        self.confirmations = get_confirmations(bot)
+        self.confirmations.register_kind(ConfirmationKind(
+            'marriage_proposal', self.proposal_answered, self.proposal_timed_out
+        ))
+        self.confirmations.register_kind(ConfirmationKind(
+            'marriage_confirm', self.proposal_confirmed, self.confirmation_timed_out
+        ))
+        self.confirmations.register_kind(ConfirmationKind(
+            'divorce', self.divorce_answered, self.divorce_timed_out
+        ))
         print("Marriage cog initialized")
 
     async def init_db(self):
         """Initialize database connection"""
         try:
-            self.db = await asyncpg.create_pool(os.environ['DATABASE_URL'])
+            self.db = await get_db_pool(self.bot)
             print("Marriage database connection initialized")
         except Exception as e:
             print(f"Error initializing marriage database: {e}")
 
     async def check_age_role(self, member: discord.Member) -> bool:
         """Check if member has the 18+ role"""
-        return any(role.id == config.ADULT_ROLE_ID for role in member.roles)
+        adult_role_id = get_guild_settings(self.bot).get(member.guild.id)['adult_role_id']
+        return any(role.id == adult_role_id for role in member.roles)
 
     async def get_spouse(self, user_id: int) -> int:
         """Get user's spouse ID if married"""
@@ -31,15 +46,7 @@ class Marriage(commands.Cog):
             return None
 
         try:
-            spouse = await self.db.fetchrow("""
-                SELECT 
-                    CASE 
-                        WHEN user1_id = $1 THEN user2_id 
-                        WHEN user2_id = $1 THEN user1_id 
-                    END as spouse_id
-                FROM marriages 
-                WHERE user1_id = $1 OR user2_id = $1
-            """, user_id)
+            spouse = await queries.fetchrow(self.db, 'marriage.spouse', user_id)
             return spouse['spouse_id'] if spouse else None
         except Exception as e:
             print(f"Error getting spouse: {e}")
@@ -72,81 +79,99 @@ class Marriage(commands.Cog):
             await ctx.send("💔 That person is already married!")
             return
 
-        if ctx.author.id in self.pending_proposals:
+        if self.confirmations.is_pending(ctx.author.id, MARRIAGE_KINDS):
             await ctx.send("💝 You already have a pending proposal!")
             return
 
-        if target.id in self.pending_proposals:
+        if self.confirmations.is_pending(target.id, MARRIAGE_KINDS):
             await ctx.send("💔 That person already has a pending proposal!")
             return
 
-        # Store the proposal
-        self.pending_proposals[ctx.author.id] = target.id
-
-        # Send proposal message
-        proposal = await ctx.send(
+        await self.confirmations.request(
+            ctx.channel,
             f"💍 {target.mention}, {ctx.author.mention} has proposed to you!\n"
-            f"React with ✅ to accept or ❌ to decline within 60 seconds!"
+            f"React with ✅ to accept or ❌ to decline within 60 seconds!",
+            kind='marriage_proposal',
+            responder_id=target.id,
+            timeout=60,
+            participants=[ctx.author.id, target.id],
+            context={"proposer_id": ctx.author.id, "target_id": target.id}
         )
-        await proposal.add_reaction("✅")
-        await proposal.add_reaction("❌")
-
-        def check_target(reaction, user):
-            return (
-                user.id == target.id 
-                and str(reaction.emoji) in ["✅", "❌"]
-                and reaction.message.id == proposal.id
-            )
+
+    async def proposal_answered(self, decision: dict, accepted: bool):
+        """Ask the proposer to confirm once the target answers"""
+        channel = self.bot.get_channel(decision["channel_id"])
+        if not channel:
+            return
+        proposer_id = decision["context"]["proposer_id"]
+        target_id = decision["context"]["target_id"]
+
+        if not accepted:
+            await channel.send(f"💔 <@{target_id}> has declined the proposal...")
+            return
+
+        # Target accepted, now ask proposer to confirm
+        await self.confirmations.request(
+            channel,
+            f"💕 <@{target_id}> has accepted! <@{proposer_id}>, do you still want to proceed?\n"
+            f"React with ✅ to confirm or ❌ to cancel within 30 seconds!",
+            kind='marriage_confirm',
+            responder_id=proposer_id,
+            timeout=30,
+            participants=decision["participants"],
+            context=decision["context"]
+        )
+
+    async def proposal_confirmed(self, decision: dict, accepted: bool):
+        """Record the marriage once both parties have agreed"""
+        channel = self.bot.get_channel(decision["channel_id"])
+        if not channel:
+            return
+        proposer_id = decision["context"]["proposer_id"]
+        target_id = decision["context"]["target_id"]
+
+        if not accepted:
+            await channel.send(f"💔 <@{proposer_id}> has cancelled the marriage...")
+            return
 
         try:
-            # Wait for target's response
-            reaction, user = await self.bot.wait_for("reaction_add", timeout=60.0, check=check_target)
-
-            if str(reaction.emoji) == "✅":
-                # Target accepted, now ask proposer to confirm
-                confirm = await ctx.send(
-                    f"💕 {target.mention} has accepted! {ctx.author.mention}, do you still want to proceed?\n"
-                    f"React with ✅ to confirm or ❌ to cancel within 30 seconds!"
-                )
-                await confirm.add_reaction("✅")
-                await confirm.add_reaction("❌")
-
-                def check_proposer(reaction, user):
-                    return (
-                        user.id == ctx.author.id
-                        and str(reaction.emoji) in ["✅", "❌"]
-                        and reaction.message.id == confirm.id
+            async with self.db.acquire() as conn:
+                async with conn.transaction():
+                    # Either of them may have married someone else while this was
+                    # pending, possibly through another shard; check under the lock
+                    await lock_keys(conn, f"marriage:{proposer_id}", f"marriage:{target_id}")
+                    already_married = (
+                        await queries.fetchrow(conn, 'marriage.spouse', proposer_id)
+                        or await queries.fetchrow(conn, 'marriage.spouse', target_id)
                     )
+                    if not already_married:
+                        await conn.execute(
+                            "INSERT INTO marriages (user1_id, user2_id) VALUES ($1, $2)",
+                            proposer_id, target_id
+                        )
+
+            if already_married:
+                await channel.send("💔 One of you is already married!")
+                return
+
+            await channel.send(
+                f"🎊 Congratulations! <@{proposer_id}> and <@{target_id}> are now married! 💕"
+            )
+        except Exception as e:
+            print(f"Error recording marriage: {e}")
+            await channel.send("❌ There was an error recording your marriage. Please try again.")
 
-                try:
-                    # Wait for proposer's confirmation
-                    reaction, user = await self.bot.wait_for("reaction_add", timeout=30.0, check=check_proposer)
-
-                    if str(reaction.emoji) == "✅":
-                        # Both parties have agreed, record the marriage
-                        try:
-                            await self.db.execute(
-                                "INSERT INTO marriages (user1_id, user2_id) VALUES ($1, $2)",
-                                ctx.author.id, target.id
-                            )
-                            await ctx.send(
-                                f"🎊 Congratulations! {ctx.author.mention} and {target.mention} are now married! 💕"
-                            )
-                        except Exception as e:
-                            print(f"Error recording marriage: {e}")
-                            await ctx.send("❌ There was an error recording your marriage. Please try again.")
-                    else:
-                        await ctx.send(f"💔 {ctx.author.mention} has cancelled the marriage...")
-                except asyncio.TimeoutError:
-                    await ctx.send("💔 Marriage confirmation timed out...")
-            else:
-                await ctx.send(f"💔 {target.mention} has declined the proposal...")
-        except asyncio.TimeoutError:
-            await ctx.send(f"💔 The proposal has timed out...")
-        finally:
-            # Clean up the pending proposal
-            if ctx.author.id in self.pending_proposals:
-                del self.pending_proposals[ctx.author.id]
+    async def proposal_timed_out(self, decision: dict):
+        """Announce an unanswered proposal"""
+        channel = self.bot.get_channel(decision["channel_id"])
+        if channel:
+            await channel.send("💔 The proposal has timed out...")
+
+    async def confirmation_timed_out(self, decision: dict):
+        """Announce an unconfirmed proposal"""
+        channel = self.bot.get_channel(decision["channel_id"])
+        if channel:
+            await channel.send("💔 Marriage confirmation timed out...")
 
     @commands.command()
     async def divorce(self, ctx):
@@ -160,42 +185,55 @@ class Marriage(commands.Cog):
             await ctx.send("❌ You aren't currently married!")
             return
 
+        if self.confirmations.is_pending(ctx.author.id, ['divorce']):
+            await ctx.send("💔 You already have a pending divorce request!")
+            return
+
         try:
             # Send divorce confirmation with reactions
-            spouse = ctx.guild.get_member(spouse_id)
+            spouse = await get_or_fetch_member(ctx.guild, spouse_id)
             spouse_mention = spouse.mention if spouse else "your spouse"
 
-            confirm = await ctx.send(
+            await self.confirmations.request(
+                ctx.channel,
                 f"💔 Are you sure you want to divorce {spouse_mention}?\n"
-                f"React with ✅ to confirm or ❌ to cancel."
+                f"React with ✅ to confirm or ❌ to cancel.",
+                kind='divorce',
+                responder_id=ctx.author.id,
+                timeout=60
             )
-            await confirm.add_reaction("✅")
-            await confirm.add_reaction("❌")
-
-            def check(reaction, user):
-                return (
-                    user.id == ctx.author.id
-                    and str(reaction.emoji) in ["✅", "❌"]
-                    and reaction.message.id == confirm.id
-                )
-
-            try:
-                reaction, user = await self.bot.wait_for("reaction_add", timeout=60.0, check=check)
-                if str(reaction.emoji) == "✅":
-                    await self.db.execute(
-                        "DELETE FROM marriages WHERE user1_id = $1 OR user2_id = $1",
-                        ctx.author.id
-                    )
-                    await ctx.send(f"💔 {ctx.author.mention} is now divorced.")
-                else:
-                    await ctx.send("💕 Divorce cancelled. Love wins!")
-            except asyncio.TimeoutError:
-                await ctx.send("❌ Divorce request timed out.")
 
         except Exception as e:
             print(f"Error processing divorce: {e}")
             await ctx.send("❌ There was an error processing your divorce. Please try again.")
 
+    async def divorce_answered(self, decision: dict, accepted: bool):
+        """Carry out or cancel a confirmed divorce"""
+        channel = self.bot.get_channel(decision["channel_id"])
+        if not channel:
+            return
+        user_id = decision["responder_id"]
+
+        if not accepted:
+            await channel.send("💕 Divorce cancelled. Love wins!")
+            return
+
+        try:
+            await self.db.execute(
+                "DELETE FROM marriages WHERE user1_id = $1 OR user2_id = $1",
+                user_id
+            )
+            await channel.send(f"💔 <@{user_id}> is now divorced.")
+        except Exception as e:
+            print(f"Error processing divorce: {e}")
+            await channel.send("❌ There was an error processing your divorce. Please try again.")
+
+    async def divorce_timed_out(self, decision: dict):
+        """Announce an unanswered divorce request"""
+        channel = self.bot.get_channel(decision["channel_id"])
+        if channel:
+            await channel.send("❌ Divorce request timed out.")
+
     @commands.command()
     async def marriage(self, ctx, member: discord.Member = None):
         """Check marriage status of yourself or another user"""
@@ -203,7 +241,7 @@ class Marriage(commands.Cog):
 
         spouse_id = await self.get_spouse(target.id)
         if spouse_id:
-            spouse = ctx.guild.get_member(spouse_id)
+            spouse = await get_or_fetch_member(ctx.guild, spouse_id)
             spouse_name = spouse.name if spouse else "Unknown User"
             await ctx.send(f"💑 {target.name} is married to {spouse_name} 💕")
         else:
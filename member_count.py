@@ -1,30 +1,87 @@
 import discord
 from discord.ext import commands
 import config
-from datetime import datetime
+from utils.helpers import check_mod_permissions, get_or_fetch_member
+from utils.log_queue import get_log_queue
+from utils.guild_settings import get_guild_settings
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta
+
+# Account age buckets used to group raid joins, youngest first
+ACCOUNT_AGE_BUCKETS = [
+    (timedelta(days=1), "Under 1 day"),
+    (timedelta(days=7), "1-7 days"),
+    (timedelta(days=30), "7-30 days"),
+    (None, "Over 30 days")
+]
 
 class MemberCount(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.pending_counts = {}  # guild_id -> latest member count waiting to be shown
+        self.last_rename = {}  # guild_id -> loop time of the last rename attempt
+        self.count_changed = asyncio.Event()
+        self.rename_task = self.bot.loop.create_task(self.rename_worker())
+        self.recent_joins = {}  # guild_id -> deque of (join time, member_id, account created_at)
+        self.raids = {}  # guild_id -> active raid state
+        self.settings = get_guild_settings(bot)
 
-    async def update_member_count(self, guild: discord.Guild):
-        """Update the member count channel name"""
-        channel = guild.get_channel(config.MEMBER_COUNT_CHANNEL_ID)
-        if channel:
-            try:
-                await channel.edit(name=f"Member Count: {guild.member_count}")
-                print(f"Updated member count to {guild.member_count}")
-            except discord.Forbidden:
-                print("Bot lacks permission to edit channel name")
-            except Exception as e:
-                print(f"Error updating member count: {str(e)}")
+    def queue_member_count_update(self, guild: discord.Guild):
+        """Record the latest member count for the rename worker to apply"""
+        self.pending_counts[guild.id] = guild.member_count
+        self.count_changed.set()
 
-    async def send_log_embed(self, member: discord.Member, event_type: str):
-        """Send join/leave log embed"""
-        log_channel = self.bot.get_channel(994238679910449267)  # Specified log channel
-        if not log_channel:
-            return
+    async def rename_worker(self):
+        """Apply queued member counts, renaming each channel at most once per rate window"""
+        await self.bot.wait_until_ready()
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.count_changed.wait()
+            self.count_changed.clear()
+
+            retry_in = None
+            for guild_id in list(self.pending_counts):
+                last_rename = self.last_rename.get(guild_id)
+                if last_rename is not None:
+                    remaining = last_rename + config.MEMBER_COUNT_RENAME_INTERVAL - loop.time()
+                    if remaining > 0:
+                        # Keep only the newest count; it is applied once the window opens
+                        retry_in = remaining if retry_in is None else min(retry_in, remaining)
+                        continue
+
+                count = self.pending_counts.pop(guild_id)
+                guild = self.bot.get_guild(guild_id)
+                if guild and await self.update_member_count(guild, count):
+                    self.last_rename[guild_id] = loop.time()
+
+            if retry_in is not None:
+                await asyncio.sleep(retry_in)
+                self.count_changed.set()
+
+    async def update_member_count(self, guild: discord.Guild, count: int = None) -> bool:
+        """Update the member count channel name, returning True if a rename was attempted"""
+        count = guild.member_count if count is None else count
+        channel_id = self.settings.get(guild.id)['member_count_channel_id']
+        channel = guild.get_channel(channel_id) if channel_id else None
+        if not channel:
+            return False
 
+        new_name = f"Member Count: {count}"
+        if channel.name == new_name:
+            return False
+
+        try:
+            await channel.edit(name=new_name)
+            print(f"Updated member count to {count}")
+        except discord.Forbidden:
+            print("Bot lacks permission to edit channel name")
+        except Exception as e:
+            print(f"Error updating member count: {str(e)}")
+        return True
+
+    def send_log_embed(self, member: discord.Member, event_type: str):
+        """Queue a join/leave log embed"""
         # Create embed with different colors for join/leave
         embed = discord.Embed(
             title=f"Member {event_type}",
@@ -46,31 +103,271 @@ class MemberCount(commands.Cog):
         if member.avatar:
             embed.set_thumbnail(url=member.avatar.url)
 
+        get_log_queue(self.bot).enqueue(self.settings.get(member.guild.id)['member_log_channel_id'], embed)
+
+    def record_join(self, member: discord.Member) -> bool:
+        """Track the join rate and return True if the guild is in raid mode"""
+        now = asyncio.get_running_loop().time()
+        joins = self.recent_joins.setdefault(member.guild.id, deque())
+        joins.append((now, member.id, member.created_at))
+        while joins and now - joins[0][0] > config.RAID_JOIN_WINDOW:
+            joins.popleft()
+
+        raid = self.raids.get(member.guild.id)
+        if raid is None and len(joins) >= config.RAID_JOIN_THRESHOLD:
+            raid = self.start_raid_mode(member.guild)
+            # The joins that tripped the threshold were the raid's first wave
+            for _, member_id, created_at in joins:
+                raid["members"][member_id] = created_at
+
+        if raid is None:
+            return False
+
+        raid["members"][member.id] = member.created_at
+        raid["last_join"] = now
+        raid["dirty"] = True
+        return True
+
+    def start_raid_mode(self, guild: discord.Guild, manual: bool = False) -> dict:
+        """Switch a guild into raid mode and start its alert task"""
+        print(f"Raid mode enabled for {guild.name}")
+        raid = {
+            "guild_id": guild.id,
+            "started": discord.utils.utcnow(),
+            "last_join": asyncio.get_running_loop().time(),
+            "manual": manual,
+            "members": {},  # member_id -> account created_at
+            "leaves": 0,
+            "dirty": True,
+            "alert_message": None
+        }
+        raid["task"] = self.bot.loop.create_task(self.raid_monitor(guild.id, raid))
+        self.raids[guild.id] = raid
+        return raid
+
+    def end_raid_mode(self, guild_id: int):
+        """Leave raid mode and catch the member count up"""
+        raid = self.raids.pop(guild_id, None)
+        if not raid:
+            return
+        raid["task"].cancel()
+        self.recent_joins.pop(guild_id, None)
+        guild = self.bot.get_guild(guild_id)
+        if guild:
+            self.queue_member_count_update(guild)
+            print(f"Raid mode ended for {guild.name}")
+
+    def is_raid_member(self, guild_id: int, member_id: int) -> bool:
+        """Check if a member joined during the guild's current raid"""
+        raid = self.raids.get(guild_id)
+        return bool(raid) and member_id in raid["members"]
+
+    def raid_targets(self, raid: dict, max_age_days: int) -> list:
+        """Get raid member IDs whose accounts are younger than max_age_days"""
+        cutoff = discord.utils.utcnow() - timedelta(days=max_age_days)
+        return [member_id for member_id, created_at in raid["members"].items() if created_at > cutoff]
+
+    def create_raid_embed(self, raid: dict, active: bool = True) -> discord.Embed:
+        """Summarize a raid with joins grouped by account age"""
+        now = discord.utils.utcnow()
+        buckets = {label: [] for _, label in ACCOUNT_AGE_BUCKETS}
+        for member_id, created_at in raid["members"].items():
+            age = now - created_at
+            for limit, label in ACCOUNT_AGE_BUCKETS:
+                if limit is None or age < limit:
+                    buckets[label].append(member_id)
+                    break
+
+        embed = discord.Embed(
+            title="🚨 Raid Mode Active" if active else "Raid Mode Ended",
+            description=f"**{len(raid['members'])}** accounts joined since "
+                        f"{discord.utils.format_dt(raid['started'], 'T')} "
+                        f"({raid['leaves']} left).\n"
+                        "Per-join renames and logs are paused.",
+            color=discord.Color.red() if active else discord.Color.green(),
+            timestamp=now
+        )
+        for label, member_ids in buckets.items():
+            if not member_ids:
+                continue
+            preview = " ".join(f"<@{member_id}>" for member_id in member_ids[:15])
+            if len(member_ids) > 15:
+                preview += f" … +{len(member_ids) - 15} more"
+            embed.add_field(name=f"{label} ({len(member_ids)})", value=preview, inline=False)
+
+        if active:
+            embed.set_footer(
+                text=f"!raid kick / !raid ban act on accounts under {config.RAID_NEW_ACCOUNT_DAYS} days • !raid end to resume"
+            )
+        return embed
+
+    async def raid_monitor(self, guild_id: int, raid: dict):
+        """Keep one raid alert up to date and end raid mode once joins calm down"""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                await asyncio.sleep(config.RAID_ALERT_INTERVAL)
+                if not raid["manual"] and loop.time() - raid["last_join"] >= config.RAID_MODE_COOLDOWN:
+                    await self.update_raid_alert(raid, active=False)
+                    self.end_raid_mode(guild_id)
+                    return
+                if raid["dirty"]:
+                    await self.update_raid_alert(raid)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"Error in raid monitor: {e}")
+
+    async def update_raid_alert(self, raid: dict, active: bool = True):
+        """Post the raid alert, or edit it in place once it exists"""
+        raid["dirty"] = False
+        embed = self.create_raid_embed(raid, active)
         try:
-            await log_channel.send(embed=embed)
+            if raid["alert_message"]:
+                await raid["alert_message"].edit(embed=embed)
+                return
+
+            settings = self.settings.get(raid["guild_id"])
+            channel = self.bot.get_channel(settings['raid_alert_channel_id'])
+            if channel:
+                raid["alert_message"] = await channel.send(content=f"<@&{settings['mod_role_id']}>", embed=embed)
         except Exception as e:
-            print(f"Error sending log embed: {str(e)}")
+            print(f"Error updating raid alert: {e}")
+
+    @commands.group(invoke_without_command=True)
+    @commands.check(check_mod_permissions)
+    async def raid(self, ctx):
+        """Raid mode controls"""
+        await ctx.send("Available commands:\n"
+                       "!raid status - Show the current raid summary\n"
+                       "!raid start - Manually enable raid mode\n"
+                       "!raid kick [days] - Kick raid accounts younger than [days]\n"
+                       "!raid ban [days] - Ban raid accounts younger than [days]\n"
+                       "!raid end - Disable raid mode")
+
+    @raid.command(name='status')
+    async def raid_status(self, ctx):
+        """Show the current raid summary"""
+        raid = self.raids.get(ctx.guild.id)
+        if not raid:
+            await ctx.send("Raid mode is not active.")
+            return
+        await ctx.send(embed=self.create_raid_embed(raid))
+
+    @raid.command(name='start')
+    async def raid_start(self, ctx):
+        """Manually enable raid mode until !raid end"""
+        if ctx.guild.id in self.raids:
+            await ctx.send("Raid mode is already active.")
+            return
+        self.start_raid_mode(ctx.guild, manual=True)
+        await ctx.send("🚨 Raid mode enabled. Use `!raid end` to disable it.")
+
+    @raid.command(name='end')
+    async def raid_end(self, ctx):
+        """Disable raid mode"""
+        raid = self.raids.get(ctx.guild.id)
+        if not raid:
+            await ctx.send("Raid mode is not active.")
+            return
+        await self.update_raid_alert(raid, active=False)
+        self.end_raid_mode(ctx.guild.id)
+        await ctx.send("✅ Raid mode disabled.")
+
+    @raid.command(name='kick')
+    async def raid_kick(self, ctx, max_age_days: int = config.RAID_NEW_ACCOUNT_DAYS):
+        """Kick every raid account younger than max_age_days"""
+        raid = self.raids.get(ctx.guild.id)
+        if not raid:
+            await ctx.send("Raid mode is not active.")
+            return
+
+        targets = self.raid_targets(raid, max_age_days)
+        if not targets:
+            await ctx.send(f"No raid accounts younger than {max_age_days} days.")
+            return
+
+        status = await ctx.send(f"Kicking {len(targets)} accounts...")
+        kicked = 0
+        for member_id in targets:
+            member = await get_or_fetch_member(ctx.guild, member_id)
+            if member:
+                try:
+                    await member.kick(reason=f"Raid cleanup by {ctx.author}")
+                    kicked += 1
+                except Exception as e:
+                    print(f"Error kicking raid account {member_id}: {e}")
+            raid["members"].pop(member_id, None)
+
+        raid["dirty"] = True
+        await status.edit(content=f"✅ Kicked {kicked} of {len(targets)} raid accounts.")
+
+    @raid.command(name='ban')
+    async def raid_ban(self, ctx, max_age_days: int = config.RAID_NEW_ACCOUNT_DAYS):
+        """Ban every raid account younger than max_age_days"""
+        raid = self.raids.get(ctx.guild.id)
+        if not raid:
+            await ctx.send("Raid mode is not active.")
+            return
+
+        targets = self.raid_targets(raid, max_age_days)
+        if not targets:
+            await ctx.send(f"No raid accounts younger than {max_age_days} days.")
+            return
+
+        status = await ctx.send(f"Banning {len(targets)} accounts...")
+        banned = 0
+        # Bulk ban accepts up to 200 users per request
+        for i in range(0, len(targets), 200):
+            chunk = [discord.Object(id=member_id) for member_id in targets[i:i + 200]]
+            try:
+                result = await ctx.guild.bulk_ban(chunk, reason=f"Raid cleanup by {ctx.author}")
+                banned += len(result.banned)
+            except Exception as e:
+                print(f"Error bulk banning raid accounts: {e}")
+
+        for member_id in targets:
+            raid["members"].pop(member_id, None)
+
+        raid["dirty"] = True
+        await status.edit(content=f"✅ Banned {banned} of {len(targets)} raid accounts.")
 
     @commands.Cog.listener()
     async def on_ready(self):
         """Update member count when bot starts"""
         for guild in self.bot.guilds:
-            await self.update_member_count(guild)
-            print(f"Initial member count set for {guild.name}")
+            self.queue_member_count_update(guild)
+            print(f"Initial member count queued for {guild.name}")
 
     @commands.Cog.listener()
     async def on_member_join(self, member):
         """Handle member join"""
-        await self.update_member_count(member.guild)
-        await self.send_log_embed(member, "Joined")
+        if self.record_join(member):
+            # Raid mode: the raid alert replaces per-join renames and logs
+            return
+
+        self.queue_member_count_update(member.guild)
+        self.send_log_embed(member, "Joined")
         print(f"Member joined: {member.name}, updating count")
 
     @commands.Cog.listener()
     async def on_member_remove(self, member):
         """Handle member leave"""
-        await self.update_member_count(member.guild)
-        await self.send_log_embed(member, "Left")
+        raid = self.raids.get(member.guild.id)
+        if raid:
+            raid["leaves"] += 1
+            raid["dirty"] = True
+            return
+
+        self.queue_member_count_update(member.guild)
+        self.send_log_embed(member, "Left")
         print(f"Member left: {member.name}, updating count")
 
+    def cog_unload(self):
+        """Clean up when cog is unloaded"""
+        self.rename_task.cancel()
+        for raid in self.raids.values():
+            raid["task"].cancel()
+
 async def setup(bot):
     await bot.add_cog(MemberCount(bot))
\ No newline at end of file
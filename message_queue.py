@@ -0,0 +1,168 @@
+import asyncio
+import discord
+import time
+from collections import deque
+import config
+from utils.log_queue import MAX_EMBEDS_PER_MESSAGE, MAX_EMBED_CHARS_PER_MESSAGE
+from utils.metrics import outbound_messages, outbound_requests, outbound_queue_seconds
+from utils.timer_wheel import get_timer_wheel
+
+MAX_CONTENT_PER_MESSAGE = 2000
+
+class MessageQueue:
+    """Schedules outbound messages per channel behind a token bucket
+
+    Each channel has its own queue and bucket (config.SEND_QUEUE_BURST
+    messages, refilled at config.SEND_QUEUE_RATE per second), so a busy
+    channel waits for its own tokens without holding up the others. Messages
+    that pile up in a channel are merged into as few messages as Discord
+    allows, and delete_after is scheduled on the timer wheel instead of a
+    sleeping task.
+    """
+
+    def __init__(self, bot, rate: float = None, burst: int = None, max_pending: int = None):
+        self.bot = bot
+        self.wheel = get_timer_wheel(bot)
+        self.rate = rate or config.SEND_QUEUE_RATE
+        self.burst = burst or config.SEND_QUEUE_BURST
+        self.max_pending = max_pending or config.SEND_QUEUE_MAX_PENDING
+        self.channels = {}  # channel_id -> {"channel", "queue", "tokens", "updated", "task"}
+
+    def send(self, channel: discord.abc.Messageable, content: str = None, *, embed: discord.Embed = None,
+             embeds: list = None, delete_after: float = None) -> asyncio.Future:
+        """Queue a message; await the result for the sent message, which may be shared with merged ones"""
+        state = self.channels.get(channel.id)
+        if state is None:
+            state = {"channel": channel, "queue": deque(), "tokens": float(self.burst), "updated": time.monotonic(), "task": None}
+            self.channels[channel.id] = state
+        state["channel"] = channel
+
+        queue = state["queue"]
+        # Backpressure: a full channel queue sheds its oldest message
+        if len(queue) >= self.max_pending:
+            dropped = queue.popleft()
+            dropped["future"].set_result(None)
+            outbound_messages.inc("dropped")
+
+        future = asyncio.get_running_loop().create_future()
+        queue.append({
+            "content": str(content) if content is not None else None,
+            "embeds": list(embeds or ([embed] if embed else [])),
+            "delete_after": delete_after,
+            "queued_at": time.monotonic(),
+            "future": future,
+        })
+
+        if state["task"] is None or state["task"].done():
+            state["task"] = asyncio.get_running_loop().create_task(self.run(channel.id))
+        return future
+
+    def pending(self) -> int:
+        """Count messages waiting to be sent across all channels"""
+        return sum(len(state["queue"]) for state in self.channels.values())
+
+    async def run(self, channel_id: int):
+        """Send a channel's queued messages as its token bucket allows"""
+        state = self.channels[channel_id]
+        queue = state["queue"]
+        while queue:
+            await self.take_token(state)
+            batch = self.next_batch(queue)
+            try:
+                await self.send_batch(state["channel"], batch)
+            except Exception as e:
+                print(f"Error sending queued messages to {channel_id}: {e}")
+
+        # Forget idle channels once their bucket has refilled
+        if self.channels.get(channel_id) is state and not queue:
+            self.wheel.schedule(('message_queue', channel_id), self.burst / self.rate, self.forget, channel_id)
+
+    def forget(self, channel_id: int):
+        state = self.channels.get(channel_id)
+        if state and not state["queue"] and (state["task"] is None or state["task"].done()):
+            del self.channels[channel_id]
+
+    async def take_token(self, state: dict):
+        """Wait for a token in the channel's bucket and spend it"""
+        while True:
+            now = time.monotonic()
+            state["tokens"] = min(self.burst, state["tokens"] + (now - state["updated"]) * self.rate)
+            state["updated"] = now
+            if state["tokens"] >= 1:
+                state["tokens"] -= 1
+                return
+            await asyncio.sleep((1 - state["tokens"]) / self.rate)
+
+    def can_merge(self, batch: list, entry: dict) -> bool:
+        """Whether an entry can join a batch without reordering or exceeding message limits"""
+        first = batch[0]
+        if entry["delete_after"] != first["delete_after"]:
+            return False
+
+        # Content is shown above every embed, so text can't follow an embed
+        batch_embeds = [embed for item in batch for embed in item["embeds"]]
+        if entry["content"] and batch_embeds:
+            return False
+
+        content = "\n".join(item["content"] for item in batch + [entry] if item["content"])
+        if len(content) > MAX_CONTENT_PER_MESSAGE:
+            return False
+
+        embeds = batch_embeds + entry["embeds"]
+        return (
+            len(embeds) <= MAX_EMBEDS_PER_MESSAGE
+            and sum(len(embed) for embed in embeds) <= MAX_EMBED_CHARS_PER_MESSAGE
+        )
+
+    def next_batch(self, queue: deque) -> list:
+        """Take the queued messages that can be sent as one"""
+        batch = [queue.popleft()]
+        while queue and self.can_merge(batch, queue[0]):
+            batch.append(queue.popleft())
+        return batch
+
+    async def send_batch(self, channel: discord.abc.Messageable, batch: list):
+        """Send a batch as one message and resolve every entry with it"""
+        content = "\n".join(item["content"] for item in batch if item["content"]) or None
+        embeds = [embed for item in batch for embed in item["embeds"]]
+        try:
+            message = await channel.send(content=content, embeds=embeds)
+        except Exception as e:
+            outbound_messages.inc("failed", amount=len(batch))
+            for item in batch:
+                item["future"].set_exception(e)
+                # Callers that don't await the send have already had it logged
+                item["future"].exception()
+            raise
+
+        outbound_requests.inc()
+        outbound_messages.inc("sent", amount=len(batch))
+        now = time.monotonic()
+        for item in batch:
+            outbound_queue_seconds.observe(now - item["queued_at"])
+            item["future"].set_result(message)
+
+        delete_after = batch[0]["delete_after"]
+        if delete_after is not None:
+            self.wheel.schedule(('delete_message', message.id), delete_after, self.delete, channel.id, message.id)
+
+    async def delete(self, channel_id: int, message_id: int):
+        """Delete a message whose delete_after has passed"""
+        try:
+            await self.bot.get_partial_messageable(channel_id).get_partial_message(message_id).delete()
+        except discord.HTTPException:
+            pass
+
+    async def stop(self):
+        """Send whatever is still queued"""
+        tasks = [state["task"] for state in self.channels.values() if state["task"] and not state["task"].done()]
+        if tasks:
+            await asyncio.wait(tasks)
+
+def get_message_queue(bot) -> MessageQueue:
+    """Get the bot's shared outbound message queue, creating it on first use"""
+    message_queue = getattr(bot, 'message_queue', None)
+    if message_queue is None:
+        message_queue = MessageQueue(bot)
+        bot.message_queue = message_queue
+    return message_queue
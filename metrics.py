@@ -0,0 +1,382 @@
+import aiohttp
+from aiohttp import web
+import asyncio
+import bisect
+import os
+import resource
+import time
+from discord.ext import commands
+import config
+from utils import helpers
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def format_labels(names: tuple, values: tuple) -> str:
+    """Render a label set in Prometheus text format"""
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+class Counter:
+    """Monotonic count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: tuple = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> list:
+        return [f"{self.name}{format_labels(self.labels, key)} {value}" for key, value in self.values.items()]
+
+class Gauge(Counter):
+    """Current value per label set, usually filled in by a collector at scrape time"""
+
+    kind = "gauge"
+
+    def set(self, *label_values, value: float):
+        self.values[label_values] = value
+
+class Histogram:
+    """Bucketed observations per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self.values = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *label_values):
+        series = self.values.get(label_values)
+        if series is None:
+            series = [0] * (len(self.buckets) + 2)
+            self.values[label_values] = series
+        # Counts are stored per bucket and made cumulative when rendered
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list:
+        lines = []
+        bucket_labels = self.labels + ("le",)
+        for key, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{format_labels(bucket_labels, key + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_bucket{format_labels(bucket_labels, key + ('+Inf',))} {series[-1]}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, key)} {series[-2]}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, key)} {series[-1]}")
+        return lines
+
+class MetricsRegistry:
+    """Holds every metric and renders them for a scrape
+
+    Recording is a dict update on the event loop; anything that is cheaper to
+    read on demand (pool sizes, queue depths) is registered as a collector and
+    only evaluated when /metrics is requested.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+
+    def add(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labels: tuple = ()) -> Counter:
+        return self.metrics.get(name) or self.add(Counter(name, description, labels))
+
+    def gauge(self, name: str, description: str, labels: tuple = ()) -> Gauge:
+        return self.metrics.get(name) or self.add(Gauge(name, description, labels))
+
+    def histogram(self, name: str, description: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self.metrics.get(name) or self.add(Histogram(name, description, labels, buckets))
+
+    def add_collector(self, collector):
+        """Call collector() before each scrape to refresh gauges"""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"Error in metrics collector {collector.__name__}: {e}")
+
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+gateway_events = registry.counter(
+    "discord_gateway_events_total", "Gateway events received per shard", ("event", "shard")
+)
+shard_latency = registry.gauge(
+    "discord_shard_latency_seconds", "Heartbeat round trip per shard", ("shard",)
+)
+shard_guilds = registry.gauge(
+    "discord_shard_guilds", "Guilds cached per shard", ("shard",)
+)
+shard_disconnects = registry.counter(
+    "discord_shard_disconnects_total", "Gateway disconnects per shard", ("shard",)
+)
+handler_seconds = registry.histogram(
+    "bot_event_handler_seconds", "Time spent in each event listener", ("listener",)
+)
+handler_errors = registry.counter(
+    "bot_event_handler_errors_total", "Event listeners that raised", ("listener",)
+)
+db_query_seconds = registry.histogram(
+    "db_query_seconds", "Database query latency per statement", ("statement",)
+)
+db_query_errors = registry.counter(
+    "db_query_errors_total", "Database queries that raised", ("statement",)
+)
+db_pool_connections = registry.gauge(
+    "db_pool_connections", "Shared pool connections by state", ("state",)
+)
+http_requests = registry.counter(
+    "discord_http_requests_total", "Discord REST requests by method and status", ("method", "status")
+)
+http_rate_limited = registry.counter(
+    "discord_http_rate_limited_total", "Discord REST responses with status 429", ("method",)
+)
+http_request_seconds = registry.histogram(
+    "discord_http_request_seconds", "Discord REST request latency", ("method",)
+)
+leader_status = registry.gauge(
+    "bot_leader", "1 while this process runs the singleton background jobs"
+)
+queue_depth = registry.gauge(
+    "bot_queue_depth", "Items waiting in write-behind queues and timer stores", ("queue",)
+)
+role_changes = registry.counter(
+    "bot_role_changes_total", "Role additions and removals queued", ("change",)
+)
+role_edits = registry.counter(
+    "bot_role_edits_total", "Coalesced member role edits by outcome", ("outcome",)
+)
+role_queue_seconds = registry.histogram(
+    "bot_role_queue_seconds", "Time from a member's first queued role change to its edit completing"
+)
+outbound_messages = registry.counter(
+    "bot_outbound_messages_total", "Queued outbound messages by outcome", ("outcome",)
+)
+outbound_requests = registry.counter(
+    "bot_outbound_requests_total", "Messages posted for the outbound queue after merging"
+)
+outbound_queue_seconds = registry.histogram(
+    "bot_outbound_queue_seconds", "Time outbound messages wait in their channel's queue"
+)
+cache_items = registry.gauge(
+    "discord_cache_items", "Objects held in discord.py's caches", ("cache",)
+)
+process_memory = registry.gauge(
+    "process_resident_memory_bytes", "Resident set size of the bot process"
+)
+
+def resident_memory_bytes() -> int:
+    """Current RSS of this process, or the peak RSS where /proc isn't available"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # ru_maxrss is in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def statement_label(query: str) -> str:
+    """Collapse a query to one short line so it can be used as a label"""
+    return " ".join(query.split())[:config.METRICS_STATEMENT_LABEL_LENGTH]
+
+def record_query(record):
+    """asyncpg query logger that records statement latency"""
+    statement = statement_label(record.query)
+    db_query_seconds.observe(record.elapsed, statement)
+    if record.exception is not None:
+        db_query_errors.inc(statement)
+
+def create_http_trace() -> aiohttp.TraceConfig:
+    """Trace config for discord.py's HTTP session that counts requests and 429s"""
+    trace = aiohttp.TraceConfig()
+
+    async def on_request_start(session, context, params):
+        context.started_at = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        method = params.method
+        status = params.response.status
+        http_requests.inc(method, status)
+        http_request_seconds.observe(time.perf_counter() - context.started_at, method)
+        if status == 429:
+            http_rate_limited.inc(method)
+
+    async def on_request_exception(session, context, params):
+        http_requests.inc(params.method, "error")
+
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    trace.on_request_exception.append(on_request_exception)
+    return trace
+
+class InstrumentedBot(commands.AutoShardedBot):
+    """Sharded bot that counts gateway events per shard and times every event listener"""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('http_trace', create_http_trace())
+        super().__init__(*args, **kwargs)
+        registry.add_collector(self.collect_queue_depths)
+        registry.add_collector(self.collect_shards)
+        registry.add_collector(self.collect_caches)
+
+    def dispatch(self, event_name: str, /, *args, **kwargs):
+        # A READY or RESUMED means the shard is on a new websocket
+        if event_name in ('shard_connect', 'shard_resumed'):
+            self.instrument_shard(args[0])
+        elif event_name == 'shard_disconnect':
+            shard_disconnects.inc(str(args[0]))
+        super().dispatch(event_name, *args, **kwargs)
+
+    def instrument_shard(self, shard_id: int):
+        """Count a shard's gateway events under its ID
+
+        The websocket reports each event type through the client's dispatch
+        without saying which shard it came from, so each shard's websocket gets
+        a dispatch that counts the event directly instead of scheduling a
+        socket_event_type listener for it.
+        """
+        ws = self._get_websocket(shard_id=shard_id)
+        label = str(shard_id)
+
+        def dispatch(event_name: str, /, *args, **kwargs):
+            if event_name == 'socket_event_type':
+                gateway_events.inc(args[0], label)
+                return
+            self.dispatch(event_name, *args, **kwargs)
+
+        ws._dispatch = dispatch
+
+    def collect_shards(self):
+        """Read per-shard latency and guild counts for a scrape"""
+        for shard_id, latency in self.latencies:
+            if latency == latency:  # nan until the first heartbeat is acknowledged
+                shard_latency.set(str(shard_id), value=latency)
+
+        counts = dict.fromkeys(self.shards, 0)
+        for guild in self.guilds:
+            counts[guild.shard_id] = counts.get(guild.shard_id, 0) + 1
+        for shard_id, count in counts.items():
+            shard_guilds.set(str(shard_id), value=count)
+
+    def cache_sizes(self) -> dict:
+        """Count the objects in each of discord.py's caches"""
+        return {
+            "guilds": len(self.guilds),
+            "members": sum(len(guild.members) for guild in self.guilds),
+            "users": len(self.users),
+            "channels": sum(len(guild.channels) for guild in self.guilds),
+            "roles": sum(len(guild.roles) for guild in self.guilds),
+            "emojis": len(self.emojis),
+            "messages": len(self.cached_messages),
+        }
+
+    def collect_caches(self):
+        """Read cache sizes and memory use for a scrape"""
+        for cache, count in self.cache_sizes().items():
+            cache_items.set(cache, value=count)
+        process_memory.set(value=resident_memory_bytes())
+
+    async def _run_event(self, coro, event_name: str, *args, **kwargs):
+        listener = getattr(coro, '__qualname__', event_name)
+        start = time.perf_counter()
+        # Same error handling as Client._run_event, plus timing
+        try:
+            await coro(*args, **kwargs)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            handler_errors.inc(listener)
+            try:
+                await self.on_error(event_name, *args, **kwargs)
+            except asyncio.CancelledError:
+                pass
+        finally:
+            handler_seconds.observe(time.perf_counter() - start, listener)
+
+    def collect_queue_depths(self):
+        """Read pool and queue sizes for a scrape"""
+        pool_task = getattr(self, 'db_pool_task', None)
+        if pool_task is not None and pool_task.done() and not pool_task.cancelled() and pool_task.exception() is None:
+            pool = pool_task.result()
+            idle = pool.get_idle_size()
+            db_pool_connections.set("idle", value=idle)
+            db_pool_connections.set("in_use", value=pool.get_size() - idle)
+
+        log_queue = getattr(self, 'log_queue', None)
+        if log_queue:
+            queue_depth.set("log_embeds", value=log_queue.pending())
+
+        queue_depth.set("verification_state_writes", value=helpers.pending_state_writes)
+
+        message_queue = getattr(self, 'message_queue', None)
+        if message_queue:
+            queue_depth.set("outbound_messages", value=message_queue.pending())
+
+        role_queue = getattr(self, 'role_queue', None)
+        if role_queue:
+            queue_depth.set("role_edits", value=len(role_queue))
+
+        timer_wheel = getattr(self, 'timer_wheel', None)
+        if timer_wheel:
+            queue_depth.set("timers", value=len(timer_wheel))
+
+        dm_router = getattr(self, 'dm_router', None)
+        if dm_router:
+            queue_depth.set("dm_sessions", value=len(dm_router.sessions))
+
+        confirmations = getattr(self, 'confirmations', None)
+        if confirmations:
+            queue_depth.set("confirmations", value=len(confirmations.decisions))
+
+class MetricsServer:
+    """Serves the registry at /metrics on a local port"""
+
+    def __init__(self, host: str = None, port: int = None):
+        self.host = host or config.METRICS_HOST
+        self.port = port or config.METRICS_PORT
+        self.runner = None
+
+    async def handle_metrics(self, request):
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        print(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
@@ -0,0 +1,143 @@
+-- Baseline schema: every table the cogs use, in one place.
+-- IF NOT EXISTS lets this adopt databases set up by init_db.sql or by the
+-- startup DDL the cogs used to run; 0002 reconciles the shapes that differ.
+
+-- Leveling system
+CREATE TABLE IF NOT EXISTS levels (
+    user_id BIGINT PRIMARY KEY,
+    xp BIGINT DEFAULT 0,
+    level INTEGER DEFAULT 1,
+    last_message_time TIMESTAMP DEFAULT NOW()
+);
+
+-- Reaction roles system
+CREATE TABLE IF NOT EXISTS reaction_role_categories (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL UNIQUE,
+    emoji VARCHAR(100) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS reaction_roles (
+    id SERIAL PRIMARY KEY,
+    category_id INTEGER REFERENCES reaction_role_categories(id) ON DELETE CASCADE,
+    role_id BIGINT NOT NULL,
+    emoji VARCHAR(100) NOT NULL
+);
+
+-- Pack system
+CREATE TABLE IF NOT EXISTS packs (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) UNIQUE NOT NULL,
+    description TEXT,
+    leader_id BIGINT NOT NULL,
+    pack_icon_url TEXT,
+    member_count INT DEFAULT 1,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS pack_members (
+    pack_id INT REFERENCES packs(id) ON DELETE CASCADE,
+    user_id BIGINT NOT NULL,
+    role VARCHAR(20) NOT NULL DEFAULT 'member', -- 'leader', 'officer', 'member'
+    joined_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (pack_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS pack_invites (
+    pack_id INT REFERENCES packs(id) ON DELETE CASCADE,
+    user_id BIGINT NOT NULL,
+    inviter_id BIGINT NOT NULL,
+    status VARCHAR(20) DEFAULT 'pending', -- 'pending', 'accepted', 'declined'
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (pack_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS pack_alliances (
+    pack1_id INT REFERENCES packs(id) ON DELETE CASCADE,
+    pack2_id INT REFERENCES packs(id) ON DELETE CASCADE,
+    formed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (pack1_id, pack2_id)
+);
+
+CREATE TABLE IF NOT EXISTS pack_alliance_requests (
+    requesting_pack_id INT REFERENCES packs(id) ON DELETE CASCADE,
+    target_pack_id INT REFERENCES packs(id) ON DELETE CASCADE,
+    status VARCHAR(20) DEFAULT 'pending',
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (requesting_pack_id, target_pack_id)
+);
+
+-- Fursona system
+CREATE TABLE IF NOT EXISTS fursonas (
+    user_id BIGINT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    species VARCHAR(100) NOT NULL,
+    age VARCHAR(50),
+    bio TEXT,
+    image_url TEXT,
+    pack_id INTEGER REFERENCES packs(id) ON DELETE SET NULL,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS pending_fursonas (
+    user_id BIGINT PRIMARY KEY,
+    data JSONB NOT NULL,
+    message_id BIGINT,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS pending_fursona_images (
+    user_id BIGINT PRIMARY KEY,
+    image_url TEXT NOT NULL,
+    message_id BIGINT,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Verification system
+CREATE TABLE IF NOT EXISTS verification_state (
+    user_id BIGINT NOT NULL,
+    state VARCHAR(20) NOT NULL, -- 'pending', 'cooldown'
+    expires_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, state)
+);
+
+-- Interaction tracking system
+CREATE TABLE IF NOT EXISTS interaction_stats (
+    user_id BIGINT NOT NULL,
+    interaction_type VARCHAR(50) NOT NULL,
+    count INTEGER DEFAULT 0,
+    last_used TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (user_id, interaction_type)
+);
+
+-- Economy system
+CREATE TABLE IF NOT EXISTS user_economy (
+    user_id BIGINT PRIMARY KEY,
+    pawcoins INTEGER DEFAULT 0,
+    last_coin_earned TIMESTAMP WITH TIME ZONE
+);
+
+-- Bump reminders
+CREATE TABLE IF NOT EXISTS bump_data (
+    id SERIAL PRIMARY KEY,
+    next_bump_time TIMESTAMP WITH TIME ZONE
+);
+
+-- Marriage system (18+ feature)
+CREATE TABLE IF NOT EXISTS marriages (
+    user1_id BIGINT NOT NULL,
+    user2_id BIGINT NOT NULL,
+    married_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user1_id, user2_id)
+);
+
+-- Collar system (18+ feature); a pet has at most one owner
+CREATE TABLE IF NOT EXISTS collars (
+    pet_id BIGINT PRIMARY KEY,
+    owner_id BIGINT NOT NULL,
+    collared_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_pack_members_user_id ON pack_members(user_id);
+CREATE INDEX IF NOT EXISTS idx_pack_invites_user_id ON pack_invites(user_id);
@@ -0,0 +1,47 @@
+-- init_db.sql gave pack_invites a SERIAL id with UNIQUE (pack_id, user_id) and
+-- plain TIMESTAMP columns; the pack cog created it keyed on (pack_id, user_id)
+-- with TIMESTAMPTZ. Bring databases created either way to the baseline shape.
+
+DO $$
+DECLARE
+    target RECORD;
+    unique_constraint RECORD;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'pack_invites' AND column_name = 'id'
+    ) THEN
+        DELETE FROM pack_invites WHERE pack_id IS NULL;
+        -- Dropping the column also drops its primary key and sequence
+        ALTER TABLE pack_invites DROP COLUMN id;
+        FOR unique_constraint IN
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = 'pack_invites'::regclass AND contype = 'u'
+        LOOP
+            EXECUTE format('ALTER TABLE pack_invites DROP CONSTRAINT %I', unique_constraint.conname);
+        END LOOP;
+        ALTER TABLE pack_invites ADD PRIMARY KEY (pack_id, user_id);
+    END IF;
+
+    -- Stored times were written as UTC
+    FOR target IN
+        SELECT table_name, column_name FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND data_type = 'timestamp without time zone'
+          AND (table_name, column_name) IN (
+              ('packs', 'created_at'),
+              ('pack_members', 'joined_at'),
+              ('pack_invites', 'created_at')
+          )
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE %I ALTER COLUMN %I TYPE TIMESTAMP WITH TIME ZONE USING %I AT TIME ZONE ''UTC''',
+            target.table_name, target.column_name, target.column_name
+        );
+    END LOOP;
+END $$;
+
+ALTER TABLE pack_members ALTER COLUMN role SET DEFAULT 'member';
+-- init_db.sql allowed NULL roles; those members were plain members
+UPDATE pack_members SET role = 'member' WHERE role IS NULL;
+ALTER TABLE pack_members ALTER COLUMN role SET NOT NULL;
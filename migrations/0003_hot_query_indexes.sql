@@ -0,0 +1,21 @@
+-- Indexes for the queries that run on every command or leaderboard.
+
+-- !leaderboard: ORDER BY xp DESC LIMIT 10
+CREATE INDEX IF NOT EXISTS idx_levels_xp ON levels(xp DESC);
+
+-- !interaction_stats <type>: WHERE interaction_type = $1 ORDER BY count DESC LIMIT 10
+CREATE INDEX IF NOT EXISTS idx_interaction_stats_type_count ON interaction_stats(interaction_type, count DESC);
+
+-- Covered by the primary key's leading user_id column, or by the index above;
+-- each one is extra work on every interaction upsert
+DROP INDEX IF EXISTS idx_interaction_stats_user_id;
+DROP INDEX IF EXISTS idx_interaction_stats_count;
+
+-- get_pets / count_pets: WHERE owner_id = $1
+CREATE INDEX IF NOT EXISTS idx_collars_owner_id ON collars(owner_id);
+
+-- get_spouse and divorce: WHERE user1_id = $1 OR user2_id = $1
+CREATE INDEX IF NOT EXISTS idx_marriages_user2_id ON marriages(user2_id);
+
+-- Alliance lookups: WHERE pack1_id = $1 OR pack2_id = $1
+CREATE INDEX IF NOT EXISTS idx_pack_alliances_pack2_id ON pack_alliances(pack2_id);
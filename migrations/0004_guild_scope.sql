@@ -0,0 +1,68 @@
+-- Scope per-user data to a guild so one process can serve several guilds.
+-- Existing rows belong to the home guild, passed in by the migration runner
+-- from HOME_GUILD_ID as the winterhaven.home_guild_id setting.
+
+CREATE TABLE IF NOT EXISTS guild_settings (
+    guild_id BIGINT PRIMARY KEY,
+    settings JSONB NOT NULL DEFAULT '{}',
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+DO $$
+DECLARE
+    home_guild_id BIGINT := NULLIF(current_setting('winterhaven.home_guild_id', true), '')::BIGINT;
+BEGIN
+    IF home_guild_id IS NULL AND (
+        EXISTS (SELECT 1 FROM levels) OR EXISTS (SELECT 1 FROM user_economy)
+        OR EXISTS (SELECT 1 FROM interaction_stats) OR EXISTS (SELECT 1 FROM packs)
+        OR EXISTS (SELECT 1 FROM bump_data)
+    ) THEN
+        RAISE EXCEPTION 'Set HOME_GUILD_ID so existing data can be assigned to its guild';
+    END IF;
+
+    ALTER TABLE levels ADD COLUMN guild_id BIGINT;
+    UPDATE levels SET guild_id = home_guild_id;
+    ALTER TABLE levels ALTER COLUMN guild_id SET NOT NULL;
+    ALTER TABLE levels DROP CONSTRAINT levels_pkey;
+    ALTER TABLE levels ADD PRIMARY KEY (guild_id, user_id);
+
+    ALTER TABLE user_economy ADD COLUMN guild_id BIGINT;
+    UPDATE user_economy SET guild_id = home_guild_id;
+    ALTER TABLE user_economy ALTER COLUMN guild_id SET NOT NULL;
+    ALTER TABLE user_economy DROP CONSTRAINT user_economy_pkey;
+    ALTER TABLE user_economy ADD PRIMARY KEY (guild_id, user_id);
+
+    ALTER TABLE interaction_stats ADD COLUMN guild_id BIGINT;
+    UPDATE interaction_stats SET guild_id = home_guild_id;
+    ALTER TABLE interaction_stats ALTER COLUMN guild_id SET NOT NULL;
+    ALTER TABLE interaction_stats DROP CONSTRAINT interaction_stats_pkey;
+    ALTER TABLE interaction_stats ADD PRIMARY KEY (guild_id, user_id, interaction_type);
+
+    -- Pack names are unique per guild; members carry the guild for membership lookups
+    ALTER TABLE packs ADD COLUMN guild_id BIGINT;
+    UPDATE packs SET guild_id = home_guild_id;
+    ALTER TABLE packs ALTER COLUMN guild_id SET NOT NULL;
+    ALTER TABLE packs DROP CONSTRAINT packs_name_key;
+    ALTER TABLE packs ADD CONSTRAINT packs_guild_id_name_key UNIQUE (guild_id, name);
+
+    ALTER TABLE pack_members ADD COLUMN guild_id BIGINT;
+    UPDATE pack_members pm SET guild_id = p.guild_id FROM packs p WHERE p.id = pm.pack_id;
+    DELETE FROM pack_members WHERE guild_id IS NULL;
+    ALTER TABLE pack_members ALTER COLUMN guild_id SET NOT NULL;
+
+    ALTER TABLE bump_data ADD COLUMN guild_id BIGINT;
+    UPDATE bump_data SET guild_id = home_guild_id;
+    ALTER TABLE bump_data ALTER COLUMN guild_id SET NOT NULL;
+END $$;
+
+-- Rebuild the lookup and leaderboard indexes with the guild leading
+DROP INDEX IF EXISTS idx_levels_xp;
+CREATE INDEX idx_levels_guild_xp ON levels(guild_id, xp DESC);
+
+DROP INDEX IF EXISTS idx_interaction_stats_type_count;
+CREATE INDEX idx_interaction_stats_guild_type_count ON interaction_stats(guild_id, interaction_type, count DESC);
+
+DROP INDEX IF EXISTS idx_pack_members_user_id;
+CREATE INDEX idx_pack_members_guild_user ON pack_members(guild_id, user_id);
+
+CREATE INDEX idx_bump_data_guild ON bump_data(guild_id, id DESC);
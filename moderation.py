@@ -1,17 +1,26 @@
 import discord
 from discord.ext import commands
 import config
-from utils.helpers import check_mod_permissions, remove_pending_application
+from utils.helpers import check_mod_permissions, get_or_fetch_member, remove_pending_application
+from utils.log_queue import get_log_queue
+from utils.guild_settings import get_guild_settings
+from utils.message_queue import get_message_queue
+from utils.role_queue import get_role_queue
 import asyncio
+import logging
 import re
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
 class ModerationSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.processing_approvals = set()  # Track approvals in progress
         self.muted_users = {}  # Track muted users and their unmute tasks
-        self.muted_role_id = 994238679281303612  # Muted role ID
+        self.settings = get_guild_settings(bot)
+        self.roles = get_role_queue(bot)
+        self.outbox = get_message_queue(bot)
 
     def parse_duration(self, duration_str: str) -> int:
         """Convert duration string to seconds"""
@@ -45,18 +54,19 @@ class ModerationSystem(commands.Cog):
             if not guild:
                 return
 
-            member = guild.get_member(user_id)
+            member = await get_or_fetch_member(guild, user_id)
             if not member:
                 return
 
-            muted_role = guild.get_role(self.muted_role_id)
+            settings = self.settings.get(guild_id)
+            muted_role = guild.get_role(settings['muted_role_id'])
             if not muted_role:
                 return
 
-            await member.remove_roles(muted_role)
+            await self.roles.remove(member, muted_role, reason="Mute expired")
 
             # Log the unmute
-            log_channel = self.bot.get_channel(config.MOD_LOG_CHANNEL_ID)
+            log_channel = self.bot.get_channel(settings['mod_log_channel_id'])
             if log_channel:
                 embed = discord.Embed(
                     title="Member Unmuted (Auto)",
@@ -78,12 +88,12 @@ class ModerationSystem(commands.Cog):
         """Mute a member"""
         try:
             # Check if user is already muted
-            muted_role = ctx.guild.get_role(self.muted_role_id)
+            muted_role = ctx.guild.get_role(self.settings.get(ctx.guild.id)['muted_role_id'])
             if not muted_role:
                 await ctx.send("Error: Could not find muted role.")
                 return
 
-            if muted_role in member.roles:
+            if self.roles.has_role(member, muted_role):
                 await ctx.send(f"{member.mention} is already muted.")
                 return
 
@@ -91,7 +101,7 @@ class ModerationSystem(commands.Cog):
             duration_seconds = self.parse_duration(duration) if duration else 0
 
             # Apply mute
-            await member.add_roles(muted_role)
+            await self.roles.add(member, muted_role, reason=reason)
 
             # Create embed for logging
             embed = discord.Embed(
@@ -105,9 +115,7 @@ class ModerationSystem(commands.Cog):
             )
 
             # Send to mod log channel
-            log_channel = self.bot.get_channel(config.MOD_LOG_CHANNEL_ID)
-            if log_channel:
-                await log_channel.send(embed=embed)
+            get_log_queue(self.bot).enqueue(self.settings.get(ctx.guild.id)['mod_log_channel_id'], embed)
 
             # Schedule unmute if duration was provided
             if duration_seconds > 0:
@@ -146,17 +154,17 @@ class ModerationSystem(commands.Cog):
     async def unmute(self, ctx, member: discord.Member):
         """Unmute a member"""
         try:
-            muted_role = ctx.guild.get_role(self.muted_role_id)
+            muted_role = ctx.guild.get_role(self.settings.get(ctx.guild.id)['muted_role_id'])
             if not muted_role:
                 await ctx.send("Error: Could not find muted role.")
                 return
 
-            if muted_role not in member.roles:
+            if not self.roles.has_role(member, muted_role):
                 await ctx.send(f"{member.mention} is not muted.")
                 return
 
             # Remove muted role
-            await member.remove_roles(muted_role)
+            await self.roles.remove(member, muted_role)
 
             # Cancel any pending unmute task
             if member.id in self.muted_users:
@@ -173,9 +181,7 @@ class ModerationSystem(commands.Cog):
             )
 
             # Send to mod log channel
-            log_channel = self.bot.get_channel(config.MOD_LOG_CHANNEL_ID)
-            if log_channel:
-                await log_channel.send(embed=embed)
+            get_log_queue(self.bot).enqueue(self.settings.get(ctx.guild.id)['mod_log_channel_id'], embed)
 
             # Send confirmation
             await ctx.send(f"🔊 Unmuted {member.mention}")
@@ -192,66 +198,68 @@ class ModerationSystem(commands.Cog):
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload):
         """Handle moderator approval/denial reactions"""
-        print(f"Processing reaction: {payload.emoji} in channel {payload.channel_id}")
-
         # Ignore bot's own reactions
         if payload.user_id == self.bot.user.id:
-            print("Ignoring bot's own reaction")
             return
 
         # Only process reactions in mod channel
-        if payload.channel_id != config.MOD_CHANNEL_ID:
-            print(f"Reaction not in mod channel (expected {config.MOD_CHANNEL_ID}, got {payload.channel_id})")
+        if not payload.guild_id:
+            return
+
+        settings = self.settings.get(payload.guild_id)
+        if payload.channel_id != settings['mod_channel_id']:
             return
 
+        logger.debug("Processing reaction %s on message %s", payload.emoji, payload.message_id)
+
         try:
             # Get the guild and member objects
             guild = self.bot.get_guild(payload.guild_id)
             if not guild:
-                print("Could not find guild")
+                logger.warning("Could not find guild %s", payload.guild_id)
                 return
 
-            mod = guild.get_member(payload.user_id)
+            mod = payload.member
             if not mod:
-                print(f"Could not find member {payload.user_id}")
+                logger.warning("Could not find member %s", payload.user_id)
                 return
 
             # Verify moderator permissions
-            if not any(role.id == config.MOD_ROLE_ID for role in mod.roles):
-                print(f"User {mod.name} does not have mod role")
+            if not any(role.id == settings['mod_role_id'] for role in mod.roles):
+                logger.debug("User %s does not have mod role", mod.id)
                 return
 
             # Get the channel and message
             channel = guild.get_channel(payload.channel_id)
             if not channel:
-                print(f"Could not find channel {payload.channel_id}")
+                logger.warning("Could not find channel %s", payload.channel_id)
                 return
 
             message = await channel.fetch_message(payload.message_id)
             if not message or not message.embeds:
-                print("Could not find message or message has no embeds")
+                logger.debug("Message %s has no embeds", payload.message_id)
                 return
 
             # Process verification request
             embed = message.embeds[0]
             if embed.title != "New Verification Request":
-                print(f"Unexpected embed title: {embed.title}")
+                logger.debug("Ignoring reaction on embed %r", embed.title)
                 return
 
             # Extract user ID from embed
             user_info = embed.fields[0].value
             user_id = int(user_info.split('ID: ')[1].split('\n')[0])
-            user = guild.get_member(user_id)
+            user = await get_or_fetch_member(guild, user_id)
 
             if not user:
                 await channel.send(f"Error: Could not find user with ID {user_id}")
                 return
 
-            print(f"Processing verification for user {user.name} by mod {mod.name}")
+            logger.info("Processing verification for user %s by mod %s", user.id, mod.id)
 
             # Check if this verification is already being processed
             if user_id in self.processing_approvals:
-                print(f"Verification for {user.name} is already being processed")
+                logger.info("Verification for user %s is already being processed", user.id)
                 return
 
             # Handle approval/denial
@@ -265,7 +273,7 @@ class ModerationSystem(commands.Cog):
                 await self.deny_user(user, message, mod)
 
         except Exception as e:
-            print(f"Error in on_raw_reaction_add: {str(e)}")
+            logger.exception("Error handling verification reaction")
             if 'user_id' in locals() and user_id in self.processing_approvals:
                 self.processing_approvals.remove(user_id)
 
@@ -277,16 +285,17 @@ class ModerationSystem(commands.Cog):
                 return
 
             # Add verified role
-            role = guild.get_role(config.VERIFIED_ROLE_ID)
+            settings = self.settings.get(guild.id)
+            role = guild.get_role(settings['verified_role_id'])
             if not role:
-                await message.channel.send(f"Error: Could not find verified role {config.VERIFIED_ROLE_ID}")
+                await message.channel.send(f"Error: Could not find verified role {settings['verified_role_id']}")
                 return
 
             # Check if user already has the role to prevent duplicate processing
-            if role in user.roles:
+            if self.roles.has_role(user, role):
                 return
 
-            await user.add_roles(role)
+            await self.roles.add(user, role)
 
             # Update embed
             embed = message.embeds[0]
@@ -294,9 +303,7 @@ class ModerationSystem(commands.Cog):
             embed.add_field(name="Status", value=f"Approved by {mod.name}#{mod.discriminator}", inline=False)
 
             # Log to verification log channel
-            log_channel = self.bot.get_channel(config.VERIFICATION_LOG_CHANNEL_ID)
-            if log_channel:
-                await log_channel.send(embed=embed)
+            get_log_queue(self.bot).enqueue(settings['verification_log_channel_id'], embed)
 
             # Delete original message
             await message.delete()
@@ -305,14 +312,14 @@ class ModerationSystem(commands.Cog):
             remove_pending_application(user.id)
 
             # Send welcome message in general chat
-            general_channel = self.bot.get_channel(994238680115986496)  # General chat ID
+            general_channel = self.bot.get_channel(settings['general_channel_id'])
             if general_channel:
                 welcome_embed = discord.Embed(
                     title="🎉 New Member!",
                     description=f"Please welcome {user.mention} to the server! 🎊",
                     color=discord.Color.blue()
                 )
-                await general_channel.send(content=f"Everyone welcome {user.mention}!", embed=welcome_embed)
+                self.outbox.send(general_channel, f"Everyone welcome {user.mention}!", embed=welcome_embed)
 
             # Notify user
             try:
@@ -336,9 +343,7 @@ class ModerationSystem(commands.Cog):
             embed.add_field(name="Status", value=f"Denied by {mod.name}#{mod.discriminator}", inline=False)
 
             # Log to verification log channel
-            log_channel = self.bot.get_channel(config.VERIFICATION_LOG_CHANNEL_ID)
-            if log_channel:
-                await log_channel.send(embed=embed)
+            get_log_queue(self.bot).enqueue(self.settings.get(user.guild.id)['verification_log_channel_id'], embed)
 
             # Delete original message
             await message.delete()
@@ -365,9 +370,8 @@ class ModerationSystem(commands.Cog):
                 amount = 1000
 
             deleted = await ctx.channel.purge(limit=amount)
-            confirm_msg = await ctx.send(f"Cleared {len(deleted)} messages.")
-            await asyncio.sleep(5)  # Show confirmation for 5 seconds
-            await confirm_msg.delete()
+            # Show confirmation for 5 seconds
+            self.outbox.send(ctx.channel, f"Cleared {len(deleted)} messages.", delete_after=5)
 
         except discord.Forbidden:
             await ctx.send("I don't have permission to delete messages.")
@@ -375,5 +379,29 @@ class ModerationSystem(commands.Cog):
             await ctx.send(f"An error occurred: {str(e)}")
             print(f"Error in clear command: {str(e)}")
 
+    @commands.command(name='logqueue')
+    @commands.check(check_mod_permissions)
+    async def log_queue_stats(self, ctx):
+        """Show log channel queue depth and drop counters"""
+        stats = get_log_queue(self.bot).stats()
+        if not stats:
+            await ctx.send("No log embeds have been queued yet.")
+            return
+
+        embed = discord.Embed(
+            title="Log Queue",
+            color=discord.Color.blue()
+        )
+        for channel_id, counters in stats.items():
+            channel = self.bot.get_channel(channel_id)
+            embed.add_field(
+                name=f"#{channel.name}" if channel else str(channel_id),
+                value=f"Pending: {counters['pending']}\n"
+                      f"Sent: {counters['sent']} in {counters['messages']} messages\n"
+                      f"Overflow: {counters['overflow']} | Dropped: {counters['dropped']}",
+                inline=False
+            )
+        await ctx.send(embed=embed)
+
 async def setup(bot):
     await bot.add_cog(ModerationSystem(bot))
\ No newline at end of file
@@ -1,106 +1,78 @@
 import discord
 from discord.ext import commands
 import asyncpg
-import os
 from datetime import datetime
-from utils.helpers import check_mod_permissions
+from utils.helpers import check_mod_permissions, get_members, get_or_fetch_member
+from utils.log_queue import get_log_queue
+from utils.embed_templates import embed_templates
 import asyncio
 import config
+from utils.database import get_db_pool
+from utils.guild_settings import get_guild_settings
+from utils import queries
+from utils.startup import track_startup
 
 class PackSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = None
-        self.bot.loop.create_task(self.init_db())
+        self.settings = get_guild_settings(bot)
+        self.bot.loop.create_task(track_startup(self.bot, __name__, self.init_db()))
+        embed_templates.register('pack_help', self.create_pack_help_embed)
+        embed_templates.build('pack_help')
         print("Initializing PackSystem cog")
 
+    def create_pack_help_embed(self):
+        """Create the pack command overview embed"""
+        embed = discord.Embed(
+            title="🐾 Pack Commands",
+            description="Manage your pack with these commands:",
+            color=discord.Color.blue()
+        )
+
+        commands_list = (
+            "**👑 Leader Commands:**\n"
+            "`!pack desc <text>` - Set pack description\n"
+            "`!pack icon <url>` - Submit pack icon for approval\n"
+            "`!pack icon_remove` - Remove current pack icon\n"
+            "`!pack promote @user` - Promote member to officer\n"
+            "`!pack demote @user` - Demote officer to member\n"
+            "`!pack disband` - Disband your pack\n"
+            "`!pack ally <pack_name>` - Request an alliance with another pack\n"
+            "`!pack accept_ally <pack_name>` - Accept an alliance request\n"
+            "`!pack decline_ally <pack_name>` - Decline an alliance request\n"
+            "`!pack unally <pack_name>` - Break an alliance with another pack\n"
+            "`!pack transfer @user` - Transfer leadership to another member\n\n"
+            "**🛡️ Officer & Leader Commands:**\n"
+            "`!pack invite @user` - Invite a user to pack\n"
+            "`!pack kick @user` - Remove a member\n\n"
+            "**🐾 Member Commands:**\n"
+            "`!pack join_pack <name>` - Join a pack (if invited)\n"
+            "`!pack leave` - Leave your current pack\n"
+            "`!pack info [name]` - View pack information\n\n"
+            "**Server Commands:**\n"
+            "`!pack alliances` - List all pack alliances\n"
+            "`!pack list` - List all packs\n"
+            "`!pack pending_alliances` - View pending alliance requests"
+        )
+
+        embed.add_field(name="Available Commands", value=commands_list, inline=False)
+        return embed
+
     async def init_db(self):
         """Initialize database connection"""
         try:
-            self.db = await asyncpg.create_pool(os.environ['DATABASE_URL'])
-            # Create necessary tables if they don't exist
-            async with self.db.acquire() as conn:
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS packs (
-                        id SERIAL PRIMARY KEY,
-                        name VARCHAR(100) UNIQUE NOT NULL,
-                        description TEXT,
-                        leader_id BIGINT NOT NULL,
-                        pack_icon_url TEXT,
-                        member_count INT DEFAULT 1,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-                    );
-                    CREATE TABLE IF NOT EXISTS pack_members (
-                        pack_id INT REFERENCES packs(id) ON DELETE CASCADE,
-                        user_id BIGINT NOT NULL,
-                        role VARCHAR(20) NOT NULL,
-                        joined_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                        PRIMARY KEY (pack_id, user_id)
-                    );
-                    CREATE TABLE IF NOT EXISTS pack_alliances (
-                        pack1_id INT REFERENCES packs(id) ON DELETE CASCADE,
-                        pack2_id INT REFERENCES packs(id) ON DELETE CASCADE,
-                        formed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                        PRIMARY KEY (pack1_id, pack2_id)
-                    );
-                    CREATE TABLE IF NOT EXISTS pack_invites (
-                        pack_id INT REFERENCES packs(id) ON DELETE CASCADE,
-                        user_id BIGINT NOT NULL,
-                        inviter_id BIGINT NOT NULL,
-                        status VARCHAR(20) DEFAULT 'pending',
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                        PRIMARY KEY (pack_id, user_id)
-                    );
-                    CREATE TABLE IF NOT EXISTS pack_alliance_requests (
-                        requesting_pack_id INT REFERENCES packs(id) ON DELETE CASCADE,
-                        target_pack_id INT REFERENCES packs(id) ON DELETE CASCADE,
-                        status VARCHAR(20) DEFAULT 'pending',
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                        PRIMARY KEY (requesting_pack_id, target_pack_id)
-                    );
-                """)
-                
+            self.db = await get_db_pool(self.bot)
             print("Pack system database connection initialized")
         except Exception as e:
             print(f"Error initializing pack system database: {e}")
 
     @commands.group(invoke_without_command=True)
+    @commands.guild_only()
     async def pack(self, ctx):
         """Pack management commands"""
         if ctx.invoked_subcommand is None:
-            embed = discord.Embed(
-                title="🐾 Pack Commands",
-                description="Manage your pack with these commands:",
-                color=discord.Color.blue()
-            )
-
-            commands_list = (
-                "**👑 Leader Commands:**\n"
-                "`!pack desc <text>` - Set pack description\n"
-                "`!pack icon <url>` - Submit pack icon for approval\n"
-                "`!pack icon_remove` - Remove current pack icon\n"
-                "`!pack promote @user` - Promote member to officer\n"
-                "`!pack demote @user` - Demote officer to member\n"
-                "`!pack disband` - Disband your pack\n"
-                "`!pack ally <pack_name>` - Request an alliance with another pack\n"
-                "`!pack accept_ally <pack_name>` - Accept an alliance request\n"
-                "`!pack decline_ally <pack_name>` - Decline an alliance request\n"
-                "`!pack unally <pack_name>` - Break an alliance with another pack\n"
-                "`!pack transfer @user` - Transfer leadership to another member\n\n"
-                "**🛡️ Officer & Leader Commands:**\n"
-                "`!pack invite @user` - Invite a user to pack\n"
-                "`!pack kick @user` - Remove a member\n\n"
-                "**🐾 Member Commands:**\n"
-                "`!pack join_pack <name>` - Join a pack (if invited)\n"
-                "`!pack leave` - Leave your current pack\n"
-                "`!pack info [name]` - View pack information\n\n"
-                "**Server Commands:**\n"
-                "`!pack alliances` - List all pack alliances\n"
-                "`!pack list` - List all packs\n"
-                "`!pack pending_alliances` - View pending alliance requests"
-            )
-
-            embed.add_field(name="Available Commands", value=commands_list, inline=False)
+            embed = embed_templates.get('pack_help')
             await ctx.send(embed=embed)
 
     # Pack Creation & Management Commands
@@ -114,17 +86,14 @@ class PackSystem(commands.Cog):
 
         try:
             # Check if user is already in a pack
-            existing_membership = await self.db.fetchrow(
-                "SELECT * FROM pack_members WHERE user_id = $1",
-                ctx.author.id
-            )
+            existing_membership = await queries.fetchrow(self.db, 'packs.membership', ctx.guild.id, ctx.author.id)
 
             if existing_membership:
                 await ctx.send("❌ You're already in a pack! Leave your current pack first.")
                 return
 
             # Submit pack for approval
-            mod_channel = self.bot.get_channel(1344011559764234343)  # Pack verification channel
+            mod_channel = self.bot.get_channel(self.settings.get(ctx.guild.id)['pack_approval_channel_id'])
             if not mod_channel:
                 await ctx.send("❌ Unable to submit pack for approval. Please try again later.")
                 return
@@ -167,19 +136,11 @@ class PackSystem(commands.Cog):
         try:
             # If no name provided, show user's pack
             if not name:
-                pack_data = await self.db.fetchrow(
-                    """
-                    SELECT p.*, pm.role
-                    FROM packs p
-                    JOIN pack_members pm ON p.id = pm.pack_id
-                    WHERE pm.user_id = $1
-                    """,
-                    ctx.author.id
-                )
+                pack_data = await queries.fetchrow(self.db, 'packs.member_pack', ctx.guild.id, ctx.author.id)
             else:
                 pack_data = await self.db.fetchrow(
-                    "SELECT * FROM packs WHERE name = $1",
-                    name
+                    "SELECT * FROM packs WHERE guild_id = $1 AND name = $2",
+                    ctx.guild.id, name
                 )
 
             if not pack_data:
@@ -221,12 +182,13 @@ class PackSystem(commands.Cog):
             )
 
             # Add member list grouped by role
+            guild_members = await get_members(ctx.guild, [m['user_id'] for m in members])
             for role in ['leader', 'officer', 'member']:
                 role_members = [m for m in members if m['role'] == role]
                 if role_members:
                     member_list = []
                     for member in role_members:
-                        user = ctx.guild.get_member(member['user_id'])
+                        user = guild_members.get(member['user_id'])
                         if user:
                             member_list.append(user.mention)
 
@@ -268,8 +230,8 @@ class PackSystem(commands.Cog):
         try:
             # First check if the pack exists
             pack_data = await self.db.fetchrow(
-                "SELECT id FROM packs WHERE name = $1",
-                name
+                "SELECT id FROM packs WHERE guild_id = $1 AND name = $2",
+                ctx.guild.id, name
             )
 
             if not pack_data:
@@ -290,10 +252,7 @@ class PackSystem(commands.Cog):
                 return
 
             # Check if user is already in a pack
-            existing_pack = await self.db.fetchrow(
-                "SELECT * FROM pack_members WHERE user_id = $1",
-                ctx.author.id
-            )
+            existing_pack = await queries.fetchrow(self.db, 'packs.membership', ctx.guild.id, ctx.author.id)
 
             if existing_pack:
                 await ctx.send("❌ You're already in a pack! Leave your current pack first.")
@@ -305,10 +264,10 @@ class PackSystem(commands.Cog):
                     # Add member
                     await conn.execute(
                         """
-                        INSERT INTO pack_members (pack_id, user_id, role) 
-                        VALUES ($1, $2, 'member')
+                        INSERT INTO pack_members (guild_id, pack_id, user_id, role) 
+                        VALUES ($1, $2, $3, 'member')
                         """,
-                        pack_data['id'], ctx.author.id
+                        ctx.guild.id, pack_data['id'], ctx.author.id
                     )
 
                     # Update member count
@@ -345,15 +304,7 @@ class PackSystem(commands.Cog):
 
         try:
             # Check if user is in a pack
-            member_data = await self.db.fetchrow(
-                """
-                SELECT p.*, pm.role
-                FROM packs p
-                JOIN pack_members pm ON p.id = pm.pack_id
-                WHERE pm.user_id = $1
-                """,
-                ctx.author.id
-            )
+            member_data = await queries.fetchrow(self.db, 'packs.member_pack', ctx.guild.id, ctx.author.id)
 
             if not member_data:
                 await ctx.send("❌ You're not in a pack!")
@@ -367,8 +318,8 @@ class PackSystem(commands.Cog):
             async with self.db.acquire() as conn:
                 async with conn.transaction():
                     await conn.execute(
-                        "DELETE FROM pack_members WHERE user_id = $1",
-                        ctx.author.id
+                        "DELETE FROM pack_members WHERE guild_id = $1 AND user_id = $2",
+                        ctx.guild.id, ctx.author.id
                     )
                     await conn.execute(
                         """
@@ -400,8 +351,10 @@ class PackSystem(commands.Cog):
                 FROM pack_alliances pa
                 JOIN packs p1 ON pa.pack1_id = p1.id
                 JOIN packs p2 ON pa.pack2_id = p2.id
+                WHERE p1.guild_id = $1
                 ORDER BY p1.name, p2.name
-                """
+                """,
+                ctx.guild.id
             )
 
             if not alliances:
@@ -444,9 +397,9 @@ class PackSystem(commands.Cog):
                 SELECT p.*
                 FROM packs p
                 JOIN pack_members pm ON p.id = pm.pack_id
-                WHERE pm.user_id = $1 AND pm.role = 'leader'
+                WHERE pm.guild_id = $1 AND pm.user_id = $2 AND pm.role = 'leader'
                 """,
-                ctx.author.id
+                ctx.guild.id, ctx.author.id
             )
 
             if not pack_data:
@@ -459,13 +412,13 @@ class PackSystem(commands.Cog):
                     """
                     SELECT p.* 
                     FROM packs p 
-                    WHERE CAST(p.name AS text) = CAST($1 AS text)
+                    WHERE p.guild_id = $1 AND CAST(p.name AS text) = CAST($2 AS text)
                     """,
-                    target_pack_name
+                    ctx.guild.id, target_pack_name
                 )
 
                 if not target_pack:
-                    all_packs = await self.db.fetch("SELECT name FROM packs")
+                    all_packs = await self.db.fetch("SELECT name FROM packs WHERE guild_id = $1", ctx.guild.id)
                     print(f"Available packs: {[p['name'] for p in all_packs]}")
                     await ctx.send(f"❌ Could not find pack '{target_pack_name}'. Use `!pack list` to see all available packs.")
                     return
@@ -555,9 +508,9 @@ class PackSystem(commands.Cog):
                 SELECT p.*
                 FROM packs p
                 JOIN pack_members pm ON p.id = pm.pack_id
-                WHERE pm.user_id = $1 AND pm.role = 'leader'
+                WHERE pm.guild_id = $1 AND pm.user_id = $2 AND pm.role = 'leader'
                 """,
-                ctx.author.id
+                ctx.guild.id, ctx.author.id
             )
 
             if not pack_data:
@@ -569,9 +522,9 @@ class PackSystem(commands.Cog):
                 """
                 SELECT p.* 
                 FROM packs p 
-                WHERE CAST(p.name AS text) = CAST($1 AS text)
+                WHERE p.guild_id = $1 AND CAST(p.name AS text) = CAST($2 AS text)
                 """,
-                requesting_pack_name
+                ctx.guild.id, requesting_pack_name
             )
 
             if not requesting_pack:
@@ -646,9 +599,9 @@ class PackSystem(commands.Cog):
                 SELECT p.*
                 FROM packs p
                 JOIN pack_members pm ON p.id = pm.pack_id
-                WHERE pm.user_id = $1 AND pm.role = 'leader'
+                WHERE pm.guild_id = $1 AND pm.user_id = $2 AND pm.role = 'leader'
                 """,
-                ctx.author.id
+                ctx.guild.id, ctx.author.id
             )
 
             if not pack_data:
@@ -660,9 +613,9 @@ class PackSystem(commands.Cog):
                 """
                 SELECT p.* 
                 FROM packs p 
-                WHERE CAST(p.name AS text) = CAST($1 AS text)
+                WHERE p.guild_id = $1 AND CAST(p.name AS text) = CAST($2 AS text)
                 """,
-                requesting_pack_name
+                ctx.guild.id, requesting_pack_name
             )
 
             if not requesting_pack:
@@ -704,9 +657,9 @@ class PackSystem(commands.Cog):
                 SELECT p.*
                 FROM packs p
                 JOIN pack_members pm ON p.id = pm.pack_id
-                WHERE pm.user_id = $1 AND pm.role = 'leader'
+                WHERE pm.guild_id = $1 AND pm.user_id = $2 AND pm.role = 'leader'
                 """,
-                ctx.author.id
+                ctx.guild.id, ctx.author.id
             )
 
             if not pack_data:
@@ -778,8 +731,10 @@ class PackSystem(commands.Cog):
                 """
                 SELECT name, member_count, description
                 FROM packs
+                WHERE guild_id = $1
                 ORDER BY name
-                """
+                """,
+                ctx.guild.id
             )
 
             if not packs:
@@ -817,7 +772,11 @@ class PackSystem(commands.Cog):
         if payload.user_id == self.bot.user.id:
             return
 
-        if payload.channel_id not in [config.FURSONA_APPROVAL_CHANNEL_ID, 1344011559764234343]:  # Allow both channels
+        if not payload.guild_id:
+            return
+
+        settings = self.settings.get(payload.guild_id)
+        if payload.channel_id not in [settings['fursona_approval_channel_id'], settings['pack_approval_channel_id']]:  # Allow both channels
             return
 
         message = await self.bot.get_channel(payload.channel_id).fetch_message(payload.message_id)
@@ -825,14 +784,14 @@ class PackSystem(commands.Cog):
             return
 
         guild = self.bot.get_guild(payload.guild_id)
-        mod = guild.get_member(payload.user_id)
-        if not mod or not any(role.id == config.MOD_ROLE_ID for role in mod.roles):
+        mod = payload.member
+        if not mod or not any(role.id == settings['mod_role_id'] for role in mod.roles):
             return
 
         embed = message.embeds[0]
 
         # Get the correct log channel
-        log_channel = self.bot.get_channel(1344015781826007050)  # Pack log channel
+        log_channel = self.bot.get_channel(settings['pack_log_channel_id'])
         if not log_channel:
             print("Warning: Pack log channel not found")
             return
@@ -841,7 +800,7 @@ class PackSystem(commands.Cog):
             # Extract user ID and pack name from embed
             user_id = int(embed.fields[0].value.split('ID: ')[1])
             pack_name = embed.fields[1].value
-            user = guild.get_member(user_id)
+            user = await get_or_fetch_member(guild, user_id)
 
             if str(payload.emoji) == config.APPROVE_EMOJI:
                 try:
@@ -850,20 +809,20 @@ class PackSystem(commands.Cog):
                         async with conn.transaction():
                             pack_id = await conn.fetchval(
                                 """
-                                INSERT INTO packs (name, leader_id)
-                                VALUES ($1, $2)
+                                INSERT INTO packs (guild_id, name, leader_id)
+                                VALUES ($1, $2, $3)
                                 RETURNING id
                                 """,
-                                pack_name, user_id
+                                payload.guild_id, pack_name, user_id
                             )
 
                             # Add leader as first member
                             await conn.execute(
                                 """
-                                INSERT INTO pack_members (pack_id, user_id, role)
-                                VALUES ($1, $2, 'leader')
+                                INSERT INTO pack_members (guild_id, pack_id, user_id, role)
+                                VALUES ($1, $2, $3, 'leader')
                                 """,
-                                pack_id, user_id
+                                payload.guild_id, pack_id, user_id
                             )
 
                     embed.color = discord.Color.green()
@@ -888,7 +847,7 @@ class PackSystem(commands.Cog):
                     await user.send(f"Your pack creation request for **{pack_name}** has been denied.")
 
             # Log the action
-            await log_channel.send(embed=embed)
+            get_log_queue(self.bot).enqueue(log_channel.id, embed)
 
             # Delete original message
             await message.delete()
@@ -0,0 +1,117 @@
+import asyncpg
+import time
+from utils.metrics import db_query_seconds, db_query_errors
+
+# Hot statements by name. Each is prepared once on every pool connection, so
+# they are parsed and planned once per connection instead of per call site.
+# Per-guild statements take the guild ID as $1.
+STATEMENTS = {
+    "levels.add_xp": """
+        INSERT INTO levels (guild_id, user_id, xp, level)
+        VALUES ($1, $2, $3, 1)
+        ON CONFLICT (guild_id, user_id)
+        DO UPDATE SET xp = levels.xp + $3
+        RETURNING xp, level
+    """,
+    "levels.set_level": "UPDATE levels SET level = $3 WHERE guild_id = $1 AND user_id = $2",
+    # Returns a row only for the caller that actually raised the level, so
+    # concurrent XP awards announce each level up once and never lower it
+    "levels.raise_level": """
+        UPDATE levels SET level = $3
+        WHERE guild_id = $1 AND user_id = $2 AND level < $3
+        RETURNING level
+    """,
+    "levels.remove_xp": """
+        UPDATE levels SET xp = GREATEST(0, xp - $3)
+        WHERE guild_id = $1 AND user_id = $2
+        RETURNING xp, level
+    """,
+    "levels.get": "SELECT xp, level FROM levels WHERE guild_id = $1 AND user_id = $2",
+    "economy.award": """
+        INSERT INTO user_economy (guild_id, user_id, pawcoins, last_coin_earned)
+        VALUES ($1, $2, $3, $4)
+        ON CONFLICT (guild_id, user_id)
+        DO UPDATE SET
+            pawcoins = user_economy.pawcoins + $3,
+            last_coin_earned = $4
+    """,
+    "economy.balance": "SELECT pawcoins FROM user_economy WHERE guild_id = $1 AND user_id = $2",
+    "interactions.record": """
+        INSERT INTO interaction_stats (guild_id, user_id, interaction_type, count, last_used)
+        VALUES ($1, $2, $3, 1, NOW())
+        ON CONFLICT (guild_id, user_id, interaction_type)
+        DO UPDATE SET
+            count = interaction_stats.count + 1,
+            last_used = NOW()
+    """,
+    "interactions.last_used": """
+        SELECT last_used
+        FROM interaction_stats
+        WHERE guild_id = $1 AND user_id = $2 AND interaction_type = $3
+    """,
+    "packs.membership": "SELECT pack_id, user_id, role, joined_at FROM pack_members WHERE guild_id = $1 AND user_id = $2",
+    "packs.member_pack": """
+        SELECT p.id, p.guild_id, p.name, p.description, p.leader_id, p.pack_icon_url, p.member_count, p.created_at, pm.role
+        FROM packs p
+        JOIN pack_members pm ON p.id = pm.pack_id
+        WHERE pm.guild_id = $1 AND pm.user_id = $2
+    """,
+    "marriage.spouse": """
+        SELECT
+            CASE
+                WHEN user1_id = $1 THEN user2_id
+                WHEN user2_id = $1 THEN user1_id
+            END as spouse_id
+        FROM marriages
+        WHERE user1_id = $1 OR user2_id = $1
+    """,
+    "collar.owner": "SELECT owner_id FROM collars WHERE pet_id = $1",
+    "collar.pets": "SELECT pet_id FROM collars WHERE owner_id = $1",
+    "collar.count": "SELECT COUNT(*) as pet_count FROM collars WHERE owner_id = $1",
+}
+
+async def prepare_statements(conn: asyncpg.Connection):
+    """Prepare every registered statement on a new pool connection"""
+    for name, sql in STATEMENTS.items():
+        try:
+            conn.prepared[name] = await conn.prepare(sql)
+        except Exception as e:
+            # Calls fall back to the unprepared SQL on this connection
+            print(f"Could not prepare statement {name}: {e}")
+
+async def run(db, method: str, name: str, *args):
+    """Run a registered statement on a pool or an acquired connection"""
+    if isinstance(db, asyncpg.Pool):
+        async with db.acquire() as conn:
+            return await run(conn, method, name, *args)
+
+    statement = getattr(db, 'prepared', {}).get(name)
+    if statement is None:
+        # Not one of our pool's connections; the query logger times this one
+        if method == 'execute':
+            return await db.execute(STATEMENTS[name], *args)
+        return await getattr(db, method)(STATEMENTS[name], *args)
+
+    # Prepared statements bypass asyncpg's query loggers, so time them here
+    start = time.perf_counter()
+    try:
+        if method == 'execute':
+            return await statement.fetch(*args)
+        return await getattr(statement, method)(*args)
+    except Exception:
+        db_query_errors.inc(name)
+        raise
+    finally:
+        db_query_seconds.observe(time.perf_counter() - start, name)
+
+async def fetch(db, name: str, *args) -> list:
+    return await run(db, 'fetch', name, *args)
+
+async def fetchrow(db, name: str, *args):
+    return await run(db, 'fetchrow', name, *args)
+
+async def fetchval(db, name: str, *args):
+    return await run(db, 'fetchval', name, *args)
+
+async def execute(db, name: str, *args):
+    return await run(db, 'execute', name, *args)
@@ -1,24 +1,31 @@
 import discord
 from discord.ext import commands
 import config
-from utils.helpers import check_mod_permissions
-import asyncpg
-import os
+from utils.helpers import check_mod_permissions, get_or_fetch_member
 import json
+import logging
+from utils.database import get_db_pool
+from utils.guild_settings import get_guild_settings
+from utils.role_queue import get_role_queue
+from utils.startup import track_startup
+
+logger = logging.getLogger(__name__)
 
 class ReactionRoles(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = None
         self.setup_messages = {}
-        self.bot.loop.create_task(self.init_db())
+        self.settings = get_guild_settings(bot)
+        self.roles = get_role_queue(bot)
+        self.bot.loop.create_task(track_startup(self.bot, __name__, self.init_db()))
         print("Initializing ReactionRoles cog")
 
     async def init_db(self):
         """Initialize database connection and create tables if needed"""
         try:
             print("Initializing database connection for reaction roles...")
-            self.db = await asyncpg.create_pool(os.environ['DATABASE_URL'])
+            self.db = await get_db_pool(self.bot)
             print("Successfully initialized reaction roles database")
 
             # Load existing data from JSON if available (for migration)
@@ -159,11 +166,12 @@ class ReactionRoles(commands.Cog):
         """Refresh all reaction role messages"""
         print("Starting rrrefresh command...")
 
-        if not config.REACTION_ROLES_CHANNEL_ID:
+        channel_id = self.settings.get(ctx.guild.id)['reaction_roles_channel_id']
+        if not channel_id:
             await ctx.send("No reaction roles channel set. Please run !rrsetup first.")
             return
 
-        channel = self.bot.get_channel(config.REACTION_ROLES_CHANNEL_ID)
+        channel = self.bot.get_channel(channel_id)
         if not channel:
             await ctx.send("Could not find reaction roles channel. Please run !rrsetup first.")
             return
@@ -288,7 +296,7 @@ class ReactionRoles(commands.Cog):
     @commands.check(check_mod_permissions)
     async def rrsetup(self, ctx):
         """Set up reaction roles in the current channel"""
-        config.REACTION_ROLES_CHANNEL_ID = ctx.channel.id
+        await self.settings.set(ctx.guild.id, 'reaction_roles_channel_id', ctx.channel.id)
         await self.save_category_data()
         await self.rrrefresh(ctx)
         await ctx.send("Reaction roles setup complete! Use !rradd to add roles to categories.")
@@ -400,8 +408,9 @@ class ReactionRoles(commands.Cog):
                 await self.save_category_data()
 
                 # Update the channel if it exists
-                if config.REACTION_ROLES_CHANNEL_ID:
-                    channel = self.bot.get_channel(config.REACTION_ROLES_CHANNEL_ID)
+                channel_id = self.settings.get(ctx.guild.id)['reaction_roles_channel_id']
+                if channel_id:
+                    channel = self.bot.get_channel(channel_id)
                     if channel:
                         await channel.purge(limit=100)
                         await self.rrrefresh(ctx)
@@ -463,15 +472,16 @@ class ReactionRoles(commands.Cog):
                 if emoji in role_dict:
                     guild = self.bot.get_guild(payload.guild_id)
                     if guild:
-                        member = guild.get_member(payload.user_id)
+                        member = payload.member
                         role = guild.get_role(role_dict[emoji])
                         if member and role:
-                            if role in member.roles:
-                                await member.remove_roles(role)
-                                print(f"Removed role {role.name} from {member.name}")
+                            # Queued so a burst of clicks becomes one edit per member
+                            if self.roles.has_role(member, role):
+                                self.roles.remove(member, role)
+                                logger.debug("Queued removal of %s from %s", role.name, member.name)
                             else:
-                                await member.add_roles(role)
-                                print(f"Added role {role.name} to {member.name}")
+                                self.roles.add(member, role)
+                                logger.debug("Queued %s for %s", role.name, member.name)
 
     @commands.Cog.listener()
     async def on_raw_reaction_remove(self, payload):
@@ -488,12 +498,12 @@ class ReactionRoles(commands.Cog):
                 if emoji in role_dict:
                     guild = self.bot.get_guild(payload.guild_id)
                     if guild:
-                        member = guild.get_member(payload.user_id)
+                        member = await get_or_fetch_member(guild, payload.user_id)
                         role = guild.get_role(role_dict[emoji])
                         if member and role:
-                            if role not in member.roles:
-                                await member.add_roles(role)
-                                print(f"Added role {role.name} to {member.name}")
+                            if not self.roles.has_role(member, role):
+                                self.roles.add(member, role)
+                                logger.debug("Queued %s for %s", role.name, member.name)
 
 
 
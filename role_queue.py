@@ -0,0 +1,143 @@
+import asyncio
+import discord
+import time
+import config
+from utils.metrics import role_changes, role_edits, role_queue_seconds
+from utils.timer_wheel import get_timer_wheel
+
+class RoleQueue:
+    """Coalesces role changes per member into one role edit
+
+    The first change for a member opens a pending edit that is sent
+    config.ROLE_QUEUE_WINDOW seconds later; changes made before then join it,
+    and a later change to the same role replaces an earlier one. Edits within a
+    guild share Discord's member route bucket, so at most
+    config.ROLE_QUEUE_CONCURRENCY are sent per guild at once. An edit waiting
+    for its turn keeps absorbing changes, so bursts turn into fewer calls.
+    """
+
+    def __init__(self, bot, window: float = None, concurrency: int = None):
+        self.bot = bot
+        self.wheel = get_timer_wheel(bot)
+        self.window = window or config.ROLE_QUEUE_WINDOW
+        self.concurrency = concurrency or config.ROLE_QUEUE_CONCURRENCY
+        self.pending = {}  # (guild_id, member_id) -> edit still accepting changes
+        self.in_flight = {}  # (guild_id, member_id) -> edit being sent
+        self.guild_limits = {}  # guild_id -> semaphore for the guild's member route
+
+    def add(self, member: discord.Member, *roles: discord.Role, reason: str = None) -> asyncio.Future:
+        """Queue roles to add; await the result to wait for the edit and see its error"""
+        return self.change(member, roles, True, reason)
+
+    def remove(self, member: discord.Member, *roles: discord.Role, reason: str = None) -> asyncio.Future:
+        """Queue roles to remove; await the result to wait for the edit and see its error"""
+        return self.change(member, roles, False, reason)
+
+    def change(self, member: discord.Member, roles, present: bool, reason: str = None) -> asyncio.Future:
+        key = (member.guild.id, member.id)
+        edit = self.pending.get(key)
+        if edit is None:
+            edit = {
+                "member": member,
+                "changes": {},  # role_id -> (role, present)
+                "reason": None,
+                "queued_at": time.monotonic(),
+                "future": asyncio.get_running_loop().create_future(),
+            }
+            self.pending[key] = edit
+            self.wheel.schedule(('role_edit', key), self.window, self.apply, key)
+
+        # The newest member object has the freshest roles
+        edit["member"] = member
+        for role in roles:
+            edit["changes"][role.id] = (role, present)
+        if reason:
+            edit["reason"] = reason
+        role_changes.inc("add" if present else "remove", amount=len(roles))
+        return edit["future"]
+
+    def has_role(self, member: discord.Member, role: discord.Role) -> bool:
+        """Whether the member has a role once their queued changes are applied"""
+        key = (member.guild.id, member.id)
+        for edit in (self.pending.get(key), self.in_flight.get(key)):
+            if edit and role.id in edit["changes"]:
+                return edit["changes"][role.id][1]
+        return role in member.roles
+
+    def __len__(self) -> int:
+        return len(self.pending) + len(self.in_flight)
+
+    async def apply(self, key: tuple):
+        """Send a member's pending edit once earlier edits for them are done"""
+        edit = self.pending[key]
+        previous = self.in_flight.get(key)
+        if previous:
+            # Edits for one member go out in order, each on top of the last
+            await asyncio.wait([previous["future"]])
+
+        limit = self.guild_limits.setdefault(key[0], asyncio.Semaphore(self.concurrency))
+        async with limit:
+            del self.pending[key]
+            self.in_flight[key] = edit
+            changes = edit["changes"]
+            if previous and not previous["future"].exception():
+                # The member object may predate the previous edit
+                changes = {**previous["changes"], **changes}
+
+            try:
+                outcome = await self.send(edit["member"], changes, edit["reason"])
+                role_edits.inc(outcome)
+                edit["future"].set_result(None)
+            except Exception as e:
+                print(f"Error editing roles for member {key[1]} in guild {key[0]}: {e}")
+                role_edits.inc("failed")
+                edit["future"].set_exception(e)
+                # Callers that don't await the edit have already had it logged
+                edit["future"].exception()
+            finally:
+                if self.in_flight.get(key) is edit:
+                    del self.in_flight[key]
+                role_queue_seconds.observe(time.monotonic() - edit["queued_at"])
+
+    async def send(self, member: discord.Member, changes: dict, reason: str = None) -> str:
+        """Apply changes on top of the member's roles in as few calls as possible"""
+        member = member.guild.get_member(member.id) or member
+        current = {role.id: role for role in member.roles if not role.is_default()}
+        roles = dict(current)
+        for role_id, (role, present) in changes.items():
+            if present:
+                roles[role_id] = role
+            else:
+                roles.pop(role_id, None)
+
+        added = [role for role_id, role in roles.items() if role_id not in current]
+        removed = [role for role_id, role in current.items() if role_id not in roles]
+        if not added and not removed:
+            return "unchanged"
+
+        # A single change has its own route that can't clobber a concurrent edit
+        if len(added) + len(removed) == 1:
+            if added:
+                await member.add_roles(*added, reason=reason, atomic=True)
+            else:
+                await member.remove_roles(*removed, reason=reason, atomic=True)
+        else:
+            await member.edit(roles=list(roles.values()), reason=reason)
+        return "applied"
+
+    async def flush(self):
+        """Send every pending edit now and wait for all edits to finish"""
+        for key in list(self.pending):
+            if self.wheel.cancel(('role_edit', key)):
+                asyncio.get_running_loop().create_task(self.apply(key))
+        edits = list(self.pending.values()) + list(self.in_flight.values())
+        if edits:
+            await asyncio.wait([edit["future"] for edit in edits])
+
+def get_role_queue(bot) -> RoleQueue:
+    """Get the bot's shared role queue, creating it on first use"""
+    role_queue = getattr(bot, 'role_queue', None)
+    if role_queue is None:
+        role_queue = RoleQueue(bot)
+        bot.role_queue = role_queue
+    return role_queue
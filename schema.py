@@ -0,0 +1,71 @@
+import asyncpg
+import os
+import re
+import config
+
+# Any constant works as long as nothing else takes the same advisory lock
+MIGRATION_LOCK_ID = 7_301_043
+
+MIGRATION_FILE = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+def list_migrations(path: str = None) -> list:
+    """Migration files as (version, name, sql), oldest first"""
+    path = path or config.MIGRATIONS_DIR
+    migrations = []
+    for filename in os.listdir(path):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(path, filename), 'r') as f:
+            migrations.append((int(match.group(1)), match.group(2), f.read()))
+    migrations.sort()
+
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {path}")
+    return migrations
+
+async def apply_migrations(conn: asyncpg.Connection, path: str = None) -> list:
+    """Apply every migration not yet recorded in schema_version
+
+    Each migration runs in its own transaction together with its
+    schema_version row, so a failed migration leaves no trace and is retried
+    on the next start. An advisory lock keeps two processes from migrating at
+    once.
+    """
+    migrations = list_migrations(path)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Migrations that assign existing rows to a guild read it from this setting
+    await conn.execute(
+        "SELECT set_config('winterhaven.home_guild_id', $1, false)",
+        str(config.HOME_GUILD_ID or '')
+    )
+
+    applied = []
+    await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+    try:
+        done = {row['version'] for row in await conn.fetch("SELECT version FROM schema_version")}
+        for version, name, sql in migrations:
+            if version in done:
+                continue
+            async with conn.transaction():
+                await conn.execute(sql)
+                await conn.execute(
+                    "INSERT INTO schema_version (version, name) VALUES ($1, $2)",
+                    version, name
+                )
+            print(f"Applied migration {version:04d}_{name}")
+            applied.append(version)
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+
+    if not applied:
+        print(f"Database schema is up to date (version {max(done, default=0)})")
+    return applied
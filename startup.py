@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+import time
+import config
+
+class StartupProfiler:
+    """Collects per-cog startup timings so slow steps are easy to spot"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.timings = {}  # cog -> {phase: seconds}
+
+    def record(self, name: str, phase: str, seconds: float):
+        """Record how long a startup phase took for a cog"""
+        self.timings.setdefault(name, {})[phase] = seconds
+
+    async def track(self, name: str, phase: str, coro):
+        """Await coro and record how long it took"""
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self.record(name, phase, time.perf_counter() - start)
+
+    def elapsed(self) -> float:
+        """Seconds since the profiler was created"""
+        return time.perf_counter() - self.started_at
+
+    def report(self):
+        """Print the timings, slowest cog first"""
+        print(f"\nStartup timings ({self.elapsed():.2f}s since launch):")
+        for name, phases in sorted(self.timings.items(), key=lambda item: -sum(item[1].values())):
+            details = ", ".join(f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in phases.items())
+            print(f"- {name}: {details}")
+
+def get_startup_profiler(bot) -> StartupProfiler:
+    """Get the bot's startup profiler, creating it on first use"""
+    profiler = getattr(bot, 'startup_profiler', None)
+    if profiler is None:
+        profiler = StartupProfiler()
+        bot.startup_profiler = profiler
+    return profiler
+
+def track_startup(bot, name: str, coro):
+    """Record a cog's async initialization as its "init" startup phase"""
+    return get_startup_profiler(bot).track(name, 'init', coro)
+
+def command_tree_hash(tree) -> str:
+    """Hash the application command payloads that a sync would upload"""
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands()),
+        key=lambda command: (command.get('type', 1), command['name'])
+    )
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+def load_tree_hash() -> str:
+    """Load the hash of the last synced command tree, if one was saved"""
+    if not os.path.exists(config.COMMAND_TREE_HASH_FILE):
+        return None
+    try:
+        with open(config.COMMAND_TREE_HASH_FILE, 'r') as f:
+            return json.load(f).get('hash')
+    except Exception as e:
+        print(f"Error loading command tree hash: {e}")
+        return None
+
+def save_tree_hash(tree_hash: str):
+    """Save the hash of the command tree that was just synced"""
+    try:
+        with open(config.COMMAND_TREE_HASH_FILE, 'w') as f:
+            json.dump({'hash': tree_hash, 'synced_at': time.time()}, f, indent=4)
+    except Exception as e:
+        print(f"Error saving command tree hash: {e}")
@@ -0,0 +1,95 @@
+import asyncio
+import math
+import config
+
+class TimerWheel:
+    """Hashed timer wheel for large numbers of keyed timeouts
+
+    Scheduling and cancelling are O(1); one background task advances the
+    wheel every tick and fires whatever is due in the current slot.
+    """
+
+    def __init__(self, tick: float = None, slots: int = None):
+        self.tick = tick or config.TIMER_WHEEL_TICK
+        self.slots = slots or config.TIMER_WHEEL_SLOTS
+        self.wheel = [{} for _ in range(self.slots)]  # slot -> {key: [rounds, callback, args]}
+        self.timers = {}  # key -> slot index
+        self.position = 0
+        self.task = None
+        self.callback_tasks = set()  # Running coroutine callbacks, kept so they aren't garbage collected
+
+    def start(self):
+        """Start advancing the wheel if it isn't running"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    def stop(self):
+        """Stop advancing the wheel; pending timers are kept"""
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    def schedule(self, key, delay: float, callback, *args):
+        """Call callback(*args) after delay seconds, replacing any timer with the same key"""
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.tick))
+        slot = (self.position + ticks) % self.slots
+        rounds = (ticks - 1) // self.slots
+        self.wheel[slot][key] = [rounds, callback, args]
+        self.timers[key] = slot
+
+    def cancel(self, key) -> bool:
+        """Cancel a pending timer, returning True if one existed"""
+        slot = self.timers.pop(key, None)
+        if slot is None:
+            return False
+        self.wheel[slot].pop(key, None)
+        return True
+
+    def __contains__(self, key) -> bool:
+        return key in self.timers
+
+    def __len__(self) -> int:
+        return len(self.timers)
+
+    async def run(self):
+        """Advance one slot per tick, catching up if the loop fell behind"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self.tick
+        while True:
+            await asyncio.sleep(max(0, next_tick - loop.time()))
+            while next_tick <= loop.time():
+                self.advance()
+                next_tick += self.tick
+
+    def advance(self):
+        """Move to the next slot and fire its due timers"""
+        self.position = (self.position + 1) % self.slots
+        bucket = self.wheel[self.position]
+        due = []
+        for key, entry in bucket.items():
+            if entry[0] > 0:
+                entry[0] -= 1
+            else:
+                due.append(key)
+
+        for key in due:
+            _, callback, args = bucket.pop(key)
+            del self.timers[key]
+            try:
+                result = callback(*args)
+                if asyncio.iscoroutine(result):
+                    task = asyncio.get_running_loop().create_task(result)
+                    self.callback_tasks.add(task)
+                    task.add_done_callback(self.callback_tasks.discard)
+            except Exception as e:
+                print(f"Error in timer callback for {key}: {e}")
+
+def get_timer_wheel(bot) -> TimerWheel:
+    """Get the bot's shared timer wheel, creating and starting it on first use"""
+    wheel = getattr(bot, 'timer_wheel', None)
+    if wheel is None:
+        wheel = TimerWheel()
+        bot.timer_wheel = wheel
+    wheel.start()
+    return wheel
@@ -1,19 +1,122 @@
 import discord
 from discord.ext import commands
+from discord.ext import tasks
 import config
 from utils.helpers import (
-    create_embed, ask_question, is_in_verification,
+    create_embed, is_in_verification,
     add_to_verification, remove_from_verification,
     is_on_cooldown, add_cooldown, remove_cooldown,
     add_pending_application, has_pending_application,
-    check_mod_permissions
+    check_mod_permissions, init_verification_store,
+    sweep_expired_cooldowns, get_or_fetch_member
 )
+from utils.dm_sessions import DMForm, get_dm_router
+from utils.guild_settings import get_guild_settings
+from utils.leader import get_leader
+from utils.message_queue import get_message_queue
+from utils.embed_templates import embed_templates
 import asyncio
+import logging
+from utils.database import get_db_pool
+from utils.startup import track_startup
+
+logger = logging.getLogger(__name__)
 
 class VerificationSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.processing_lock = asyncio.Lock()
+        self.db = None
+        self.ready = asyncio.Event()
+        self.settings = get_guild_settings(bot)
+        self.leader = get_leader(bot)
+        self.outbox = get_message_queue(bot)
+        self.bot.loop.create_task(track_startup(self.bot, __name__, self.init_db()))
+        self.sweep_cooldowns.start()
+        self.verification_slots = asyncio.Semaphore(config.VERIFICATION_MAX_CONCURRENT)
+        self.router = get_dm_router(bot)
+        self.router.register_form(DMForm(
+            name='verification',
+            steps=[{"key": question, "prompt": question} for question in config.VERIFICATION_QUESTIONS],
+            intro=config.VERIFICATION_START_MESSAGE,
+            timeout=config.VERIFICATION_QUESTION_TIMEOUT,
+            timeout_message="Verification timed out. Please try again in the verification channel.",
+            on_complete=self.submit_verification,
+            on_timeout=self.verification_timed_out
+        ))
+        # Sessions restored from disk still count as in progress
+        for user_id in self.router.session_users('verification'):
+            add_to_verification(user_id)
+        embed_templates.register('verification_setup', self.create_setup_embed, depends_on=('VERIFY_EMOJI',))
+        embed_templates.build('verification_setup')
+
+    async def init_db(self):
+        """Initialize database connection and load saved verification state"""
+        try:
+            print("Initializing database connection for verification...")
+            self.db = await get_db_pool(self.bot)
+            await init_verification_store(self.db)
+        except Exception as e:
+            print(f"Error initializing verification database: {e}")
+        finally:
+            # Without a database verification still works from memory
+            self.ready.set()
+
+    @tasks.loop(seconds=config.VERIFICATION_SWEEP_INTERVAL)
+    async def sweep_cooldowns(self):
+        """Remove expired verification cooldowns in one batch"""
+        try:
+            # Every process evicts its own cache; only the leader deletes the shared rows
+            removed = await sweep_expired_cooldowns(delete_rows=self.leader.is_leader)
+            if removed:
+                print(f"Swept {removed} expired verification cooldowns")
+        except Exception as e:
+            print(f"Error sweeping verification cooldowns: {e}")
+
+    @sweep_cooldowns.before_loop
+    async def before_sweep_cooldowns(self):
+        """Wait until saved state is loaded before sweeping"""
+        await self.ready.wait()
+
+    def cog_unload(self):
+        """Clean up when cog is unloaded"""
+        self.sweep_cooldowns.cancel()
+
+    def create_setup_embed(self):
+        """Create the verification channel embed"""
+        # Create embed
+        embed = discord.Embed(
+            title="Server Verification",
+            description="Welcome to our community! To ensure a safe and friendly environment, we require all new members to complete a brief verification process.",
+            color=discord.Color.blue()
+        )
+
+        # Add verification steps
+        embed.add_field(
+            name="📝 Verification Steps",
+            value=(
+                f"**1.** React with {config.VERIFY_EMOJI} below to begin\n"
+                "**2.** Answer a few simple questions in DMs\n"
+                "**3.** Wait for moderator approval\n"
+                "\n**Note:** Please ensure your DMs are open!"
+            ),
+            inline=False
+        )
+
+        # Add additional information
+        embed.add_field(
+            name="ℹ️ Important Information",
+            value=(
+                "• Verification helps us maintain a safe community\n"
+                "• Your answers will be reviewed by our moderation team\n"
+                "• The process usually takes just a few minutes\n"
+                "• If you need help, please contact a moderator"
+            ),
+            inline=False
+        )
+
+        embed.set_footer(text="Thank you for your patience! We look forward to welcoming you to our community.")
+
+        return embed
 
     @commands.command()
     @commands.check(check_mod_permissions)
@@ -23,44 +126,13 @@ class VerificationSystem(commands.Cog):
             # Clear existing messages in the channel
             await ctx.channel.purge(limit=100)
 
-            # Create embed
-            embed = discord.Embed(
-                title="Server Verification",
-                description="Welcome to our community! To ensure a safe and friendly environment, we require all new members to complete a brief verification process.",
-                color=discord.Color.blue()
-            )
-
-            # Add verification steps
-            embed.add_field(
-                name="📝 Verification Steps",
-                value=(
-                    "**1.** React with ✅ below to begin\n"
-                    "**2.** Answer a few simple questions in DMs\n"
-                    "**3.** Wait for moderator approval\n"
-                    "\n**Note:** Please ensure your DMs are open!"
-                ),
-                inline=False
-            )
-
-            # Add additional information
-            embed.add_field(
-                name="ℹ️ Important Information",
-                value=(
-                    "• Verification helps us maintain a safe community\n"
-                    "• Your answers will be reviewed by our moderation team\n"
-                    "• The process usually takes just a few minutes\n"
-                    "• If you need help, please contact a moderator"
-                ),
-                inline=False
-            )
-
-            embed.set_footer(text="Thank you for your patience! We look forward to welcoming you to our community.")
+            embed = embed_templates.get('verification_setup')
 
             # Send embed and add reaction
             welcome_msg = await ctx.send(embed=embed)
             await welcome_msg.add_reaction(config.VERIFY_EMOJI)
 
-            await ctx.send("Verification setup complete! Users can now react with ✅ to begin verification.")
+            await ctx.send(f"Verification setup complete! Users can now react with {config.VERIFY_EMOJI} to begin verification.")
 
         except Exception as e:
             await ctx.send(f"Error setting up verification: {str(e)}")
@@ -68,11 +140,25 @@ class VerificationSystem(commands.Cog):
 
     @commands.Cog.listener()
     async def on_ready(self):
-        """Set up verification message if it doesn't exist"""
+        """Set up verification messages in every guild"""
         print("Initializing verification system...")
-        channel = self.bot.get_channel(config.VERIFICATION_CHANNEL_ID)
+        for guild in self.bot.guilds:
+            await self.setup_guild(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        """Set up verification in a guild the bot was just added to"""
+        await self.setup_guild(guild)
+
+    async def setup_guild(self, guild: discord.Guild):
+        """Set up a guild's verification message if it doesn't exist"""
+        channel_id = self.settings.get(guild.id)['verification_channel_id']
+        if not channel_id:
+            return
+
+        channel = self.bot.get_channel(channel_id)
         if not channel:
-            print(f"Error: Could not find verification channel {config.VERIFICATION_CHANNEL_ID}")
+            print(f"Error: Could not find verification channel {channel_id} in {guild.name}")
             return
 
         # Check for existing verification message
@@ -98,31 +184,46 @@ class VerificationSystem(commands.Cog):
             print(f"Error in verification setup: {str(e)}")
 
 
-    async def process_verification(self, member: discord.Member):
-        """Process the verification for a member"""
+    async def start_verification(self, member: discord.Member):
+        """Open a verification DM session for a member"""
         try:
             print(f"Starting verification process for {member.name} (ID: {member.id})")
-            # Send initial message
-            await member.send(config.VERIFICATION_START_MESSAGE)
-            await asyncio.sleep(1)  # Small delay to prevent message overlap
-
-            # Process all questions in sequence
-            answers = []
-            for i, question in enumerate(config.VERIFICATION_QUESTIONS):
-                print(f"Asking question {i+1} to {member.name}")
-                answer = await ask_question(member, question, self.bot)
-                if answer is None:  # If any question fails
-                    print(f"Question {i+1} failed for {member.name}")
-                    remove_from_verification(member.id)
-                    return
-                answers.append(answer)
-                await asyncio.sleep(1)  # Small delay between questions
+            await self.router.start(member, 'verification', {"guild_id": member.guild.id})
+        except discord.Forbidden:
+            print(f"Could not DM user {member.name}#{member.discriminator} - DMs are closed")
+            remove_from_verification(member.id)
+            try:
+                channel = self.bot.get_channel(self.settings.get(member.guild.id)['verification_channel_id'])
+                self.outbox.send(
+                    channel,
+                    f"{member.mention} I cannot send you direct messages. Please enable DMs for this server and try again.",
+                    delete_after=10
+                )
+            except:
+                pass
+        except Exception:
+            remove_from_verification(member.id)
+            raise
+
+    async def verification_timed_out(self, session: dict):
+        """Release a member whose verification session expired"""
+        remove_from_verification(session["user_id"])
+
+    async def submit_verification(self, session: dict):
+        """Send a completed verification session to the mod channel"""
+        user_id = session["user_id"]
+        try:
+            guild = self.bot.get_guild(session["context"].get("guild_id"))
+            member = await get_or_fetch_member(guild, user_id) if guild else None
+            if not member:
+                print(f"Could not find member {user_id} to submit verification")
+                return
 
             # Get mod channel
-            mod_channel = self.bot.get_channel(config.MOD_CHANNEL_ID)
+            mod_channel_id = self.settings.get(guild.id)['mod_channel_id']
+            mod_channel = self.bot.get_channel(mod_channel_id)
             if not mod_channel:
-                print(f"Error: Could not find mod channel {config.MOD_CHANNEL_ID}")
-                remove_from_verification(member.id)
+                print(f"Error: Could not find mod channel {mod_channel_id}")
                 return
 
             print(f"Creating verification request for {member.name}")
@@ -143,109 +244,124 @@ class VerificationSystem(commands.Cog):
             )
 
             # Add all questions and answers
-            for question, answer in zip(config.VERIFICATION_QUESTIONS, answers):
+            for question in config.VERIFICATION_QUESTIONS:
                 embed.add_field(
                     name=question,
-                    value=answer,
+                    value=session["answers"].get(question, "No answer"),
                     inline=False
                 )
 
-            # Send to mod channel
-            verify_message = await mod_channel.send(embed=embed)
-            await verify_message.add_reaction(config.APPROVE_EMOJI)
-            await verify_message.add_reaction(config.DENY_EMOJI)
+            async with self.verification_slots:
+                # Send to mod channel
+                verify_message = await mod_channel.send(embed=embed)
+                await verify_message.add_reaction(config.APPROVE_EMOJI)
+                await verify_message.add_reaction(config.DENY_EMOJI)
 
             print(f"Adding {member.name} to pending applications")
             # Mark application as pending
             add_pending_application(member.id)
 
-            # Notify user of completion
-            await asyncio.sleep(1)
-            await member.send(config.VERIFICATION_COMPLETE_MESSAGE)
-
             # Add cooldown after successful submission
             add_cooldown(member.id)
             print(f"Added cooldown for {member.name}")
 
-        except discord.Forbidden:
-            print(f"Could not DM user {member.name}#{member.discriminator} - DMs are closed")
+            # Notify user of completion
             try:
-                channel = self.bot.get_channel(config.VERIFICATION_CHANNEL_ID)
-                await channel.send(
-                    f"{member.mention} I cannot send you direct messages. Please enable DMs for this server and try again.",
-                    delete_after=10
-                )
-            except:
+                await member.send(config.VERIFICATION_COMPLETE_MESSAGE)
+            except discord.Forbidden:
                 pass
+
         finally:
-            remove_from_verification(member.id)
+            remove_from_verification(user_id)
 
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload):
         """Handle verification reactions"""
-        print(f"Reaction detected: {payload.emoji} in channel {payload.channel_id}")
-
         if payload.user_id == self.bot.user.id:
             return
 
-        if payload.channel_id != config.VERIFICATION_CHANNEL_ID:
+        if not payload.guild_id or payload.channel_id != self.settings.get(payload.guild_id)['verification_channel_id']:
             return
 
-        print(f"Comparing emoji: received '{str(payload.emoji)}' vs expected '{config.VERIFY_EMOJI}'")
+        logger.debug("Verification reaction %s (expecting %s)", payload.emoji, config.VERIFY_EMOJI)
         if str(payload.emoji) != config.VERIFY_EMOJI:
             return
 
-        async with self.processing_lock:
-            try:
-                guild = self.bot.get_guild(payload.guild_id)
-                if not guild:
-                    print("Could not find guild")
-                    return
-
-                member = guild.get_member(payload.user_id)
-                if not member:
-                    print(f"Could not find member {payload.user_id}")
-                    return
-
-                # Check if user is already in verification, has pending application, or is on cooldown
-                if is_in_verification(member.id):
-                    try:
-                        await member.send("You are already in the verification process. Please complete it or wait a moment.")
-                    except:
-                        pass
-                    return
-
-                if has_pending_application(member.id):
-                    try:
-                        await member.send("You already have a pending application. Please wait for moderators to review it.")
-                    except:
-                        pass
-                    return
-
-                if is_on_cooldown(member.id):
-                    try:
-                        await member.send("Please wait before submitting another verification request.")
-                    except:
-                        pass
-                    return
-
-                channel = guild.get_channel(payload.channel_id)
-                if channel:
-                    message = await channel.fetch_message(payload.message_id)
-                    await message.remove_reaction(payload.emoji, member)
-
-                print(f"Starting verification for member {member.name}")
-                add_to_verification(member.id)
-                await self.process_verification(member)
-
-            except Exception as e:
-                print(f"Error in verification process: {str(e)}")
-                if 'member' in locals():
-                    try:
-                        await member.send("An error occurred during verification. Please try again later.")
-                    except:
-                        pass
-                    remove_from_verification(member.id)
+        # Pending applications and cooldowns must be loaded before deciding anything
+        await self.ready.wait()
+
+        try:
+            guild = self.bot.get_guild(payload.guild_id)
+            if not guild:
+                print("Could not find guild")
+                return
+
+            member = payload.member
+            if not member:
+                print(f"Could not find member {payload.user_id}")
+                return
+
+            # Everything up to add_to_verification runs without awaiting, so the
+            # checks and the claim are atomic per user and duplicate clicks are rejected
+            if is_in_verification(member.id):
+                try:
+                    await member.send("You are already in the verification process. Please complete it or wait a moment.")
+                except:
+                    pass
+                return
+
+            # DM sessions are per user, so starting verification would discard another form's answers
+            if self.router.has_session(member.id):
+                try:
+                    await member.send("Please finish the questions already open in your DMs before verifying.")
+                except:
+                    pass
+                return
+
+            if has_pending_application(member.id):
+                try:
+                    await member.send("You already have a pending application. Please wait for moderators to review it.")
+                except:
+                    pass
+                return
+
+            if is_on_cooldown(member.id):
+                try:
+                    await member.send("Please wait before submitting another verification request.")
+                except:
+                    pass
+                return
+
+            member_count_cog = self.bot.get_cog('MemberCount')
+            if member_count_cog and member_count_cog.is_raid_member(guild.id, member.id):
+                try:
+                    await member.send("Verification is paused for new arrivals while moderators handle a raid. Please try again later.")
+                except:
+                    pass
+                return
+
+            print(f"Starting verification for member {member.name}")
+            add_to_verification(member.id)
+
+            channel = guild.get_channel(payload.channel_id)
+            if channel:
+                try:
+                    await channel.get_partial_message(payload.message_id).remove_reaction(payload.emoji, member)
+                except discord.HTTPException as e:
+                    print(f"Could not remove verification reaction: {e}")
+
+            # Bound the number of DM sessions being opened at once
+            async with self.verification_slots:
+                await self.start_verification(member)
+
+        except Exception as e:
+            print(f"Error in verification process: {str(e)}")
+            if 'member' in locals():
+                try:
+                    await member.send("An error occurred during verification. Please try again later.")
+                except:
+                    pass
+                remove_from_verification(member.id)
 
 async def setup(bot):
     await bot.add_cog(VerificationSystem(bot))
\ No newline at end of file